@@ -0,0 +1,202 @@
+"""Transcribe existing audio files headlessly, through the app's pipeline.
+
+Takes files and/or directories and runs every recording through
+transcribe_audio(): the configured STT provider, with meeting (2-channel)
+and phone-tagged recordings routed to Scribe multichannel/diarization
+exactly as in the app, plus optional LLM cleaning. Settings and API keys
+come from the same Documents\\VoiceTyping\\settings.json and .env.
+
+Files are processed on a thread pool, with a separate concurrency limit per
+STT provider (and for cleaning) so one provider's rate limits aren't hit.
+Each result is appended to a JSONL file as soon as it finishes; running the
+same command again skips files already transcribed successfully, so an
+interrupted batch resumes where it stopped.
+
+Imports nothing GUI-related (no Tk, pynput, pyautogui), so it runs on a
+server. Examples:
+
+    python batch_transcribe.py recordings/ -o results.jsonl
+    python batch_transcribe.py a.wav b.flac --clean --limit openai=2
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from modules import recording_info
+from modules.settings import Settings
+from modules.transcribe import is_conversation_recording, provider_for, transcribe_audio
+from services import async_core
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg', '.opus', '.mp3', '.m4a', '.webm')
+DEFAULT_OUTPUT = 'transcripts.jsonl'
+DEFAULT_WORKERS = 8
+# Concurrent requests per STT provider; a local/custom server usually
+# serves one request at a time. 'llm' bounds concurrent cleaning calls.
+DEFAULT_LIMITS = {'elevenlabs': 4, 'openai': 4, 'custom': 1, 'llm': 4}
+
+
+def find_audio_files(inputs: Iterable[str]) -> List[Path]:
+    """Audio files named directly or found (recursively) in directories, deduplicated."""
+    files, seen = [], set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = sorted(p for p in path.rglob('*') if p.suffix.lower() in AUDIO_EXTENSIONS)
+        elif path.is_file():
+            candidates = [path]
+        else:
+            raise FileNotFoundError(f"No such file or directory: {item}")
+        for candidate in candidates:
+            resolved = candidate.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                files.append(resolved)
+    return files
+
+
+def completed_files(output: Path) -> Set[str]:
+    """Files with a successful result in an existing output file."""
+    done = set()
+    if not output.exists():
+        return done
+    with open(output, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial last line from an interrupted run
+            if record.get('status') == 'ok':
+                done.add(record['file'])
+    return done
+
+
+def parse_limits(values: List[str]) -> Dict[str, int]:
+    limits = dict(DEFAULT_LIMITS)
+    for value in values:
+        name, _, count = value.partition('=')
+        if name not in limits or not count.isdigit() or int(count) < 1:
+            raise argparse.ArgumentTypeError(
+                f"--limit expects NAME=N with NAME in {', '.join(limits)}; got {value!r}")
+        limits[name] = int(count)
+    return limits
+
+
+class BatchTranscriber:
+    """Runs files through the pipeline and appends one JSONL record per file."""
+
+    def __init__(self, output: Path, limits: Dict[str, int], clean: bool,
+                 model: str, cleaning_timeout: float, language: Optional[str] = None) -> None:
+        self.output = output
+        self.clean = clean
+        self.model = model
+        self.cleaning_timeout = cleaning_timeout
+        self.language = language
+        self.token = async_core.CancelToken()
+        self._gates = {name: threading.BoundedSemaphore(n) for name, n in limits.items()}
+        self._write_lock = threading.Lock()
+
+    def transcribe(self, path: Path) -> dict:
+        filename = str(path)
+        start = time.perf_counter()
+        record = {'file': filename}
+        try:
+            provider = provider_for(filename)
+            record['provider'] = provider
+            with self._gates[provider]:
+                text = transcribe_audio(filename, language=self.language, cancelled=self.token)
+            # Speaker-labeled transcripts are left uncleaned, as in the app
+            if self.clean and text and not is_conversation_recording(filename):
+                from modules.clean_text import clean_transcription
+                with self._gates['llm']:
+                    cleaned = clean_transcription(text, model=self.model,
+                                                  timeout=self.cleaning_timeout,
+                                                  cancelled=self.token)
+                record['raw_text'] = text
+                text = cleaned
+            record.update(status='ok', text=text)
+        except async_core.Cancelled:
+            record.update(status='cancelled')
+        except Exception as e:
+            record.update(status='error', error=f"{type(e).__name__}: {e}")
+        finally:
+            recording_info.forget(filename)
+        record['seconds'] = round(time.perf_counter() - start, 2)
+        if record['status'] != 'cancelled':
+            self._write(record)
+        return record
+
+    def _write(self, record: dict) -> None:
+        with self._write_lock:
+            with open(self.output, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='audio files or directories')
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help='JSONL results file, appended to and used to resume (default %(default)s)')
+    parser.add_argument('--clean', action='store_true',
+                        help='also clean transcripts with the LLM (llm_model setting)')
+    parser.add_argument('--model', help='LLM model for --clean (default: llm_model setting)')
+    parser.add_argument('--language', help='language override (default: stt_language setting)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='files in flight at once (default %(default)s)')
+    parser.add_argument('--limit', action='append', default=[], metavar='NAME=N',
+                        help='per-provider concurrency, e.g. openai=2 or llm=8 '
+                             f'(defaults: {", ".join(f"{k}={v}" for k, v in DEFAULT_LIMITS.items())})')
+    parser.add_argument('--redo', action='store_true',
+                        help='transcribe files again even if the output already has them')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show pipeline logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    try:
+        limits = parse_limits(args.limit)
+        files = find_audio_files(args.inputs)
+    except (argparse.ArgumentTypeError, FileNotFoundError) as e:
+        parser.error(str(e))
+
+    output = Path(args.output)
+    done = set() if args.redo else completed_files(output)
+    todo = [f for f in files if str(f) not in done]
+    print(f"{len(files)} files, {len(files) - len(todo)} already done, {len(todo)} to transcribe "
+          f"-> {output}", file=sys.stderr)
+    if not todo:
+        return 0
+
+    settings = Settings()
+    batch = BatchTranscriber(output, limits, clean=args.clean,
+                             model=args.model or settings.get('llm_model'),
+                             cleaning_timeout=settings.get('cleaning_timeout'),
+                             language=args.language)
+    failed = 0
+    pool = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='batch')
+    try:
+        futures = {pool.submit(batch.transcribe, f): f for f in todo}
+        for count, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            failed += record['status'] == 'error'
+            detail = record.get('error') or f"{len(record.get('text', ''))} chars"
+            print(f"[{count}/{len(todo)}] {record['status']:5} {os.path.basename(record['file'])} "
+                  f"({record.get('provider', '?')}, {record['seconds']}s): {detail}", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("Interrupted; finished files are saved, run again to resume", file=sys.stderr)
+        pool.shutdown(wait=False, cancel_futures=True)
+        batch.token.cancel()
+        return 130
+    pool.shutdown()
+    print(f"Done: {len(todo) - failed} transcribed, {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
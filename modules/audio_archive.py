@@ -0,0 +1,271 @@
+"""Optional archive of every transcribed recording, as FLAC.
+
+Recordings are normally deleted once the next one completes, so the audio
+behind older history entries is gone. With the archive enabled, each
+recording whose transcript goes into history is also encoded to FLAC under
+Documents\\VoiceTyping\\audio\\YYYY\\MM\\DD\\ on a background thread, and the
+history entry stores the archive name. The oldest files are evicted once
+the archive exceeds its size or age limit.
+
+FLAC rather than Opus: recordings are 22.05 kHz, which Opus can't store
+without resampling, and a lossless copy keeps re-transcription as accurate
+as the original. The WAV comment (phone-mode tag) and channel layout are
+preserved, so archived recordings route exactly like the originals.
+
+retranscribe() runs archived recordings through a transcriber again as
+background jobs on the shared work pool (so dictations keep priority),
+updating their history entries and writing a JSONL
+report of old and new text.
+"""
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional, Set
+
+from modules import recording_info
+from services import work_pool
+
+logger = logging.getLogger('voice_typing')
+
+ARCHIVE_DIR = Path.home() / "Documents" / "VoiceTyping" / "audio"
+# Read/encode this many frames at a time so long recordings don't sit in memory
+_BLOCK_FRAMES = 1 << 16
+
+_STOP = object()
+
+
+class AudioArchive:
+    """Background FLAC encoder plus size/age eviction for archived recordings."""
+
+    def __init__(self, max_mb: Optional[float] = None, max_days: Optional[int] = None,
+                 root: Path = ARCHIVE_DIR) -> None:
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.max_days = max_days
+        self._lock = threading.Lock()
+        self._pending: Set[Path] = set()
+        self._queue: "queue.Queue" = queue.Queue()
+        # (name, size) of archived files, oldest first; built by the worker
+        self._files: deque = deque()
+        self._total_bytes = 0
+        self._worker = threading.Thread(target=self._run, name='audio-archive', daemon=True)
+        self._worker.start()
+
+    def submit(self, wav_path: str, remove: bool = False) -> Optional[str]:
+        """Queue a recording for archiving and return its archive name.
+
+        With remove, the archive takes ownership and deletes wav_path once
+        it is encoded. Returns None if the file doesn't exist.
+        """
+        if not os.path.exists(wav_path):
+            return None
+        name = f"{datetime.now():%Y/%m/%d/%H%M%S}-{uuid.uuid4().hex[:6]}.flac"
+        with self._lock:
+            self._pending.add(Path(wav_path).resolve())
+        self._queue.put((wav_path, name, remove))
+        return name
+
+    def pending_paths(self) -> Set[Path]:
+        """Recordings not yet encoded; their files must not be deleted."""
+        with self._lock:
+            return set(self._pending)
+
+    def path_for(self, name: str) -> Path:
+        return self.root / name
+
+    def decode_to_wav(self, name: str, dest: str) -> None:
+        """Write an archived recording back out as WAV (with its comment)."""
+        import soundfile as sf
+        with sf.SoundFile(str(self.path_for(name))) as src:
+            with sf.SoundFile(dest, mode='w', samplerate=src.samplerate, channels=src.channels,
+                              format='WAV', subtype='PCM_16') as out:
+                if src.comment:
+                    out.comment = src.comment
+                for block in src.blocks(blocksize=_BLOCK_FRAMES, dtype='float32', always_2d=True):
+                    out.write(block)
+
+    def close(self) -> None:
+        """Finish queued encodes and stop the worker."""
+        if self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join(30)
+
+    def _run(self) -> None:
+        self._scan()
+        self._evict()
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            wav_path, name, remove = item
+            try:
+                self._encode(wav_path, name)
+            except Exception as e:
+                logger.warning(f"Could not archive {os.path.basename(wav_path)}: {e}")
+            finally:
+                # The submitter handed the file over and won't delete it,
+                # so it goes whether or not the encode worked
+                if remove:
+                    try:
+                        os.remove(wav_path)
+                    except OSError:
+                        pass
+                    recording_info.forget(wav_path)
+                with self._lock:
+                    self._pending.discard(Path(wav_path).resolve())
+            self._evict()
+
+    def _scan(self) -> None:
+        # Names are date-sharded and time-prefixed, so path order is age order
+        files = []
+        if self.root.exists():
+            for path in sorted(self.root.rglob('*.flac')):
+                try:
+                    files.append((path.relative_to(self.root).as_posix(), path.stat().st_size))
+                except OSError:
+                    continue
+        self._files = deque(files)
+        self._total_bytes = sum(size for _, size in files)
+        logger.debug(f"Audio archive: {len(files)} recordings, {self._total_bytes / 1e6:.1f} MB")
+
+    def _encode(self, wav_path: str, name: str) -> None:
+        import soundfile as sf
+        start = time.perf_counter()
+        dest = self.path_for(name)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_suffix('.tmp')
+        try:
+            with sf.SoundFile(wav_path) as src:
+                with sf.SoundFile(str(tmp), mode='w', samplerate=src.samplerate, channels=src.channels,
+                                  format='FLAC', subtype='PCM_16') as out:
+                    if src.comment:
+                        out.comment = src.comment
+                    for block in src.blocks(blocksize=_BLOCK_FRAMES, dtype='float32', always_2d=True):
+                        out.write(block)
+            os.replace(tmp, dest)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            raise
+        size = dest.stat().st_size
+        self._files.append((name, size))
+        self._total_bytes += size
+        logger.debug(f"Archived {name} ({size / 1e3:.0f} kB in {time.perf_counter() - start:.2f}s)")
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.max_days * 86400 if self.max_days else None
+        removed = 0
+        while self._files:
+            name, size = self._files[0]
+            path = self.path_for(name)
+            over_size = self.max_bytes is not None and self._total_bytes > self.max_bytes
+            if not over_size:
+                try:
+                    if cutoff is None or path.stat().st_mtime >= cutoff:
+                        break
+                except OSError:
+                    pass  # already gone; drop it from the list
+            self._files.popleft()
+            self._total_bytes -= size
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+            _remove_empty_dirs(path.parent, self.root)
+        if removed:
+            logger.info(f"Audio archive: evicted {removed} oldest recordings "
+                        f"({self._total_bytes / 1e6:.1f} MB kept)")
+
+
+def _remove_empty_dirs(directory: Path, root: Path) -> None:
+    while directory != root and root in directory.parents:
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+        directory = directory.parent
+
+
+def retranscribe(history, archive: AudioArchive, transcribe: Callable[[str], str],
+                 since: Optional[datetime] = None,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 cancelled: Optional[Callable[[], bool]] = None) -> dict:
+    """Transcribe every archived recording in history again.
+
+    transcribe(wav_path) returns the new text. Each entry whose recording is
+    still archived gets its text replaced; old and new text (or the error)
+    are written to retranscribe-<time>.jsonl in the archive folder.
+    Session chunks recorded with an overlap are skipped: their audio starts
+    with the previous chunk's tail, whose repeated words were removed from
+    the entry by matching against that chunk's timeline, which isn't kept.
+    on_progress(done, total) is called after each recording.
+    Returns counts: total, updated, unchanged, skipped, missing, failed,
+    plus 'report'.
+    """
+    entries = history.with_audio(since)
+    report_path = archive.root / f"retranscribe-{datetime.now():%Y%m%d-%H%M%S}.jsonl"
+    counts = {'total': len(entries), 'updated': 0, 'unchanged': 0, 'skipped': 0,
+              'missing': 0, 'failed': 0}
+    lock = threading.Lock()
+    done = [0]
+    archive.root.mkdir(parents=True, exist_ok=True)
+
+    with open(report_path, 'w', encoding='utf-8') as report:
+        def record(entry: dict, outcome: str, **fields) -> None:
+            line = {'id': entry['id'], 'timestamp': entry['timestamp'], 'audio': entry['audio'],
+                    'outcome': outcome, **fields}
+            with lock:
+                counts[outcome] += 1
+                report.write(json.dumps(line, ensure_ascii=False) + '\n')
+                report.flush()
+                done[0] += 1
+                progress = done[0]
+            if on_progress:
+                on_progress(progress, len(entries))
+
+        def run(entry: dict) -> None:
+            if cancelled and cancelled():
+                return
+            if entry.get('overlap_s'):
+                record(entry, 'skipped', reason='chunk starts with an overlap')
+                return
+            if not archive.path_for(entry['audio']).exists():
+                record(entry, 'missing')
+                return
+            fd, wav_path = tempfile.mkstemp(suffix='.wav', prefix='retranscribe-')
+            os.close(fd)
+            try:
+                archive.decode_to_wav(entry['audio'], wav_path)
+                text = transcribe(wav_path)
+            except Exception as e:
+                record(entry, 'failed', error=str(e))
+                return
+            finally:
+                try:
+                    os.remove(wav_path)
+                except OSError:
+                    pass
+                recording_info.forget(wav_path)
+            if not text or text == entry['text']:
+                record(entry, 'unchanged')
+                return
+            history.update_text(entry['id'], text)
+            record(entry, 'updated', old=entry['text'], new=text)
+
+        pool = work_pool.get_pool()
+        futures = [pool.submit(run, entry, priority=work_pool.BACKGROUND) for entry in entries]
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    logger.info(f"Re-transcribed archive: {counts} (report: {report_path.name})")
+    return dict(counts, report=str(report_path))
@@ -7,15 +7,22 @@ are delivered strictly in chunk order — chunk N+1's text waits until chunk N
 has been delivered or permanently failed — so the assembled transcript always
 reads chronologically.
 
+Consecutive chunks may share a short stretch of audio (the recorder replays
+the previous chunk's tail at the head of the next), so a word cut by a flush
+is transcribed whole at least once. When the transcriber returns word
+timings, delivery keeps the previous chunk's timeline and drops words the
+new chunk repeats from that overlap before on_result fires.
+
 Callbacks receive all data as arguments and run WITHOUT the queue's state
 lock held (so slow work — disk I/O, tray menu rebuilds — can't block
 submit/close/cancel); delivery callbacks are serialized by a dedicated lock
 to preserve chunk order. They still must not call back into the queue.
 """
 import logging
+import re
 import threading
 import time
-from typing import Callable, List
+from typing import Any, Callable, List, Optional, Tuple
 
 logger = logging.getLogger('voice_typing')
 
@@ -25,24 +32,93 @@ RETRY_DELAY_S = 2.0
 
 _PENDING, _DONE, _FAILED = 'pending', 'done', 'failed'
 
+# A word at the head of a chunk duplicates one in the previous chunk's tail
+# when both transcriptions place the same word this close together on the
+# shared audio (timestamps drift a little with the surrounding context)
+OVERLAP_MATCH_TOLERANCE_S = 0.5
+# Upper bound on a single word's length, used to stop scanning back through
+# the previous chunk once words can no longer reach the overlap window
+_MAX_WORD_S = 3.0
+
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize_word(text: str) -> str:
+    return _NON_WORD.sub('', text).lower()
+
+
+def _match_key(word: dict) -> tuple:
+    """Who said the word plus its normalized text. Meeting transcripts tag
+    words with their channel (mic / system audio), stable across chunks;
+    diarized phone transcripts with a speaker. Plain transcripts have neither."""
+    source = word.get('channel_index')
+    if source is None:
+        source = word.get('speaker_id')
+    return source, _normalize_word(word['text'])
+
+
+def drop_overlap_duplicates(prev_words: List[dict], prev_duration: float,
+                            words: List[dict], overlap_s: float) -> List[dict]:
+    """Drop words at the head of a chunk that repeat the previous chunk's tail.
+
+    The first overlap_s seconds of a chunk replay the last overlap_s seconds
+    of the previous one. A word there is a duplicate when the previous chunk
+    has the same word at the same point of the shared audio; each previous
+    word absorbs at most one duplicate. Unmatched words in the window are
+    kept — they straddled the old cut and were lost or garbled before.
+
+    Words only match when the same speaker/channel said them (_match_key),
+    so the other side saying the same word in the window isn't dropped.
+    Diarized speaker ids can be renumbered between chunks; a real duplicate
+    is then kept, which is the safer way to be wrong.
+    """
+    offset = prev_duration - overlap_s
+    tail: dict = {}  # (speaker, normalized word) -> starts mapped onto this chunk's clock
+    for w in reversed(prev_words):
+        if w.get('type', 'word') != 'word':
+            continue
+        if w['start'] < offset - _MAX_WORD_S:
+            break
+        if w['end'] > offset:
+            tail.setdefault(_match_key(w), []).append(w['start'] - offset)
+
+    kept = []
+    for w in words:
+        if w.get('type', 'word') == 'word' and w['start'] < overlap_s:
+            starts = tail.get(_match_key(w))
+            match = next((s for s in starts or ()
+                          if abs(s - w['start']) <= OVERLAP_MATCH_TOLERANCE_S), None)
+            if match is not None:
+                starts.remove(match)
+                continue
+        kept.append(w)
+    return kept
+
 
 class ChunkQueue:
     def __init__(self,
-                 transcribe_fn: Callable[[str], str],
-                 on_result: Callable[[int, str, str], None],
+                 transcribe_fn: Callable[[str], Any],
+                 on_result: Callable[[int, str, str, float], None],
                  on_retrying: Callable[[int], None],
                  on_failed: Callable[[int, str], None],
                  on_pending: Callable[[int], None],
-                 on_drained: Callable[[List[str]], None]) -> None:
+                 on_drained: Callable[[List[str]], None],
+                 on_cancel: Optional[Callable[[], None]] = None) -> None:
         """
         Args:
-            transcribe_fn: (path) -> transcript text; raises on failure.
-            on_result: (chunk_index, text, path) — delivered strictly in order.
+            transcribe_fn: (path) -> transcript text, or an object with
+                .text, .words (per-word start/end) and .render(words) to
+                enable overlap de-duplication; raises on failure.
+            on_result: (chunk_index, text, path, overlap_s) — delivered
+                strictly in order; overlap_s is the replayed head the file
+                starts with (its repeated words are already out of text).
             on_retrying: (chunk_index) — first attempt failed, retry starting.
             on_failed: (chunk_index, path) — chunk permanently failed; its file
                 is kept on disk for manual retry.
             on_pending: (count) — number of undelivered chunks changed.
             on_drained: (failed_paths) — queue closed and fully delivered.
+            on_cancel: () — called by cancel() to abort running
+                transcriptions (e.g. cancel their requests' token).
         """
         self._transcribe = transcribe_fn
         self._on_result = on_result
@@ -50,6 +126,7 @@ class ChunkQueue:
         self._on_failed = on_failed
         self._on_pending = on_pending
         self._on_drained = on_drained
+        self._on_cancel = on_cancel
         self._lock = threading.RLock()
         # Serializes deliverers so results leave in order even when two
         # workers finish near-simultaneously; never held while _lock is taken
@@ -61,15 +138,26 @@ class ChunkQueue:
         self._cancelled = False
         self._drained_notified = False
         self.failed_paths: List[str] = []
+        # (words, duration) of the last delivered chunk; only touched while
+        # _deliver_lock is held, so it always belongs to the previous chunk
+        self._prev_timeline: Optional[Tuple[List[dict], float]] = None
+
+    def submit(self, path: str, overlap_s: float = 0.0,
+               duration_s: Optional[float] = None) -> int:
+        """Queue a chunk file for transcription; returns its 1-based chunk number.
 
-    def submit(self, path: str) -> int:
-        """Queue a chunk file for transcription; returns its 1-based chunk number."""
+        overlap_s: seconds at the head of this chunk replayed from the
+            previous chunk's tail (0 = no overlap).
+        duration_s: length of the chunk file, needed to line this chunk's
+            tail up with the next chunk's overlap.
+        """
         with self._lock:
             if self._closed or self._cancelled:
                 raise RuntimeError("ChunkQueue is closed")
             index = self._next_index
             self._next_index += 1
-            chunk = {'index': index, 'path': path, 'state': _PENDING, 'text': None}
+            chunk = {'index': index, 'path': path, 'state': _PENDING, 'result': None,
+                     'overlap': overlap_s, 'duration': duration_s}
             self._chunks.append(chunk)
             pending = len(self._chunks)
         try:
@@ -86,11 +174,17 @@ class ChunkQueue:
         self._drain()  # fires on_drained now if the queue is already empty
 
     def cancel(self) -> None:
-        """Drop all undelivered results. Running transcriptions finish silently."""
+        """Drop all undelivered results. Running transcriptions are aborted via
+        on_cancel if given, otherwise they finish silently."""
         with self._lock:
             self._cancelled = True
             self._closed = True
             self._chunks.clear()
+        if self._on_cancel is not None:
+            try:
+                self._on_cancel()
+            except Exception:
+                logger.exception("Error in cancel callback")
 
     def active_paths(self) -> List[str]:
         """Files the queue still needs (pending chunks + kept failures)."""
@@ -105,7 +199,7 @@ class ChunkQueue:
     def _worker(self, chunk: dict) -> None:
         for attempt in (1, 2):
             try:
-                chunk['text'] = self._transcribe(chunk['path'])
+                chunk['result'] = self._transcribe(chunk['path'])
                 chunk['state'] = _DONE
                 break
             except Exception as e:
@@ -151,8 +245,11 @@ class ChunkQueue:
                         self.failed_paths.append(chunk['path'])
                 try:
                     if chunk['state'] == _DONE:
-                        self._on_result(chunk['index'], chunk['text'], chunk['path'])
+                        text = self._deliverable_text(chunk)
+                        self._on_result(chunk['index'], text, chunk['path'], chunk['overlap'])
                     else:
+                        # Nothing to compare the next chunk's overlap against
+                        self._prev_timeline = None
                         self._on_failed(chunk['index'], chunk['path'])
                 except Exception:
                     logger.exception(f"Error delivering chunk {chunk['index']}")
@@ -162,3 +259,29 @@ class ChunkQueue:
                     self._on_drained(failed)
             except Exception:
                 logger.exception("Error in queue status callback")
+
+    def _deliverable_text(self, chunk: dict) -> str:
+        """Chunk text minus words repeated from the previous chunk's overlap.
+
+        Called under _deliver_lock, in delivery order."""
+        result = chunk['result']
+        prev, self._prev_timeline = self._prev_timeline, None
+        words = getattr(result, 'words', None)
+        if words is None:
+            # Plain-text transcriber: no timeline to de-duplicate against
+            return result if isinstance(result, str) else result.text
+        if chunk['duration'] is not None:
+            self._prev_timeline = (words, chunk['duration'])
+        if prev is None or not chunk['overlap']:
+            return result.text
+        try:
+            kept = drop_overlap_duplicates(prev[0], prev[1], words, chunk['overlap'])
+            if len(kept) == len(words):
+                return result.text
+            text = result.render(kept)
+        except Exception:
+            logger.exception(f"Chunk {chunk['index']}: overlap de-duplication failed")
+            return result.text
+        logger.info(f"Chunk {chunk['index']}: dropped {len(words) - len(kept)} "
+                    f"word(s) repeated from the previous chunk's overlap")
+        return text
@@ -1,7 +1,14 @@
+import asyncio
+import importlib
 import logging
-from typing import Any, cast
+import re
+import threading
+import time
+from typing import Any, Callable, Optional, cast
 
+from modules.cleaning_cache import CleaningCache, estimate_tokens
 from modules.settings import Settings
+from services import async_core
 
 # Get logger
 logger = logging.getLogger('voice_typing')
@@ -12,24 +19,7 @@ logging.getLogger('LiteLLM').setLevel(logging.CRITICAL + 1)
 # see: https://github.com/BerriAI/litellm/issues/9424
 # and: https://github.com/BerriAI/litellm/issues/9432
 
-def clean_transcription(text: str, model: str, timeout: float = 45.0) -> str:
-    """
-    Cleans and corrects voice-to-text transcription using LLM models.
-
-    Args:
-        text: The raw transcription text to clean
-        model: The LLM model to use for cleaning
-        timeout: Maximum time to wait for cleaning (in seconds)
-    """
-    # Deferred import: litellm is one of the heaviest imports in the app and
-    # cleaning is optional, so don't pay for it at startup
-    import litellm
-
-    log_text = Settings().get('log_transcript_text')
-    if log_text:
-        logger.info("ORIGINAL: %s", text)
-
-    prompt = """
+CLEANING_PROMPT = """
 Improve transcription clarity by making minimal edits to fix:
 - Fragmented sentences
 - Filler words ("uh", "um")
@@ -67,28 +57,610 @@ IMPROVED: I guess I'm more looking for something that includes the word "Clockif
 
 **Transcription Text**
 
-<transcription_text>
-{}
-</transcription_text>
+The user message contains the transcription to improve, inside <transcription_text> tags. Long transcriptions are cleaned in parts: the user message may then also contain <preceding_text> with the end of the previous part, for context only. Never repeat or edit the preceding text.
 
 IMPORTANT: Respond only with the corrected transcription text, nothing else. So the first word of your response should be the first word of the transcription, and the last word of your response should be the last word of the transcription.
-    """.strip().format(text)
+""".strip()
+
+# End of a sentence in streamed output: terminal punctuation (plus closing
+# quotes/brackets) followed by whitespace. The whitespace stays with the
+# sentence so the emitted pieces concatenate back to the exact output.
+_SENTENCE_END = re.compile(r'[.!?…]+["\'\)\]”’]*\s+')
+
 
-    response_any: Any = litellm.completion(
+class CleaningInterrupted(Exception):
+    """Streamed cleaning failed after some sentences were already delivered.
+
+    The caller can't fall back to inserting the raw text without
+    duplicating what is already on screen; delivered holds that prefix.
+    """
+
+    def __init__(self, message: str, delivered: str):
+        super().__init__(message)
+        self.delivered = delivered
+
+
+def _completion_args(text: str, model: str, timeout: float,
+                     context: Optional[str] = None) -> dict:
+    # Static instructions first, as the system message, so providers with
+    # prompt caching can reuse the prefix; only the user message varies.
+    # OpenAI caches long prefixes automatically, Anthropic needs a marker.
+    system: Any = CLEANING_PROMPT
+    if model.startswith('anthropic/'):
+        system = [{"type": "text", "text": CLEANING_PROMPT,
+                   "cache_control": {"type": "ephemeral"}}]
+    user = f"<transcription_text>\n{text}\n</transcription_text>"
+    if context:
+        user = f"<preceding_text>\n{context}\n</preceding_text>\n\n{user}"
+    return dict(
         model=model,
-        messages=[{"role": "user", "content": prompt}],
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
         temperature=0.2,
         num_retries=2,
         timeout=timeout
     )
 
+
+_cache: Optional[CleaningCache] = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> Optional[CleaningCache]:
+    """The cleaning cache, loaded on first use; None when disabled."""
+    global _cache
+    if not Settings().get('cleaning_cache'):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CleaningCache(CLEANING_PROMPT)
+        return _cache
+
+
+def close_cache() -> None:
+    """Save the cleaning cache's pending hit counters (at exit)."""
+    with _cache_lock:
+        cache = _cache
+    if cache is not None:
+        cache.close()
+
+
+def _tokens_used(response: Any, text: str, cleaned: str) -> int:
+    """Total tokens a cleaning call cost, from the reported usage if any."""
+    usage = getattr(response, 'usage', None)
+    try:
+        cached = getattr(getattr(usage, 'prompt_tokens_details', None), 'cached_tokens', None)
+        if cached:
+            logger.info(f"Cleaning prompt prefix reused from provider cache ({cached} tokens)")
+        return int(usage.prompt_tokens) + int(usage.completion_tokens)
+    except (AttributeError, TypeError, ValueError):
+        return estimate_tokens(CLEANING_PROMPT + text + cleaned)
+
+
+# --- Windowed cleaning of long transcripts ----------------------------------
+# Completion latency grows with output length, so one call for a 15-minute
+# dictation can outlast cleaning_timeout. Long text is split at paragraph or
+# sentence boundaries into windows that are cleaned concurrently (each with
+# its own timeout) and reassembled in order. Each window sees the end of the
+# previous one as read-only context, so cleaning stays consistent across
+# the seams.
+
+# Texts at least this long are cleaned in windows
+CHUNKED_CLEANING_MIN_CHARS = 2000
+# Target window size; a single longer sentence becomes its own window
+CLEANING_WINDOW_CHARS = 1200
+# Tail of the previous window passed along as context
+CLEANING_CONTEXT_CHARS = 300
+MAX_PARALLEL_WINDOWS = 4
+
+_BOUNDARY = re.compile(r'\n\s*\n|(?<=[.!?…])\s+')
+
+
+def _split_windows(text: str) -> list:
+    """Split text into (window, separator) pairs that concatenate back to text."""
+    windows = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        size = match.start() - start
+        paragraph = '\n' in match.group()
+        # End a window at the first boundary past the target size, or at a
+        # paragraph break once it is half full
+        if size >= CLEANING_WINDOW_CHARS or (paragraph and size >= CLEANING_WINDOW_CHARS // 2):
+            windows.append((text[start:match.start()], match.group()))
+            start = match.end()
+    windows.append((text[start:], ''))
+    return windows
+
+
+def _context_before(window: str) -> str:
+    """The last few sentences of a window, for the next window's context."""
+    tail = window[-CLEANING_CONTEXT_CHARS:]
+    if len(tail) < len(window):
+        match = _BOUNDARY.search(tail)
+        tail = tail[match.end():] if match else tail.split(' ', 1)[-1]
+    return tail
+
+
+async def _clean_windows(text: str, model: str, timeout: float,
+                         on_window: Optional[Callable[[str], None]] = None) -> str:
+    """Clean text in concurrent windows; on_window gets each in order when ready.
+
+    A failed window keeps its raw text. Only if every window failed (and
+    nothing was handed to on_window) is the error raised.
+    """
+    import litellm
+
+    windows = _split_windows(text)
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_WINDOWS)
+    failures = []
+
+    async def clean_window(i: int) -> str:
+        window = windows[i][0]
+        context = _context_before(windows[i - 1][0]) if i else None
+        async with semaphore:
+            try:
+                response: Any = await litellm.acompletion(
+                    **_completion_args(window, model, timeout, context))
+                cleaned = response.choices[0].message.content
+                return cleaned.strip() if cleaned and cleaned.strip() else window
+            except Exception as e:
+                logger.warning(f"Cleaning window {i + 1}/{len(windows)} failed, keeping it raw: {e}")
+                failures.append(e)
+                return window
+
+    tasks = [asyncio.ensure_future(clean_window(i)) for i in range(len(windows))]
+    parts = []
+    try:
+        for task, (_, separator) in zip(tasks, windows):
+            piece = await task + separator
+            parts.append(piece)
+            if on_window is not None:
+                on_window(piece)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    if len(failures) == len(windows) and on_window is None:
+        raise failures[0]
+    logger.info(f"Cleaned {len(windows)} windows ({MAX_PARALLEL_WINDOWS} at a time), "
+                f"{len(failures)} kept raw")
+    return ''.join(parts)
+
+
+# --- Local fast path -------------------------------------------------------
+# Short, simple dictations usually only need filler removal and dictated
+# punctuation, which deterministic rules handle in well under a millisecond.
+# Anything longer or messier (run-ons, restarts, hedges) still goes to the LLM.
+
+# Complexity limits above which the LLM is used
+LOCAL_CLEAN_MAX_WORDS = 30
+LOCAL_CLEAN_MAX_FRAGMENTS = 3
+
+_FILLERS = frozenset({'um', 'umm', 'uh', 'uhh', 'uhm', 'er', 'erm', 'ah', 'hmm', 'mm'})
+# Phrases the rules can't judge (they may or may not be filler), and
+# immediately repeated words (stutters or "had had"); leave those to the LLM
+_NEEDS_LLM = re.compile(
+    r"\b(?:like|you know|i mean|sort of|kind of|i guess|scratch that|okay so)\b"
+    r"|\b(?!dot\b)(\w+)\W+\1\b",
+    re.IGNORECASE)
+_FRAGMENT_END = re.compile(r'[.!?]+(?:\s|$)')
+# A token: leading punctuation, the word, trailing punctuation
+_TOKEN = re.compile(r'^([("\'“‘]*)(.*?)([)"\'”’.,;:!?…]*)$')
+
+_PAREN_OPEN = {('open', 'parenthesis'), ('open', 'paren'), ('parenthesis',)}
+_PAREN_CLOSE = {('close', 'parenthesis'), ('close', 'paren'), ('end', 'parenthesis'), ('parenthesis',)}
+_QUOTE_OPEN = {('open', 'quote'), ('quote',)}
+_QUOTE_CLOSE = {('close', 'quote'), ('end', 'quote'), ('unquote',)}
+_ELLIPSIS = ('dot', 'dot', 'dot')
+
+
+def _needs_llm(text: str) -> bool:
+    """Complexity heuristic: True if the text is too long or messy for the rules."""
+    words = text.split()
+    if len(words) > LOCAL_CLEAN_MAX_WORDS:
+        return True
+    if len(_FRAGMENT_END.findall(text)) > LOCAL_CLEAN_MAX_FRAGMENTS:
+        return True
+    return _NEEDS_LLM.search(text) is not None
+
+
+def _match_phrase(cores: list, i: int, phrases) -> int:
+    """Length of the longest phrase in phrases starting at cores[i], else 0."""
+    best = 0
+    for phrase in phrases:
+        n = len(phrase)
+        if n > best and tuple(cores[i:i + n]) == phrase:
+            best = n
+    return best
+
+
+def clean_locally(text: str) -> Optional[str]:
+    """
+    Rule-based cleaning for simple dictations: drops filler words and turns
+    dictated punctuation ("dot dot dot", "open parenthesis ... close
+    parenthesis", "quote ... end quote") into symbols.
+
+    Returns None when the text needs the LLM: it fails the complexity
+    heuristic, or its dictated punctuation is ambiguous (e.g. a parenthesis
+    that is never closed).
+    """
+    if _needs_llm(text):
+        return None
+
+    parts = [_TOKEN.match(raw).groups() for raw in text.split()]
+    cores = [word.lower() for _, word, _ in parts]
+    out: list = []          # [lead, word, trail] per emitted token
+    pending_lead = ''       # opening symbol for the next emitted word
+    capitalize_next = False
+    state = None            # None, 'paren' or 'quote'
+
+    def close(symbol: str, trail: str) -> bool:
+        if not out:
+            return False
+        last = out[-1]
+        last[2] = last[2].rstrip(',') + symbol + trail.lstrip(',')
+        return True
+
+    i = 0
+    while i < len(parts):
+        lead, word, trail = parts[i]
+        core = cores[i]
+
+        if core in _FILLERS:
+            if out and trail.strip(','):
+                # "... the end, um." keeps the sentence end
+                out[-1][2] = out[-1][2].rstrip(',') + trail.strip(',')
+            elif out and trail and out[-1][2].endswith(','):
+                # "the report, uh, tomorrow": both commas only set off the filler
+                out[-1][2] = out[-1][2][:-1]
+            if word[:1].isupper() and (not out or out[-1][2][-1:] in ('.', '!', '?')):
+                capitalize_next = True
+            i += 1
+            continue
+
+        if tuple(cores[i:i + 3]) == _ELLIPSIS:
+            if not close('...', ''):
+                return None
+            i += 3
+            continue
+
+        n = 0
+        if state == 'paren':
+            n = _match_phrase(cores, i, _PAREN_CLOSE)
+            if n and not close(')', parts[i + n - 1][2]):
+                return None
+        elif state == 'quote':
+            n = _match_phrase(cores, i, _QUOTE_CLOSE)
+            if n and not close('"', parts[i + n - 1][2]):
+                return None
+        if n:
+            state = None
+            i += n
+            continue
+
+        if state is None:
+            n = _match_phrase(cores, i, _PAREN_OPEN)
+            if n:
+                state, pending_lead = 'paren', '('
+            else:
+                n = _match_phrase(cores, i, _QUOTE_OPEN)
+                if n:
+                    state, pending_lead = 'quote', '"'
+            if n:
+                if out and pending_lead == '(':
+                    out[-1][2] = out[-1][2].rstrip(',')
+                i += n
+                continue
+
+        if not word:
+            i += 1
+            continue
+        if capitalize_next:
+            word = word[:1].upper() + word[1:]
+            capitalize_next = False
+        if pending_lead:
+            # Commas spoken around the dictated symbol aren't wanted inside it
+            lead = pending_lead + lead
+            pending_lead = ''
+        out.append([lead, word, trail])
+        i += 1
+
+    if state is not None or pending_lead or not out:
+        return None
+    out[-1][2] = out[-1][2].rstrip(',')
+    return ' '.join(lead + word + trail for lead, word, trail in out)
+
+
+class _CleaningStats:
+    """Running share of dictations cleaned locally and LLM time saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local = 0
+        self.llm = 0
+        self.llm_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def record_llm(self, seconds: float) -> None:
+        with self._lock:
+            self.llm += 1
+            self.llm_seconds += seconds
+
+    def record_local(self, seconds: float) -> None:
+        with self._lock:
+            self.local += 1
+            # Estimate of what the LLM call would have cost: its mean so far
+            # (a conservative 1s before any LLM call was measured)
+            typical = self.llm_seconds / self.llm if self.llm else 1.0
+            self.saved_seconds += max(0.0, typical - seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.local + self.llm
+            return {
+                'local': self.local,
+                'llm': self.llm,
+                'local_share': self.local / total if total else 0.0,
+                'saved_seconds': self.saved_seconds,
+            }
+
+
+_stats = _CleaningStats()
+
+
+def cleaning_stats() -> dict:
+    """Counts of locally/LLM-cleaned dictations this session and time saved."""
+    return _stats.snapshot()
+
+
+def _try_local(text: str) -> Optional[str]:
+    if not Settings().get('local_cleaning'):
+        return None
+    start = time.perf_counter()
+    cleaned = clean_locally(text)
+    if cleaned is None:
+        return None
+    elapsed = time.perf_counter() - start
+    _stats.record_local(elapsed)
+    stats = _stats.snapshot()
+    logger.info(f"Cleaned locally in {elapsed * 1000:.1f}ms "
+                f"({stats['local']}/{stats['local'] + stats['llm']} dictations local, "
+                f"~{stats['saved_seconds']:.1f}s LLM time saved)")
+    if Settings().get('log_transcript_text'):
+        logger.info("ORIGINAL: %s", text)
+        logger.info("IMPROVED: %s", cleaned)
+    return cleaned
+
+
+def clean_transcription(text: str, model: str, timeout: float = 45.0,
+                        cancelled: async_core.CancelCheck = None) -> str:
+    """
+    Cleans and corrects voice-to-text transcription using LLM models.
+
+    Args:
+        text: The raw transcription text to clean
+        model: The LLM model to use for cleaning
+        timeout: Maximum time to wait for cleaning (in seconds)
+        cancelled: Optional CancelToken or check; when it fires the LLM
+            request is aborted and async_core.Cancelled is raised
+    """
+    local = _try_local(text)
+    if local is not None:
+        return local
+    cache = _get_cache()
+    cached = cache.get(model, text) if cache else None
+    if cached is not None:
+        return cached
+
+    # Deferred import: litellm is one of the heaviest imports in the app and
+    # cleaning is optional, so don't pay for it at startup
+    import litellm
+
+    log_text = Settings().get('log_transcript_text')
+    if log_text:
+        logger.info("ORIGINAL: %s", text)
+
+    # Async completion on the shared loop, so a superseded dictation can
+    # abort the request instead of waiting it out
+    start = time.perf_counter()
+    if len(text) >= CHUNKED_CLEANING_MIN_CHARS:
+        cleaned_text = async_core.run_sync(_clean_windows(text, model, timeout), cancelled)
+        elapsed = time.perf_counter() - start
+        _stats.record_llm(elapsed)
+        logger.info(f"Cleaning completed in {elapsed:.2f}s")
+        if log_text:
+            logger.info("IMPROVED: %s", cleaned_text)
+        return cleaned_text
+
+    response_any: Any = async_core.run_sync(
+        litellm.acompletion(**_completion_args(text, model, timeout)), cancelled)
+    elapsed = time.perf_counter() - start
+    _stats.record_llm(elapsed)
+    logger.info(f"Cleaning completed in {elapsed:.2f}s")
+
     try:
         # Safely grab the content while satisfying the type checker
         cleaned_text = cast(str, response_any.choices[0].message.content)
     except (AttributeError, IndexError, TypeError):
         logger.warning("Unexpected LLM response shape – falling back to raw text")
-        cleaned_text = text
+        return text
 
+    if cache:
+        cache.put(model, text, cleaned_text, _tokens_used(response_any, text, cleaned_text))
     if log_text:
         logger.info("IMPROVED: %s", cleaned_text)
-    return cleaned_text
\ No newline at end of file
+    return cleaned_text
+
+
+def clean_transcription_stream(text: str, model: str, on_sentence: Callable[[str], None],
+                               timeout: float = 45.0,
+                               cancelled: async_core.CancelCheck = None) -> str:
+    """
+    Like clean_transcription, but streams the LLM output and hands each
+    completed sentence to on_sentence as soon as it is generated.
+
+    on_sentence runs on the event loop thread and must return quickly (e.g.
+    queue the text for insertion). The pieces concatenate to the returned
+    text. If the stream fails before anything was delivered the error
+    propagates as usual (callers fall back to the raw text); after that it
+    is raised as CleaningInterrupted.
+    """
+    local = _try_local(text)
+    if local is not None:
+        on_sentence(local)
+        return local
+    cache = _get_cache()
+    cached = cache.get(model, text) if cache else None
+    if cached is not None:
+        on_sentence(cached)
+        return cached
+
+    import litellm
+
+    log_text = Settings().get('log_transcript_text')
+    if log_text:
+        logger.info("ORIGINAL: %s", text)
+
+    delivered = []
+
+    async def stream() -> str:
+        start = time.perf_counter()
+        first_at = None
+
+        def deliver(piece: str) -> None:
+            nonlocal first_at
+            if first_at is None:
+                first_at = time.perf_counter() - start
+            delivered.append(piece)
+            on_sentence(piece)
+
+        if len(text) >= CHUNKED_CLEANING_MIN_CHARS:
+            # Long text: whole windows, each delivered once it and every
+            # earlier window are done
+            await _clean_windows(text, model, timeout, on_window=deliver)
+        else:
+            buffer = ""
+            response = await litellm.acompletion(stream=True, **_completion_args(text, model, timeout))
+            async for chunk in response:
+                try:
+                    buffer += chunk.choices[0].delta.content or ""
+                except (AttributeError, IndexError, TypeError):
+                    continue
+                end = 0
+                for match in _SENTENCE_END.finditer(buffer):
+                    end = match.end()
+                if end:
+                    sentence, buffer = buffer[:end], buffer[end:]
+                    deliver(sentence)
+            if buffer:
+                deliver(buffer)
+        total = time.perf_counter() - start
+        _stats.record_llm(total)
+        if first_at is not None:
+            logger.info(f"Cleaning streamed: first text after {first_at:.2f}s, "
+                        f"completed in {total:.2f}s")
+        return "".join(delivered)
+
+    try:
+        cleaned_text = async_core.run_sync(stream(), cancelled)
+    except async_core.Cancelled:
+        raise
+    except Exception as e:
+        if delivered:
+            raise CleaningInterrupted(str(e), "".join(delivered)) from e
+        raise
+
+    if not cleaned_text.strip():
+        logger.warning("Empty LLM stream – falling back to raw text")
+        cleaned_text = text
+        on_sentence(text)
+    elif cache:
+        # Streams report no usage; estimate what the call cost
+        cache.put(model, text, cleaned_text, estimate_tokens(CLEANING_PROMPT + text + cleaned_text))
+    if log_text:
+        logger.info("IMPROVED: %s", cleaned_text)
+    return cleaned_text
+
+
+class IncrementalCleaner:
+    """Cleans streamed dictation segments in the background as they arrive.
+
+    With streaming dictation, the realtime session completes one segment per
+    speech turn while the user is still talking. Each segment is cleaned as
+    soon as it lands (with the previous segment as context), so at stop
+    only the last one is still in flight and the wait after stop no longer
+    grows with the length of the dictation.
+    """
+
+    def __init__(self, model: str, timeout: float = 45.0):
+        self.model = model
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._raw: list = []
+        self._futures: list = []
+
+    def add(self, segment: str) -> None:
+        """Queue a completed segment for cleaning. Safe from any thread."""
+        segment = segment.strip()
+        if not segment:
+            return
+        with self._lock:
+            context = self._raw[-1] if self._raw else None
+            self._raw.append(segment)
+            self._futures.append(async_core.submit(self._clean(segment, context)))
+
+    async def _clean(self, segment: str, context: Optional[str]) -> str:
+        local = _try_local(segment)
+        if local is not None:
+            return local
+        try:
+            # Off the loop thread: the first litellm import takes seconds
+            litellm = await asyncio.to_thread(importlib.import_module, 'litellm')
+            start = time.perf_counter()
+            response: Any = await litellm.acompletion(
+                **_completion_args(segment, self.model, self.timeout, context))
+            _stats.record_llm(time.perf_counter() - start)
+            cleaned = response.choices[0].message.content
+            return cleaned.strip() if cleaned and cleaned.strip() else segment
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Segment cleaning failed, keeping it raw: {e}")
+            return segment
+
+    def finish(self, raw_text: str, cancelled: async_core.CancelCheck = None) -> Optional[str]:
+        """Wait for the remaining segments and return the cleaned text.
+
+        raw_text is the session's final transcript; if it isn't made of
+        exactly the segments seen here, returns None and the caller cleans
+        the full text instead.
+        """
+        with self._lock:
+            raw = " ".join(self._raw)
+            futures = list(self._futures)
+        if not futures or raw != raw_text:
+            self.cancel()
+            return None
+
+        async def gather() -> list:
+            return await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+
+        start = time.perf_counter()
+        parts = async_core.run_sync(gather(), cancelled)
+        logger.info(f"Cleaning finished {time.perf_counter() - start:.2f}s after stop "
+                    f"({len(parts)} segments cleaned while recording)")
+        cleaned_text = " ".join(parts)
+        if Settings().get('log_transcript_text'):
+            logger.info("ORIGINAL: %s", raw_text)
+            logger.info("IMPROVED: %s", cleaned_text)
+        return cleaned_text
+
+    def cancel(self) -> None:
+        """Abort segment cleanings still in flight."""
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,171 @@
+"""Persistent cache of LLM-cleaned transcriptions.
+
+Short dictations repeat a lot ("yes", "sounds good", "thanks"), and each
+one would otherwise cost a full LLM round trip. Results are kept in a
+bounded LRU keyed by model + normalized text and saved next to the history
+in Documents\\VoiceTyping, so they survive restarts. The file also carries a
+fingerprint of the cleaning prompt: editing the prompt discards every entry
+cleaned under the old one.
+
+Daily counters (hits, misses, tokens saved) are persisted with the entries
+and logged with each lookup. A hit only updates them in memory: the file is
+rewritten when an entry is added, SAVE_DELAY_S after the last hit, and on
+close(), so a cache hit never waits on the disk.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger('voice_typing')
+
+CACHE_FILE = Path.home() / "Documents" / "VoiceTyping" / "cleaning_cache.json"
+MAX_ENTRIES = 500
+# Only short dictations repeat verbatim; longer ones would just churn the cache
+MAX_CACHED_CHARS = 200
+# Days of hit/miss counters kept in the file
+STATS_DAYS = 14
+# Hit counters are written out this long after the last unsaved hit
+SAVE_DELAY_S = 10.0
+# Bumped when normalize() changes, so entries keyed the old way are dropped
+KEY_FORMAT = 3
+
+_WHITESPACE = re.compile(r'\s+')
+# Trailing punctuation that doesn't change a cleaning; '?' and '!' do
+_TRAILING_PUNCTUATION = ' .,'
+
+
+def normalize(text: str) -> str:
+    """Cache key text: spacing and a trailing period or comma don't change
+    the cleaning. Case (proper nouns, "US" vs "us") and a final question or
+    exclamation mark do, so they are kept."""
+    return _WHITESPACE.sub(' ', text).strip().rstrip(_TRAILING_PUNCTUATION)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the API reports no usage."""
+    return max(1, len(text) // 4)
+
+
+class CleaningCache:
+    """Bounded, persisted LRU: (model, normalized text) -> (cleaned text, tokens)."""
+
+    def __init__(self, prompt: str, path: Path = CACHE_FILE):
+        self.path = path
+        self.fingerprint = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._daily: dict = {}
+        self._save_timer: Optional[threading.Timer] = None
+        self._load()
+
+    @staticmethod
+    def _key(model: str, text: str) -> str:
+        return f"{model}\n{normalize(text)}"
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not load cleaning cache: {e}")
+            return
+        self._daily = data.get('daily', {})
+        if data.get('prompt') != self.fingerprint:
+            logger.info("Cleaning prompt changed; starting with an empty cleaning cache")
+            return
+        if data.get('key_format', 1) != KEY_FORMAT:
+            logger.info("Cleaning cache keys changed format; starting with an empty cleaning cache")
+            return
+        for key, value in data.get('entries', [])[-MAX_ENTRIES:]:
+            self._entries[key] = value
+
+    def _save(self) -> None:
+        # Called with the lock held; the file is small (MAX_ENTRIES short texts)
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        data = {
+            'prompt': self.fingerprint,
+            'key_format': KEY_FORMAT,
+            'entries': list(self._entries.items()),
+            'daily': self._daily,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix('.tmp')
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save cleaning cache: {e}")
+
+    def _today(self) -> dict:
+        today = date.today().isoformat()
+        counters = self._daily.get(today)
+        if counters is None:
+            counters = self._daily[today] = {'hits': 0, 'misses': 0, 'tokens_saved': 0}
+            for old in sorted(self._daily)[:-STATS_DAYS]:
+                del self._daily[old]
+        return counters
+
+    def get(self, model: str, text: str) -> Optional[str]:
+        """Cached cleaning of text, counting the hit or miss."""
+        if len(text) > MAX_CACHED_CHARS:
+            return None
+        key = self._key(model, text)
+        with self._lock:
+            counters = self._today()
+            entry = self._entries.get(key)
+            if entry is None:
+                counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            counters['hits'] += 1
+            counters['tokens_saved'] += entry[1]
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(SAVE_DELAY_S, self._deferred_save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+            summary = self._summary(counters)
+        logger.info(f"Cleaning cache hit ({summary})")
+        return entry[0]
+
+    def put(self, model: str, text: str, cleaned: str, tokens: int) -> None:
+        """Store a fresh LLM cleaning and what it cost in tokens."""
+        if len(text) > MAX_CACHED_CHARS or not cleaned.strip():
+            return
+        key = self._key(model, text)
+        with self._lock:
+            self._entries[key] = [cleaned, tokens]
+            self._entries.move_to_end(key)
+            while len(self._entries) > MAX_ENTRIES:
+                self._entries.popitem(last=False)
+            self._save()
+            summary = self._summary(self._today())
+        logger.debug(f"Cleaning cached ({summary})")
+
+    def _deferred_save(self) -> None:
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer = None
+                self._save()
+
+    def close(self) -> None:
+        """Write out hit counters not saved yet."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save()
+
+    @staticmethod
+    def _summary(counters: dict) -> str:
+        lookups = counters['hits'] + counters['misses']
+        rate = counters['hits'] / lookups if lookups else 0.0
+        return (f"today: {counters['hits']}/{lookups} hits, {rate:.0%}, "
+                f"~{counters['tokens_saved']:,} tokens saved")
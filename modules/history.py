@@ -1,56 +1,345 @@
+"""Transcription history, kept in an append-only SQLite store.
+
+Every dictation is stored in Documents\\VoiceTyping\\history.db (WAL mode,
+with an FTS5 full-text index when the bundled SQLite has it). Writes go
+through a queue to a background writer thread, so adding an entry is O(1)
+on the processing thread and never rewrites earlier entries. The tray's
+short recent list is kept in memory.
+
+The JSON file used by older versions (last 50 entries) is imported on first
+start and renamed to history.json.migrated.
+
+Entries can carry the archive name of their recording (see audio_archive);
+with_audio() and update_text() let the archive re-transcribe them.
+
+search() pages through all of it newest-first: word-prefix and full-text
+queries go through the FTS index, substring queries through a trigram index
+(SQLite 3.34+), and pages continue from the last id seen rather than an
+OFFSET, so deep pages cost the same as the first.
+"""
 import json
 import logging
+import queue
+import re
+import sqlite3
 import threading
 from collections import deque
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Deque
+from typing import List, Deque, Optional, Tuple
 
 logger = logging.getLogger('voice_typing')
 
-HISTORY_FILE = Path.home() / "Documents" / "VoiceTyping" / "history.json"
-MAX_PERSISTED_ITEMS = 50
+HISTORY_DIR = Path.home() / "Documents" / "VoiceTyping"
+HISTORY_DB = HISTORY_DIR / "history.db"
+LEGACY_HISTORY_FILE = HISTORY_DIR / "history.json"
+
+# search() modes: every word as a word prefix (as-you-type), plain substring,
+# or raw FTS5 query syntax (phrases, OR, NOT, NEAR)
+SEARCH_MODES = ('prefix', 'substring', 'fts')
+DEFAULT_PAGE_SIZE = 20
+
+# Longest the writer waits for a dictation to be flushed on close()
+CLOSE_TIMEOUT_S = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    audio TEXT,
+    overlap_s REAL
+);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries(timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# External-content FTS index kept in sync by triggers, so entries stay the
+# single source of truth
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    text, content='entries', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE OF text ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO entries_fts(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# Substring index: trigram tokens let LIKE '%...%' use an index for
+# queries of 3+ characters
+_TRIGRAM_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_trigram USING fts5(
+    text, content='entries', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS entries_trigram_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_trigram(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_trigram_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_trigram(entries_trigram, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_trigram_au AFTER UPDATE OF text ON entries BEGIN
+    INSERT INTO entries_trigram(entries_trigram, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO entries_trigram(rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+_WORD = re.compile(r'\w+')
+
+_STOP = object()
+
+
+def _entry(row: tuple) -> dict:
+    id_, text, timestamp, audio = row
+    return {'id': id_, 'text': text, 'timestamp': timestamp, 'audio': audio}
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Durable across app crashes; only an OS crash can lose the last commit
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
 
 class TranscriptionHistory:
     """Recent transcriptions, persisted to disk so a crash, restart, or paste
     into the wrong window never loses a dictation."""
 
-    def __init__(self, max_items: int = 5) -> None:
+    def __init__(self, max_items: int = 5, retention_days: Optional[int] = None,
+                 path: Path = HISTORY_DB) -> None:
         self.history: Deque[str] = deque(maxlen=max_items)
+        self.path = path
+        self.has_fts = False
+        self.has_trigram = False
         self._lock = threading.Lock()
-        self._entries: List[dict] = []
-        self._load()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._open(retention_days)
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
 
-    def _load(self) -> None:
+    def _open(self, retention_days: Optional[int]) -> None:
         try:
-            self._entries = json.loads(HISTORY_FILE.read_text(encoding='utf-8'))[-MAX_PERSISTED_ITEMS:]
-            for entry in self._entries[-self.history.maxlen:]:
-                self.history.append(entry['text'])
-        except FileNotFoundError:
-            self._entries = []
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = _connect(self.path)
+            with conn:
+                conn.executescript(_SCHEMA)
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+                if 'audio' not in columns:
+                    conn.execute("ALTER TABLE entries ADD COLUMN audio TEXT")
+                if 'overlap_s' not in columns:
+                    conn.execute("ALTER TABLE entries ADD COLUMN overlap_s REAL")
+            try:
+                with conn:
+                    conn.executescript(_FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                # SQLite built without FTS5: search falls back to LIKE scans
+                logger.warning(f"Full-text history index unavailable: {e}")
+            if self.has_fts:
+                self._add_trigram_index(conn)
+            self._conn = conn
+            self._migrate_legacy()
+            if retention_days is not None:
+                self._prune(retention_days)
+            rows = conn.execute(
+                "SELECT text FROM entries ORDER BY id DESC LIMIT ?", (self.history.maxlen,)
+            ).fetchall()
+            for (text,) in reversed(rows):
+                self.history.append(text)
         except Exception as e:
-            logger.warning(f"Could not load transcription history: {e}")
-            self._entries = []
+            logger.warning(f"Could not open transcription history: {e}")
+            self._conn = None
+
+    def _add_trigram_index(self, conn: sqlite3.Connection) -> None:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'entries_trigram'").fetchone()
+        try:
+            with conn:
+                conn.executescript(_TRIGRAM_SCHEMA)
+                if not exists:
+                    # Index entries stored before the trigram table existed
+                    conn.execute("INSERT INTO entries_trigram(entries_trigram) VALUES ('rebuild')")
+            self.has_trigram = True
+        except sqlite3.OperationalError as e:
+            # SQLite older than 3.34: substring search scans the table
+            logger.info(f"Trigram history index unavailable: {e}")
 
-    def _save(self) -> None:
+    def _migrate_legacy(self) -> None:
+        legacy = self.path.with_name(LEGACY_HISTORY_FILE.name)
+        if not legacy.exists():
+            return
         try:
-            HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-            HISTORY_FILE.write_text(
-                json.dumps(self._entries, indent=2, ensure_ascii=False),
-                encoding='utf-8'
-            )
+            # Marked done in the same transaction as the rows: if the rename
+            # below fails (file locked), the next start only retries the rename
+            imported = self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone()
+            if not imported:
+                entries = json.loads(legacy.read_text(encoding='utf-8'))
+                rows = [(e['text'], e['timestamp']) for e in entries if e.get('text')]
+                with self._conn:
+                    self._conn.executemany("INSERT INTO entries(text, timestamp) VALUES (?, ?)", rows)
+                    self._conn.execute("INSERT INTO meta(key, value) VALUES ('legacy_imported', ?)",
+                                       (datetime.now().isoformat(timespec='seconds'),))
+                logger.info(f"Imported {len(rows)} entries from {legacy.name} into {self.path.name}")
+            legacy.replace(legacy.with_name(legacy.name + '.migrated'))
         except Exception as e:
-            logger.warning(f"Could not save transcription history: {e}")
+            logger.warning(f"Could not import {legacy.name}: {e}")
+
+    def _prune(self, retention_days: int) -> None:
+        cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat(timespec='seconds')
+        with self._conn:
+            removed = self._conn.execute("DELETE FROM entries WHERE timestamp < ?", (cutoff,)).rowcount
+        if removed:
+            logger.info(f"Removed {removed} history entries older than {retention_days} days")
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # Commit everything already queued in one transaction
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for row in batch if row is not _STOP]
+            if rows and self._conn is not None:
+                try:
+                    with self._lock, self._conn:
+                        self._conn.executemany(
+                            "INSERT INTO entries(text, timestamp, audio, overlap_s) VALUES (?, ?, ?, ?)",
+                            rows)
+                except Exception as e:
+                    logger.warning(f"Could not save transcription history: {e}")
+            for _ in batch:
+                self._queue.task_done()
+            if len(rows) != len(batch):
+                return
+
+    def add(self, text: str, audio: Optional[str] = None,
+            overlap_s: Optional[float] = None) -> None:
+        """Record a transcription; audio is its recording's archive name, if archived.
+
+        overlap_s marks a conversation-session chunk whose recording starts
+        with that many seconds replayed from the previous chunk (the words
+        repeated there are not in text)."""
+        self.history.append(text)
+        self._queue.put((text, datetime.now().isoformat(timespec='seconds'), audio, overlap_s))
+
+    def close(self) -> None:
+        """Write any pending entries and stop the writer thread."""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer.join(CLOSE_TIMEOUT_S)
 
-    def add(self, text: str) -> None:
+    def search(self, query: str = '', mode: str = 'prefix',
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               limit: int = DEFAULT_PAGE_SIZE, before_id: Optional[int] = None) -> List[dict]:
+        """Entries matching query, newest first, as {'id', 'text', 'timestamp', 'audio'}.
+
+        since/until bound the timestamp (until is exclusive). For the next
+        page, pass the last result's id as before_id. An empty query lists
+        everything in the range. Raises ValueError for an unknown mode or a
+        malformed FTS query.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if self._conn is None:
+            return []
+        source, key = "entries e", "e.id"
+        where, params = [], []
+        match = self._match_clause(query.strip(), mode)
+        if match is not None:
+            table, clause, value = match
+            if table is not None:
+                # Walk the index in descending rowid order so LIMIT stops the
+                # scan early instead of sorting every match
+                source, key = f"{table} f JOIN entries e ON e.id = f.rowid", "f.rowid"
+            where.append(clause)
+            params.append(value)
+        # Entries are appended as they happen, so ids follow timestamps and
+        # a date range becomes an id range the index scan can seek to
+        if since is not None:
+            where.append(f"{key} >= ?")
+            params.append(self._first_id_at(since))
+        if until is not None:
+            where.append(f"{key} < ?")
+            params.append(self._first_id_at(until))
+        if before_id is not None:
+            where.append(f"{key} < ?")
+            params.append(before_id)
+        sql = (f"SELECT e.id, e.text, e.timestamp, e.audio FROM {source}"
+               + (" WHERE " + " AND ".join(where) if where else "")
+               + f" ORDER BY {key} DESC LIMIT ?")
+        params.append(limit)
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if mode == 'fts':
+                raise ValueError(f"Invalid search query: {e}") from e
+            raise
+        return [_entry(row) for row in rows]
+
+    def with_audio(self, since: Optional[datetime] = None) -> List[dict]:
+        """Entries that have an archived recording, oldest first; these also
+        carry 'overlap_s' (see add())."""
+        if self._conn is None:
+            return []
+        sql = "SELECT id, text, timestamp, audio, overlap_s FROM entries WHERE audio IS NOT NULL"
+        params = []
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            params.append(since.isoformat(timespec='seconds'))
         with self._lock:
-            self.history.append(text)
-            self._entries.append({
-                'text': text,
-                'timestamp': datetime.now().isoformat(timespec='seconds')
-            })
-            self._entries = self._entries[-MAX_PERSISTED_ITEMS:]
-            self._save()
+            rows = self._conn.execute(sql + " ORDER BY id", params).fetchall()
+        return [dict(_entry(row[:4]), overlap_s=row[4]) for row in rows]
+
+    def update_text(self, entry_id: int, text: str) -> None:
+        """Replace an entry's text (e.g. after re-transcribing its recording)."""
+        if self._conn is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE entries SET text = ? WHERE id = ?", (text, entry_id))
+
+    def _first_id_at(self, moment: datetime) -> int:
+        """Id of the first entry at or after moment (one past the last id if none)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM entries WHERE timestamp >= ? ORDER BY timestamp LIMIT 1",
+                (moment.isoformat(timespec='seconds'),)).fetchone()
+            if row is None:
+                row = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM entries").fetchone()
+        return row[0]
+
+    def _match_clause(self, query: str, mode: str) -> Optional[Tuple[Optional[str], str, str]]:
+        """(index table or None, WHERE clause, parameter) for a non-empty query."""
+        if not query:
+            return None
+        if mode == 'substring' or not self.has_fts:
+            # Trigrams need 3+ characters and can't honour an ESCAPE clause
+            if self.has_trigram and len(query) >= 3 and not any(c in query for c in '%_'):
+                return 'entries_trigram', "f.text LIKE ?", f'%{query}%'
+            pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            return None, "e.text LIKE ? ESCAPE '\\'", f'%{pattern}%'
+        if mode == 'prefix':
+            words = _WORD.findall(query)
+            if not words:
+                return None
+            query = ' '.join(f'"{word}"*' for word in words)
+        return 'entries_fts', "f.entries_fts MATCH ?", query
 
     def get_recent(self) -> List[str]:
         return list(reversed(self.history))
@@ -0,0 +1,220 @@
+"""Quick-find window over the full transcription history.
+
+Opened from the tray. Typing searches as you go (word prefixes by default,
+or substring / raw FTS syntax), optionally limited to a date range; results
+page in 20 at a time. The selected transcription can be copied to the
+clipboard or inserted into the window that had focus before, through the
+configured output provider.
+
+The window runs on the Tk main thread; queries don't. A slow query (a
+substring scan of a large history, or waiting on the history lock while
+a dictation is being saved) would freeze the window. So queries go to a
+worker thread, and pages come back through call_on_main. Each new search
+bumps a generation number, and pages from older searches are dropped.
+"""
+import functools
+import queue
+import threading
+import tkinter as tk
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import pyperclip
+
+from modules.history import DEFAULT_PAGE_SIZE, TranscriptionHistory
+
+# Wait for a pause in typing before querying
+SEARCH_DEBOUNCE_MS = 150
+# Give focus time to return to the previous window before pasting into it
+INSERT_DELAY_MS = 250
+PREVIEW_CHARS = 90
+
+_MODES = {'Words': 'prefix', 'Substring': 'substring', 'FTS query': 'fts'}
+_RANGES = {
+    'Any time': None,
+    'Today': 0,
+    'Last 7 days': 7,
+    'Last 30 days': 30,
+    'Last year': 365,
+}
+
+
+class HistorySearchWindow:
+    """Single search window; open() creates it or brings it back to front."""
+
+    def __init__(self, root: tk.Tk, history: TranscriptionHistory,
+                 insert_text: Callable[[str], None],
+                 call_on_main: Callable[[Callable[[], None]], None]) -> None:
+        self.root = root
+        self.history = history
+        self.insert_text = insert_text
+        self.call_on_main = call_on_main
+        self.window: Optional[tk.Toplevel] = None
+        self._results: list = []
+        self._search_after_id: Optional[str] = None
+        # Bumped by every new search; pages of older ones are discarded
+        self._generation = 0
+        self._loading = False
+        self._requests: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+
+    def open(self) -> None:
+        if self.window is not None and self.window.winfo_exists():
+            self.window.deiconify()
+            self.window.lift()
+            self.entry.focus_force()
+            return
+        self._build()
+        self._search()
+
+    def _build(self) -> None:
+        window = self.window = tk.Toplevel(self.root)
+        window.title("Search Transcription History")
+        window.attributes('-topmost', True)
+        width, height = 640, 420
+        x = (window.winfo_screenwidth() - width) // 2
+        y = (window.winfo_screenheight() - height) // 3
+        window.geometry(f"{width}x{height}+{x}+{y}")
+        window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = tk.Frame(window)
+        controls.pack(fill='x', padx=8, pady=(8, 4))
+        self.query_var = tk.StringVar()
+        self.query_var.trace_add('write', lambda *args: self._schedule_search())
+        self.entry = tk.Entry(controls, textvariable=self.query_var, font=('Segoe UI', 11))
+        self.entry.pack(side='left', fill='x', expand=True)
+        self.mode_var = tk.StringVar(value='Words')
+        tk.OptionMenu(controls, self.mode_var, *_MODES, command=lambda _: self._search()).pack(side='left', padx=(6, 0))
+        self.range_var = tk.StringVar(value='Any time')
+        tk.OptionMenu(controls, self.range_var, *_RANGES, command=lambda _: self._search()).pack(side='left')
+
+        results = tk.Frame(window)
+        results.pack(fill='both', expand=True, padx=8)
+        scrollbar = tk.Scrollbar(results)
+        scrollbar.pack(side='right', fill='y')
+        self.listbox = tk.Listbox(results, font=('Segoe UI', 10), activestyle='none',
+                                  yscrollcommand=scrollbar.set)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        scrollbar.config(command=self.listbox.yview)
+
+        buttons = tk.Frame(window)
+        buttons.pack(fill='x', padx=8, pady=8)
+        self.status = tk.Label(buttons, anchor='w', fg='gray30')
+        self.status.pack(side='left', fill='x', expand=True)
+        tk.Button(buttons, text='Insert', width=9, command=self._insert_selected).pack(side='right')
+        tk.Button(buttons, text='Copy', width=9, command=self._copy_selected).pack(side='right', padx=4)
+        self.more_button = tk.Button(buttons, text='More', width=9, command=self._load_more)
+        self.more_button.pack(side='right')
+
+        self.listbox.bind('<Double-Button-1>', lambda e: self._insert_selected())
+        window.bind('<Return>', lambda e: self._copy_selected())
+        window.bind('<Control-Return>', lambda e: self._insert_selected())
+        window.bind('<Escape>', lambda e: self.close())
+        self.entry.bind('<Down>', lambda e: self._focus_results())
+        self.entry.focus_force()
+
+    def close(self) -> None:
+        self._generation += 1
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+            self._search_after_id = None
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
+
+    def _schedule_search(self) -> None:
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self._search)
+
+    def _query_args(self) -> dict:
+        days = _RANGES[self.range_var.get()]
+        since = None
+        if days is not None:
+            since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+        return {'query': self.query_var.get(), 'mode': _MODES[self.mode_var.get()], 'since': since}
+
+    def _search(self) -> None:
+        self._search_after_id = None
+        self._generation += 1
+        self._results = []
+        self.listbox.delete(0, 'end')
+        self._request_page(None)
+
+    def _load_more(self) -> None:
+        if self._results and not self._loading:
+            self._request_page(self._results[-1]['id'])
+
+    def _request_page(self, before_id: Optional[int]) -> None:
+        self._loading = True
+        self.more_button.config(state='disabled')
+        self.status.config(text="Searching...")
+        # Tk variables are read here, on the Tk thread
+        self._requests.put((self._generation, before_id, self._query_args()))
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run_queries, name='history-search',
+                                            daemon=True)
+            self._worker.start()
+
+    def _run_queries(self) -> None:
+        while True:
+            generation, before_id, args = self._requests.get()
+            if generation != self._generation:
+                continue  # superseded before it ran
+            page, error = [], None
+            try:
+                page = self.history.search(before_id=before_id, **args)
+            except ValueError as e:
+                error = str(e)
+            except Exception as e:
+                error = f"Search failed: {e}"
+            # Bound now: the loop rebinds these before the Tk thread runs it
+            self.call_on_main(functools.partial(self._show_page, generation, before_id, page, error))
+
+    def _show_page(self, generation: int, before_id: Optional[int], page: list,
+                   error: Optional[str]) -> None:
+        if generation != self._generation or self.window is None:
+            return
+        self._loading = False
+        if error is not None:
+            self.status.config(text=error)
+            return
+        for entry in page:
+            preview = ' '.join(entry['text'].split())
+            if len(preview) > PREVIEW_CHARS:
+                preview = preview[:PREVIEW_CHARS] + '...'
+            when = entry['timestamp'][:16].replace('T', ' ')
+            self.listbox.insert('end', f"{when}   {preview}")
+        self._results.extend(page)
+        full_page = len(page) == DEFAULT_PAGE_SIZE
+        self.more_button.config(state='normal' if full_page else 'disabled')
+        count = len(self._results)
+        self.status.config(text=f"{count}{'+' if full_page else ''} result{'s' if count != 1 else ''}")
+        if not before_id and self._results:
+            self.listbox.selection_set(0)
+
+    def _focus_results(self) -> None:
+        if self._results:
+            self.listbox.focus_set()
+            if not self.listbox.curselection():
+                self.listbox.selection_set(0)
+
+    def _selected_text(self) -> Optional[str]:
+        selection = self.listbox.curselection()
+        if not selection:
+            return None
+        return self._results[selection[0]]['text']
+
+    def _copy_selected(self) -> None:
+        text = self._selected_text()
+        if text is None:
+            return
+        pyperclip.copy(text)
+        self.status.config(text="Copied to clipboard")
+
+    def _insert_selected(self) -> None:
+        text = self._selected_text()
+        if text is None:
+            return
+        self.close()
+        self.root.after(INSERT_DELAY_MS, lambda: self.insert_text(text))
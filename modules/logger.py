@@ -1,13 +1,95 @@
+import atexit
+import gzip
 import logging
+import os
+import queue
+import shutil
 import sys
+import threading
+import time
 from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
 if TYPE_CHECKING:
     # This is a workaround to avoid circular imports
     from modules.settings import Settings
 
+# Records waiting for the writer thread; beyond this they are dropped rather
+# than block the thread that logged them
+LOG_QUEUE_SIZE = 10000
+# Compressed size-rotated parts kept per day's log file
+LOG_BACKUPS = 5
+# Records sharing a rate_limit key get through at most once per this many seconds
+RATE_LIMIT_INTERVAL_S = 10.0
+
+_listener: Optional[QueueListener] = None
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the writer thread without ever waiting on it.
+
+    Logging from the audio callback or keyboard hook only formats the
+    message and enqueues it; the file and console writes happen on the
+    listener thread. If that thread falls LOG_QUEUE_SIZE records behind
+    (disk stalled), new records are dropped and counted instead."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.dropped:
+                dropped = self.dropped
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': record.name, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': f"{dropped} log records dropped (log writer fell behind)"}))
+                self.dropped -= dropped
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets one record per RATE_LIMIT_INTERVAL_S through for each rate_limit key.
+
+    Opt-in per call, for messages that can repeat many times a second:
+        logger.warning(f"Audio callback status: {status}", extra={'rate_limit': 'audio_status'})
+    The next record let through for a key notes how many were suppressed.
+    Records without the key are untouched."""
+
+    def __init__(self, interval_s: float = RATE_LIMIT_INTERVAL_S) -> None:
+        super().__init__()
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._state: Dict[str, Tuple[float, int]] = {}  # key -> (last passed, suppressed since)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, 'rate_limit', None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._state.get(key, (None, 0))
+            if last is not None and now - last < self.interval_s:
+                self._state[key] = (last, suppressed + 1)
+                return False
+            self._state[key] = (now, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} more like this suppressed)"
+            record.args = None
+        return True
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    # Runs on the listener thread, so compressing never stalls a logging caller
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as out:
+        shutil.copyfileobj(src, out)
+    os.remove(source)
+
+
 def get_log_dir() -> Path:
     """Logs directory in the user's documents folder.
     Ex. "C:\\Users\\{name}\\Documents\\VoiceTyping\\logs" """
@@ -16,6 +98,7 @@ def get_log_dir() -> Path:
 
 def setup_logging(settings: "Settings") -> logging.Logger:
     """Configure application logging"""
+    global _listener
     log_dir = get_log_dir()
     log_dir.mkdir(parents=True, exist_ok=True)
 
@@ -33,8 +116,14 @@ def setup_logging(settings: "Settings") -> logging.Logger:
     if logger.hasHandlers():
         logger.handlers.clear()
 
-    # File handler with explicit UTF-8 encoding
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    # File handler with explicit UTF-8 encoding; past log_max_mb the day's
+    # file rolls over into gzipped parts (voice_typing_YYYYMMDD.log.1.gz, ...)
+    max_mb = settings.get('log_max_mb')
+    file_handler = RotatingFileHandler(log_file, encoding='utf-8',
+                                       maxBytes=int(max_mb * 1024 * 1024) if max_mb else 0,
+                                       backupCount=LOG_BACKUPS)
+    file_handler.namer = lambda name: name + '.gz'
+    file_handler.rotator = _gzip_rotator
     file_handler.setLevel(logging.INFO)
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(formatter)
@@ -61,8 +150,14 @@ def setup_logging(settings: "Settings") -> logging.Logger:
     console_formatter = logging.Formatter('%(levelname)s: %(message)s')
     console_handler.setFormatter(console_formatter)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Callers only enqueue; the listener thread does the disk and console I/O
+    stop_logging()
+    log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    logger.addHandler(queue_handler)
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
 
     # Log system info at startup
     logger.info(f"Python version: {sys.version}")
@@ -70,15 +165,30 @@ def setup_logging(settings: "Settings") -> logging.Logger:
 
     return logger
 
+
+def stop_logging() -> None:
+    """Write out queued records and stop the writer thread.
+
+    Runs at interpreter exit; call it explicitly before os._exit()."""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+
+
+atexit.register(stop_logging)
+
+
 def cleanup_logs(log_dir: Path, retention_days: int):
     """Deletes log files older than the specified retention period."""
     if retention_days is None:
         return
     try:
         retention_cutoff = datetime.now() - timedelta(days=retention_days)
-        for log_file in log_dir.glob("voice_typing_*.log"):
+        # Daily logs and their rotated parts (voice_typing_YYYYMMDD.log[.N.gz])
+        for log_file in log_dir.glob("voice_typing_*.log*"):
             try:
-                file_date_str = log_file.stem.split("_")[-1]
+                file_date_str = log_file.name[len("voice_typing_"):][:8]
                 file_date = datetime.strptime(file_date_str, "%Y%m%d")
                 if file_date < retention_cutoff:
                     log_file.unlink()
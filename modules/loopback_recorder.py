@@ -32,13 +32,17 @@ class LoopbackRecorder(threading.Thread):
     22.05 kHz is ~75 MB, well within reason for meeting clips.
     """
 
-    def __init__(self, samplerate: int = 22050) -> None:
+    def __init__(self, samplerate: int = 22050, silence_threshold: float = 0.01) -> None:
         super().__init__(daemon=True)
         self.samplerate = samplerate
         self.blocksize = samplerate // 10  # 100ms blocks
+        self.silence_threshold = silence_threshold
         self._stop_event = threading.Event()
         self._blocks: list[np.ndarray] = []
         self.first_block_time: Optional[float] = None
+        # Wall-clock time of the last block above the silence threshold; read
+        # by the mic recorder's auto-flush policy (plain float, no lock needed)
+        self.last_sound_time: float = time.time()
         self.error: Optional[Exception] = None
 
     def run(self) -> None:
@@ -51,9 +55,13 @@ class LoopbackRecorder(threading.Thread):
                                    blocksize=self.blocksize) as rec:
                 while not self._stop_event.is_set():
                     data = rec.record(numframes=self.blocksize)
+                    now = time.time()
                     if self.first_block_time is None:
-                        self.first_block_time = time.time()
-                    self._blocks.append(data.mean(axis=1).astype(np.float32))
+                        self.first_block_time = now
+                    block = data.mean(axis=1).astype(np.float32)
+                    if np.sqrt(np.mean(np.square(block))) >= self.silence_threshold:
+                        self.last_sound_time = now
+                    self._blocks.append(block)
         except Exception as e:
             self.error = e
             logger.error(f"Loopback capture failed: {e}")
@@ -64,6 +72,10 @@ class LoopbackRecorder(threading.Thread):
         if self.is_alive():
             logger.warning("Loopback recorder thread did not stop cleanly")
 
+    def quiet_for(self, seconds: float) -> bool:
+        """True if system audio has been silent for at least `seconds`."""
+        return time.time() - self.last_sound_time >= seconds
+
     def audio(self) -> np.ndarray:
         """Captured mono audio as float32; empty array if capture failed."""
         if not self._blocks:
@@ -0,0 +1,113 @@
+"""Latency records of dictations, for the tray Performance menu.
+
+Each dictation carries a services.tracing Trace from the moment recording
+starts: stream open, recorder start/stop, snapshot, analysis, FLAC encode,
+upload, cleaning, history and paste are timed as spans. When the dictation
+finishes, its record is appended as one JSON line to logs\\metrics.jsonl
+(rotated at METRICS_MAX_BYTES) and summarized as p50/p95 per stage over
+the last performance_window dictations. Each recording's audio callback
+health (modules/recorder.py CallbackHealth) is written as a 'recording'
+line at stop, and each delivered conversation-session chunk as a 'chunk'
+line (how long it held the delivery slot, and the paste).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from modules.logger import NonBlockingQueueHandler, get_log_dir
+from services.tracing import stage_totals
+
+logger = logging.getLogger('voice_typing')
+
+METRICS_FILE = get_log_dir() / "metrics.jsonl"
+METRICS_MAX_BYTES = 2 * 1024 * 1024
+METRICS_BACKUPS = 3
+# Dictations kept in memory for the tray summary
+MAX_WINDOW = 500
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class MetricsRecorder:
+    """Appends records to the rotating metrics file and keeps the most
+    recent ones in memory for the summary. Writes go through a queue to
+    a writer thread, so record() never waits on the disk."""
+
+    def __init__(self, path: Path = METRICS_FILE) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        # Read from the file on first use, so startup doesn't pay for it
+        self._recent: Optional[deque] = None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = logging.getLogger('voice_typing.metrics')
+        self._writer.propagate = False
+        self._writer.setLevel(logging.INFO)
+        for handler in list(self._writer.handlers):
+            self._writer.removeHandler(handler)
+            handler.close()
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=METRICS_MAX_BYTES, backupCount=METRICS_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        records: queue.Queue = queue.Queue(MAX_WINDOW * 2)
+        self._writer.addHandler(NonBlockingQueueHandler(records))
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        atexit.register(self.close)
+
+    def _loaded(self) -> deque:
+        # Only the current file: enough history for the summary. Caller holds _lock.
+        if self._recent is None:
+            self._recent = deque(maxlen=MAX_WINDOW)
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    lines = deque(f, maxlen=MAX_WINDOW)
+            except OSError:
+                lines = ()
+            for line in lines:
+                try:
+                    self._recent.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return self._recent
+
+    def record(self, record: dict) -> None:
+        with self._lock:
+            self._loaded().append(record)
+        self._writer.info(json.dumps(record, ensure_ascii=False))
+
+    def summary(self, last_n: int = 50, outcome: str = 'ok') -> List[Tuple[str, int, float, float]]:
+        """(stage, count, p50_ms, p95_ms) over the last_n dictations with this
+        outcome, stages in pipeline order, with 'total' (stop to pasted) last."""
+        with self._lock:
+            records = [r for r in self._loaded()
+                       if r.get('kind') == 'dictation' and r.get('outcome') == outcome][-last_n:]
+        samples: Dict[str, List[float]] = {}
+        for record in records:
+            for name, ms in stage_totals(record).items():
+                samples.setdefault(name, []).append(ms)
+        rows = [(name, len(values), percentile(values, 50), percentile(values, 95))
+                for name, values in samples.items()]
+        if records:
+            totals = [r['total_ms'] for r in records]
+            rows.append(('total', len(totals), percentile(totals, 50), percentile(totals, 95)))
+        return rows
+
+    def close(self) -> None:
+        """Write out queued records (idempotent; also runs at exit)."""
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
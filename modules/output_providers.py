@@ -12,13 +12,19 @@ from abc import ABC, abstractmethod
 from pathlib import Path
 from typing import Callable, Dict, List, Optional
 
-import pyautogui
 import pyperclip
 
 from modules.settings import Settings
 
 logger = logging.getLogger('voice_typing')
 
+
+def _pyautogui():
+    """pyautogui, imported on first paste: it pulls in PIL and its screenshot
+    and message-box helpers, none of which startup needs."""
+    import pyautogui
+    return pyautogui
+
 PLUGINS_DIR = Path.home() / "Documents" / "VoiceTyping" / "plugins"
 
 # Global registry of loaded providers
@@ -34,10 +40,15 @@ class OutputProvider(ABC):
     - name: str - unique identifier (e.g., "chunked_terminal")
     - display_name: str - shown in UI (e.g., "Chunked Terminal")
     - insert_text() - the actual insertion logic
+
+    Providers that can insert text piece by piece (streamed cleaning pastes
+    each sentence as it is generated) set supports_incremental = True and
+    implement insert_partial(); the rest get the whole text at the end.
     """
 
     name: str = "base"
     display_name: str = "Base Provider"
+    supports_incremental: bool = False
 
     @abstractmethod
     def insert_text(self, text: str, pyautogui_lock: threading.Lock,
@@ -52,12 +63,29 @@ class OutputProvider(ABC):
         """
         pass
 
+    def insert_partial(self, text: str, pyautogui_lock: threading.Lock,
+                       root_after: Callable, first: bool, final: bool) -> None:
+        """
+        Insert the next piece of a progressively delivered text.
+
+        Called in order on the Tk main thread, only if supports_incremental.
+        The first piece has first=True; a final call (final=True, possibly
+        with empty text) always ends the sequence, even if it was cut short.
+        """
+        if text:
+            self.insert_text(text, pyautogui_lock, root_after)
+
 
 class StandardOutputProvider(OutputProvider):
     """Standard output provider - pastes via clipboard + Ctrl+V"""
 
     name = "standard"
     display_name = "Standard (Ctrl+V)"
+    # Pieces are pasted one by one, but the user's clipboard is saved once
+    # before the first and restored once after the last: restoring between
+    # pieces would let a slow paste target read the old clipboard
+    supports_incremental = True
+    _saved_clipboard: Optional[str] = None
 
     def insert_text(self, text: str, pyautogui_lock: threading.Lock,
                     root_after: Callable) -> None:
@@ -69,7 +97,7 @@ class StandardOutputProvider(OutputProvider):
 
                 # Copy new text and paste it
                 pyperclip.copy(text)
-                pyautogui.hotkey('ctrl', 'v')
+                _pyautogui().hotkey('ctrl', 'v')
 
                 # Restore original clipboard content after a delay (slow paste
                 # targets read the clipboard late). pyperclip only round-trips
@@ -82,6 +110,24 @@ class StandardOutputProvider(OutputProvider):
         except Exception as e:
             logger.error(f"StandardOutputProvider: Error during text insertion: {e}")
 
+    def insert_partial(self, text: str, pyautogui_lock: threading.Lock,
+                       root_after: Callable, first: bool, final: bool) -> None:
+        """Paste one piece of a streamed text, restoring the clipboard after the last"""
+        try:
+            with pyautogui_lock:
+                if first:
+                    self._saved_clipboard = pyperclip.paste()
+                if text:
+                    pyperclip.copy(text)
+                    _pyautogui().hotkey('ctrl', 'v')
+                if final:
+                    original_clipboard, self._saved_clipboard = self._saved_clipboard, None
+                    if original_clipboard:
+                        delay_ms = Settings().get('clipboard_restore_delay_ms')
+                        root_after(delay_ms, lambda: pyperclip.copy(original_clipboard))
+        except Exception as e:
+            logger.error(f"StandardOutputProvider: Error during partial insertion: {e}")
+
 
 def _ensure_plugins_dir() -> None:
     """Create the plugins directory if it doesn't exist"""
@@ -1,3 +1,4 @@
+import bisect
 import logging
 import threading
 from typing import Optional, Callable, Tuple, Any
@@ -7,6 +8,8 @@ import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
+from modules import recording_info
+from modules.recording_info import PHONE_RECORDING_COMMENT
 from modules.settings import Settings
 
 logger = logging.getLogger('voice_typing')
@@ -23,18 +26,91 @@ settings = Settings()
 # Minimum duration in seconds for valid recordings
 MIN_DURATION = 1.0
 
-# WAV comment written into phone-mode recordings so the transcription pipeline
-# can recognize them later (survives snapshots, retries, and app restarts —
-# the mono audio itself is indistinguishable from normal dictation).
-PHONE_RECORDING_COMMENT = 'voice_typing:phone'
 # Time of continuous silence (in seconds) before auto-stopping
 DEFAULT_SILENT_START_TIMEOUT = 4.0
+# Quiet needed (in seconds) before a conversation chunk is auto-flushed: long
+# enough to land between sentences rather than between words
+FLUSH_SILENCE_GAP_S = 0.6
+
+
+# Upper edges (ms) of the callback duration histogram buckets; one more
+# bucket counts everything slower
+CALLBACK_BUCKETS_MS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0)
+# Fewer xruns than this are never flagged: one glitch early in a recording
+# would otherwise read as a high per-minute rate
+MIN_XRUNS_TO_FLAG = 3
+
+
+class CallbackHealth:
+    """Audio callback statistics for one recording: blocks, input
+    overflows/underflows (xruns), and how long the callback took, as a
+    fixed-bucket histogram and as a share of the block's deadline.
+
+    Only the audio callback thread writes; other threads read the fields
+    without a lock (each is a single value updated in place, so a reader
+    sees at worst one block's update missing). Reset by start()."""
+
+    def __init__(self) -> None:
+        self.reset(22050)
+
+    def reset(self, samplerate: int) -> None:
+        self.samplerate = samplerate
+        self.blocks = 0
+        self.frames = 0
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self.buckets = [0] * (len(CALLBACK_BUCKETS_MS) + 1)
+        self.max_ms = 0.0
+        # Callback time / block duration, worst block (1.0 = missed the deadline)
+        self.max_load = 0.0
+
+    def count_status(self, status) -> None:
+        if status.input_overflow:
+            self.input_overflows += 1
+        if status.input_underflow:
+            self.input_underflows += 1
+
+    def observe(self, seconds: float, frames: int) -> None:
+        ms = seconds * 1000
+        self.blocks += 1
+        self.frames += frames
+        self.buckets[bisect.bisect_right(CALLBACK_BUCKETS_MS, ms)] += 1
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if frames:
+            load = seconds * self.samplerate / frames
+            if load > self.max_load:
+                self.max_load = load
+
+    @property
+    def xruns(self) -> int:
+        return self.input_overflows + self.input_underflows
+
+    def xruns_per_min(self) -> float:
+        minutes = self.frames / self.samplerate / 60
+        return self.xruns / minutes if minutes else 0.0
+
+    def xruns_exceed(self, per_min: float) -> bool:
+        return self.xruns >= MIN_XRUNS_TO_FLAG and self.xruns_per_min() >= per_min
+
+    def summary(self) -> dict:
+        labels = [f"<{edge:g}ms" for edge in CALLBACK_BUCKETS_MS] + [f">={CALLBACK_BUCKETS_MS[-1]:g}ms"]
+        return {
+            'audio_s': round(self.frames / self.samplerate, 2),
+            'blocks': self.blocks,
+            'input_overflows': self.input_overflows,
+            'input_underflows': self.input_underflows,
+            'xruns_per_min': round(self.xruns_per_min(), 2),
+            'callback_max_ms': round(self.max_ms, 3),
+            'callback_max_load': round(self.max_load, 3),
+            'callback_ms': dict(zip(labels, self.buckets)),
+        }
 
 
 def _silence_threshold() -> float:
     """RMS threshold below which audio is considered silence.
     (-30 dB = 0.0316, -40 dB = 0.01, -50 dB = 0.003) Configurable via settings.json."""
-    return settings.get('silence_threshold')
+    return settings.snapshot().silence_threshold
 
 class AudioRecorder:
     # Controls how smooth/reactive the audio level indicator bar appears in the UI
@@ -54,7 +130,8 @@ class AudioRecorder:
         self.file: Optional[sf.SoundFile] = None
         self._lock: threading.Lock = threading.Lock()
         self.audio_data: list[np.ndarray] = []  # Store audio chunks for analysis
-        self.silence_start: Optional[float] = None
+        # Consecutive silent frames at the start of the recording
+        self._silent_frames = 0
         self.silent_start_timeout = silent_start_timeout
         self.auto_stopped = False
         self.max_duration_reached = False
@@ -90,6 +167,38 @@ class AudioRecorder:
         self._loopback = None  # LoopbackRecorder instance while recording
         self._mic_first_block_time: Optional[float] = None
 
+        # Conversation-session auto-flush policy (seconds; None = manual only).
+        # Once a chunk is auto_flush_after long, flush_due is raised at the
+        # first silence gap; auto_flush_max forces it for pause-free talk.
+        # Set by the app before start(). flush_due stays raised until the next
+        # start(), so the app's watchdog can't be re-triggered by blocks that
+        # arrive before its flush stops the recording.
+        self.auto_flush_after: Optional[float] = None
+        self.auto_flush_max: Optional[float] = None
+        self.flush_due = False
+        self._quiet_frames = 0
+        # Tail of the previous session chunk (frames x channels, samplerate),
+        # replayed at the head of the next chunk by carry_overlap()
+        self._overlap_tail: Optional[Tuple[np.ndarray, int]] = None
+        # Running statistics of the audio written so far, registered with
+        # recording_info when the file closes so nothing has to re-read it
+        self._frames_written = 0
+        self._sum_squares = 0.0
+        self._peak = 0.0
+        # Callback timing and xrun counts of the current/last recording
+        self.health = CallbackHealth()
+
+        # Settings the audio callback reads, captured once per recording by
+        # start(), and the time limits converted to frame counts: the
+        # callback measures time by frames written instead of reading the
+        # clock and the settings dict on every block
+        self._config = settings.snapshot()
+        self._threshold = self._config.silence_threshold
+        self._max_frames: Optional[int] = None
+        self._flush_after_frames: Optional[int] = None
+        self._flush_max_frames: Optional[int] = None
+        self._flush_gap_frames = 0
+
     def _calculate_level(self, indata: np.ndarray) -> float:
         """Calculate audio level from input data"""
         rms = np.sqrt(np.mean(np.square(indata)))
@@ -99,19 +208,20 @@ class AudioRecorder:
         normalized = (db + 60) / 60
         current_level = max(0.0, min(1.0, normalized))
 
+        if self._flush_after_frames is not None:
+            self._track_flush_boundary(rms, len(indata))
+
         # Only check for silence at the start of the recording, before any sound
         # is detected. Skipped in meeting mode: the far side may be talking while
         # the user's mic is silent, so a quiet mic must not cancel the recording.
         if (self.silent_start_timeout is not None and
             not self.meeting_mode and
             not self.continuation_chunk and
-            self.recording_start_time is not None and
             not self.initial_sound_detected):
 
-            if rms < _silence_threshold():
-                if self.silence_start is None:
-                    self.silence_start = time.time()
-                elif time.time() - self.silence_start >= self.silent_start_timeout:
+            if rms < self._threshold:
+                self._silent_frames += len(indata)
+                if self._silent_frames >= self.silent_start_timeout * self.samplerate:
                     logger.info(f"Stopping due to {self.silent_start_timeout}s of initial silence")
                     self.auto_stopped = True
                     self.recording = False
@@ -119,7 +229,7 @@ class AudioRecorder:
             else:
                 # We've detected sound, stop checking for silence
                 self.initial_sound_detected = True
-                self.silence_start = None
+                self._silent_frames = 0
 
         # Apply smoothing for UI feedback
         self.smoothed_level = (self.SMOOTHING_FACTOR * current_level) + \
@@ -127,32 +237,60 @@ class AudioRecorder:
 
         return self.smoothed_level
 
+    def _track_flush_boundary(self, rms: float, frames: int) -> None:
+        """Raise flush_due at the first silence gap once the chunk is long enough.
+
+        Reuses the per-block RMS from the level computation, so the policy
+        costs a couple of comparisons per block. Chunk length and the gap are
+        counted in frames. In meeting mode the far side must be quiet too (a
+        silent mic says nothing about the other speaker).
+        """
+        if self.flush_due:
+            return
+        if rms < self._threshold:
+            self._quiet_frames += frames
+        else:
+            self._quiet_frames = 0
+
+        elapsed = self._frames_written + frames
+        if elapsed < self._flush_after_frames:
+            return
+        if self._flush_max_frames is not None and elapsed >= self._flush_max_frames:
+            logger.info(f"No pause within {self.auto_flush_max:.0f}s; forcing chunk flush")
+            self.flush_due = True
+        elif (self._quiet_frames >= self._flush_gap_frames and
+                (self._loopback is None or self._loopback.quiet_for(FLUSH_SILENCE_GAP_S))):
+            self.flush_due = True
+
     def analyze_recording(self, filepath: Optional[str] = None) -> Tuple[bool, str]:
         """Analyze the recorded audio file for silence and duration.
 
         Returns:
             Tuple[bool, str]: (is_valid, reason_if_invalid)
         """
+        path = filepath or self.filename
         try:
-            with sf.SoundFile(filepath or self.filename) as audio_file:
-                # Check duration
-                duration = len(audio_file) / audio_file.samplerate
-                if duration < MIN_DURATION:
-                    return False, f"Recording too short ({duration:.1f}s < {MIN_DURATION}s)"
-
-                # Read the entire file
-                audio_data = audio_file.read()
-
-                # Calculate RMS value
-                rms = np.sqrt(np.mean(np.square(audio_data)))
-
-                # Check if mostly silence
-                threshold = _silence_threshold()
-                if rms < threshold:
-                    db_value = 20 * np.log10(max(1e-10, rms))
-                    return False, f"Recording contains mostly silence (RMS: {rms:.4f} / {db_value:.1f}dB < threshold: {threshold:.4f})"
-
-                return True, ""
+            # Recordings made this run carry their stats in the registry;
+            # only older files are read back to measure them
+            info = recording_info.get(path)
+            duration = info.duration
+            if duration < MIN_DURATION:
+                return False, f"Recording too short ({duration:.1f}s < {MIN_DURATION}s)"
+
+            rms = info.rms
+            if rms is None:
+                audio_data, _ = sf.read(path)
+                rms = float(np.sqrt(np.mean(np.square(audio_data))))
+                recording_info.update(path, rms=rms,
+                                      peak=float(np.max(np.abs(audio_data), initial=0.0)))
+
+            # Check if mostly silence
+            threshold = _silence_threshold()
+            if rms < threshold:
+                db_value = 20 * np.log10(max(1e-10, rms))
+                return False, f"Recording contains mostly silence (RMS: {rms:.4f} / {db_value:.1f}dB < threshold: {threshold:.4f})"
+
+            return True, ""
 
         except Exception as e:
             return False, f"Error analyzing audio: {str(e)}"
@@ -163,49 +301,57 @@ class AudioRecorder:
                          frames: int,
                          time_info: Any,
                          status: int) -> None:
-            if status:
-                logger.warning(f'Audio callback status: {status}')
-
-            if self._mic_first_block_time is None:
-                self._mic_first_block_time = time.time()
-
-            with self._lock:
-                if not self.recording or self.file is None:
-                    return
-
-                if self.level_callback:
-                    level = self._calculate_level(indata)
-                    self.level_callback(level)
-
-                    # If auto-stopped, stop the stream
-                    if self.auto_stopped:
-                        self.recording = False
-                        raise sd.CallbackStop()
+            started = time.perf_counter()
+            try:
+                if status:
+                    self.health.count_status(status)
+                    # Overflow flags can repeat every block while the system is busy
+                    logger.warning(f'Audio callback status: {status}', extra={'rate_limit': 'audio_status'})
 
-                # Stop at max duration but keep the audio for transcription
-                if (self.max_duration is not None and
-                        self.recording_start_time is not None and
-                        time.time() - self.recording_start_time >= self.max_duration):
-                    logger.warning(f"Max recording duration ({self.max_duration}s) reached, auto-stopping")
-                    self.max_duration_reached = True
-                    self.recording = False
-                    raise sd.CallbackStop()
+                if self._mic_first_block_time is None:
+                    self._mic_first_block_time = time.time()
 
-                # Only write audio data if not auto-stopped
-                if not self.auto_stopped and self.file is not None:
-                    try:
-                        self.file.write(indata.copy())
-                    except Exception as e:
-                        logger.error(f"Audio callback error: {e}")
-                        self.error = f"audio write failed: {e}"
+                with self._lock:
+                    if not self.recording or self.file is None:
+                        return
+
+                    if self.level_callback:
+                        level = self._calculate_level(indata)
+                        self.level_callback(level)
+
+                        # If auto-stopped, stop the stream
+                        if self.auto_stopped:
+                            self.recording = False
+                            raise sd.CallbackStop()
+
+                    # Stop at max duration but keep the audio for transcription
+                    if self._max_frames is not None and self._frames_written >= self._max_frames:
+                        logger.warning(f"Max recording duration ({self.max_duration}s) reached, auto-stopping")
+                        self.max_duration_reached = True
                         self.recording = False
                         raise sd.CallbackStop()
 
-                    if self.stream_callback is not None:
+                    # Only write audio data if not auto-stopped
+                    if not self.auto_stopped and self.file is not None:
                         try:
-                            self.stream_callback(indata.copy())
-                        except Exception:
-                            pass  # streaming is best-effort; file is the source of truth
+                            self.file.write(indata.copy())
+                        except Exception as e:
+                            logger.error(f"Audio callback error: {e}")
+                            self.error = f"audio write failed: {e}"
+                            self.recording = False
+                            raise sd.CallbackStop()
+                        flat = indata.ravel()
+                        self._frames_written += frames
+                        self._sum_squares += float(np.dot(flat, flat))
+                        self._peak = max(self._peak, float(np.abs(flat).max(initial=0.0)))
+
+                        if self.stream_callback is not None:
+                            try:
+                                self.stream_callback(indata.copy())
+                            except Exception:
+                                pass  # streaming is best-effort; file is the source of truth
+            finally:
+                self.health.observe(time.perf_counter() - started, frames)
 
         try:
             with sf.SoundFile(self.filename, mode='w',
@@ -238,21 +384,41 @@ class AudioRecorder:
                     except:
                         pass
                     self.file = None
+                mode = recording_info.PHONE if self.phone_mode else recording_info.DICTATION
+                recording_info.register(self.filename, recording_info.measured(
+                    1, mode, self.samplerate, self._frames_written,
+                    self._sum_squares, self._peak, created=self.recording_start_time))
 
     def start(self) -> None:
         """Start recording and reset silence detection"""
         self.auto_stopped = False
         self.max_duration_reached = False
         self.error = None
-        self.max_duration = settings.get('max_recording_duration')
-        self.silence_start = None
+        config = settings.snapshot()
+        if config.version != self._config.version:
+            logger.debug(f"Recorder using updated settings: {config}")
+        self._config = config
+        self._threshold = config.silence_threshold
+        self.max_duration = config.max_recording_duration
+        self._max_frames = self._frames(self.max_duration)
+        self._flush_after_frames = self._frames(self.auto_flush_after)
+        self._flush_max_frames = self._frames(self.auto_flush_max)
+        self._flush_gap_frames = self._frames(FLUSH_SILENCE_GAP_S)
+        self._silent_frames = 0
         self.initial_sound_detected = False
         self._mic_first_block_time = None
+        self.flush_due = False
+        self._quiet_frames = 0
+        self._frames_written = 0
+        self._sum_squares = 0.0
+        self._peak = 0.0
+        self.health.reset(self.samplerate)
         self._loopback = None
         if self.meeting_mode:
             try:
                 from modules.loopback_recorder import LoopbackRecorder
-                self._loopback = LoopbackRecorder(samplerate=self.samplerate)
+                self._loopback = LoopbackRecorder(samplerate=self.samplerate,
+                                                  silence_threshold=self._threshold)
                 self._loopback.start()
             except Exception as e:
                 logger.error(f"Could not start loopback capture, falling back to mic-only: {e}")
@@ -262,6 +428,9 @@ class AudioRecorder:
         self.thread = threading.Thread(target=self._record)
         self.thread.start()
 
+    def _frames(self, seconds: Optional[float]) -> Optional[int]:
+        return None if seconds is None else int(seconds * self.samplerate)
+
     def stop(self) -> None:
         """Stop recording with timeout to prevent hanging"""
         with self._lock:
@@ -330,10 +499,56 @@ class AudioRecorder:
         mic_audio = np.pad(mic_audio, (0, length - len(mic_audio)))
         loop_audio = np.pad(loop_audio, (0, length - len(loop_audio)))
 
-        sf.write(self.filename, np.stack([mic_audio, loop_audio], axis=1),
-                 samplerate, subtype='PCM_16', format='WAV')
+        stereo = np.stack([mic_audio, loop_audio], axis=1)
+        sf.write(self.filename, stereo, samplerate, subtype='PCM_16', format='WAV')
+        self._register_audio(self.filename, stereo, samplerate, recording_info.MEETING)
         logger.info(f"Composed 2-channel meeting recording ({length / samplerate:.1f}s)")
 
+    def carry_overlap(self, path: str, overlap_s: float) -> Tuple[float, float]:
+        """Prepend the previous chunk's tail to a chunk file; keep this chunk's tail.
+
+        Consecutive session chunks then share overlap_s seconds of audio, so a
+        word cut by the flush is heard whole by one of the two transcriptions
+        (the chunk queue drops the copy transcribed twice). The file is
+        rewritten in place, preserving its WAV comment (phone-mode tag).
+
+        Returns:
+            Tuple[float, float]: (seconds prepended, duration of the file)
+        """
+        with sf.SoundFile(path) as f:
+            samplerate = f.samplerate
+            comment = f.comment
+            data = f.read(dtype='float32', always_2d=True)
+
+        head = self._overlap_tail
+        tail_frames = int(overlap_s * samplerate)
+        self._overlap_tail = (data[-tail_frames:].copy(), samplerate) if tail_frames else None
+
+        if (head is None or head[1] != samplerate or
+                head[0].shape[1] != data.shape[1]):
+            return 0.0, len(data) / samplerate
+        data = np.concatenate([head[0], data])
+        with sf.SoundFile(path, mode='w', samplerate=samplerate,
+                          channels=data.shape[1], subtype='PCM_16', format='WAV') as f:
+            if comment:
+                f.comment = comment
+            f.write(data)
+        self._register_audio(path, data, samplerate,
+                             recording_info.mode_for(data.shape[1], comment))
+        return len(head[0]) / samplerate, len(data) / samplerate
+
+    def _register_audio(self, path: str, data: np.ndarray, samplerate: int,
+                        mode: str) -> None:
+        """Register a file just rewritten from in-memory audio (frames x channels)."""
+        flat = data.ravel()
+        recording_info.register(path, recording_info.measured(
+            data.shape[1], mode, samplerate, len(data), float(np.dot(flat, flat)),
+            float(np.abs(flat).max(initial=0.0)), created=self.recording_start_time))
+
+    def reset_overlap(self) -> None:
+        """Forget the carried tail (new session, or the last chunk was dropped)."""
+        self._overlap_tail = None
+
     def was_auto_stopped(self) -> bool:
         """Check if recording was automatically stopped due to silence"""
         return self.auto_stopped
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""In-memory metadata registry for recorded audio files.
+
+Routing (meeting/phone/dictation), validity checks and snapshot cleanup all
+need a few facts about a recording — channel count, mode tag, duration,
+loudness. The recorder already knows them while writing the file, so it
+registers an entry per file here; consumers look them up instead of
+re-opening the audio. Entries follow the file through os.replace snapshots
+via moved(), and each lookup checks the file's size/mtime so an entry can
+never describe audio that has since been rewritten.
+
+Files with no entry (recordings from a previous run, retries after restart)
+fall back to one header parse, whose result is then cached like any other.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger('voice_typing')
+
+# WAV comment written into phone-mode recordings so the transcription pipeline
+# can recognize them later (survives snapshots, retries, and app restarts —
+# the mono audio itself is indistinguishable from normal dictation).
+PHONE_RECORDING_COMMENT = 'voice_typing:phone'
+
+# Recording modes, as routed by the transcription pipeline
+DICTATION, MEETING, PHONE = 'dictation', 'meeting', 'phone'
+
+# Snapshots are short-lived; this only bounds the registry if a long session
+# leaves many files behind
+MAX_ENTRIES = 64
+
+
+class RecordingInfo(NamedTuple):
+    """What the pipeline needs to know about one recording file."""
+    channels: int
+    mode: str
+    samplerate: int
+    duration: float
+    # Whole-file RMS / peak over all channels; None until measured (header
+    # parses can't know them; analyze_recording fills them in)
+    rms: Optional[float]
+    peak: Optional[float]
+    created: float
+
+    @property
+    def is_conversation(self) -> bool:
+        return self.mode != DICTATION
+
+
+_lock = threading.Lock()
+# Normalized path -> (RecordingInfo, (st_size, st_mtime_ns))
+_entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _signature(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def mode_for(channels: int, comment: Optional[str]) -> str:
+    """Classify a recording from its channel count and WAV comment."""
+    if channels >= 2:
+        return MEETING
+    if (comment or '').startswith(PHONE_RECORDING_COMMENT):
+        return PHONE
+    return DICTATION
+
+
+def register(path: str, info: RecordingInfo) -> None:
+    """Record metadata for a file that has just been written (and closed)."""
+    try:
+        signature = _signature(path)
+    except OSError:
+        return
+    key = _key(path)
+    with _lock:
+        _entries[key] = (info, signature)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def moved(src: str, dst: str) -> None:
+    """Carry an entry across os.replace (which keeps size and mtime)."""
+    with _lock:
+        entry = _entries.pop(_key(src), None)
+        if entry is not None:
+            _entries[_key(dst)] = entry
+
+
+def forget(path: str) -> None:
+    """Drop the entry for a deleted file."""
+    with _lock:
+        _entries.pop(_key(path), None)
+
+
+def get(path: str) -> RecordingInfo:
+    """Metadata for a recording, parsing the header only if nothing is registered.
+
+    Raises:
+        OSError / RuntimeError: if the file is missing or not readable audio
+    """
+    key = _key(path)
+    signature = _signature(path)
+    with _lock:
+        entry = _entries.get(key)
+    if entry is not None and entry[1] == signature:
+        return entry[0]
+
+    import soundfile as sf
+    with sf.SoundFile(path) as f:
+        info = RecordingInfo(
+            channels=f.channels,
+            mode=mode_for(f.channels, f.comment),
+            samplerate=f.samplerate,
+            duration=f.frames / f.samplerate,
+            rms=None,
+            peak=None,
+            created=os.path.getmtime(path),
+        )
+    logger.debug(f"Parsed recording header for {os.path.basename(path)} ({info.mode})")
+    with _lock:
+        _entries[key] = (info, signature)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return info
+
+
+def update(path: str, **fields) -> Optional[RecordingInfo]:
+    """Fill in measured fields (e.g. rms) on an existing entry."""
+    key = _key(path)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        info = entry[0]._replace(**fields)
+        _entries[key] = (info, entry[1])
+    return info
+
+
+def measured(channels: int, mode: str, samplerate: int, frames: int,
+             sum_squares: float, peak: float,
+             created: Optional[float] = None) -> RecordingInfo:
+    """Build an entry from running statistics kept while writing the file."""
+    samples = frames * channels
+    return RecordingInfo(
+        channels=channels,
+        mode=mode,
+        samplerate=samplerate,
+        duration=frames / samplerate if samplerate else 0.0,
+        rms=(sum_squares / samples) ** 0.5 if samples else 0.0,
+        peak=peak,
+        created=created if created is not None else time.time(),
+    )
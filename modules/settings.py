@@ -27,6 +27,39 @@ def api_key_configured(name: str) -> bool:
     value = (os.environ.get(name) or '').strip().strip('"').strip("'")
     return bool(value) and not value.endswith('...')
 
+class SettingsSnapshot:
+    """Immutable, typed copy of the settings read on hot paths.
+
+    The audio callback runs every few milliseconds; instead of a dict lookup
+    (plus the defaults fallback) per block, the recorder takes the current
+    snapshot once per recording and reads plain attributes. Settings.set()
+    publishes a new snapshot with a higher version when one of these keys
+    changes, by swapping a single reference, so a reader always sees a
+    consistent set of values. Holders that care about later changes compare
+    their snapshot's version with Settings.snapshot().version.
+    """
+    __slots__ = ('version', 'silence_threshold', 'max_recording_duration')
+
+    version: int
+    silence_threshold: float
+    max_recording_duration: Optional[float]
+
+    def __init__(self, version: int, silence_threshold: float,
+                 max_recording_duration: Optional[float]) -> None:
+        set_ = object.__setattr__
+        set_(self, 'version', version)
+        set_(self, 'silence_threshold', float(silence_threshold))
+        set_(self, 'max_recording_duration',
+             float(max_recording_duration) if max_recording_duration is not None else None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("settings snapshots are immutable; use Settings.set()")
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"SettingsSnapshot({fields})"
+
+
 # Settings live alongside logs/history so user data survives git operations on the repo
 SETTINGS_DIR = Path.home() / "Documents" / "VoiceTyping"
 _LEGACY_SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.json')
@@ -106,9 +139,29 @@ class Settings:
             # Prepend a short transcript-limitations note (for the LLM reading
             # it) to the first chunk delivered in a meeting/phone session
             'session_preamble': True,
+            # Auto-send in meeting/phone sessions: once a chunk is this many
+            # seconds long it is sent at the next pause in the conversation, so
+            # transcription keeps pace with the call and the wait after ending
+            # stays short however long it ran. null = send on Caps Lock only.
+            'session_chunk_target_s': 45.0,
+            # Hard cap for pause-free stretches: send anyway at this length
+            'session_chunk_max_s': 90.0,
+            # Audio shared between consecutive chunks so a word cut by a send
+            # is transcribed whole; the repeated copy is dropped on delivery
+            # (matched by word timestamps). 0 disables.
+            'session_chunk_overlap_s': 1.5,
 
             'clean_transcription': False,
             'cleaning_timeout': 10.0,  # Timeout for LLM cleaning in seconds
+            # Paste cleaned text sentence by sentence as the LLM generates it
+            # (Standard output mode only; other modes paste the whole text)
+            'streaming_cleaning': False,
+            # Clean short, simple dictations (fillers, dictated punctuation)
+            # with local rules instead of an LLM call
+            'local_cleaning': True,
+            # Reuse earlier LLM cleanings of identical short dictations
+            # (kept in Documents\VoiceTyping\cleaning_cache.json)
+            'cleaning_cache': True,
             'llm_model': "openai/gpt-4o-mini",
 
             'selected_microphone': None,
@@ -121,7 +174,25 @@ class Settings:
 
             # Logging
             'log_retention_days': 60,
+            'log_max_mb': 10,  # Size at which a day's log rolls over into gzipped parts (None = no limit)
             'log_transcript_text': True,  # Include full transcript text in log files
+            'history_retention_days': None,  # Days of dictations kept in history.db (None = forever)
+            'performance_window': 50,  # Recent dictations summarized in the tray Performance menu
+            # Flag the recording indicator when audio dropouts (input overflows)
+            # exceed this many per minute of recording (None = never)
+            'xrun_warning_per_min': 6,
+            # Keep each transcribed recording as FLAC in Documents\VoiceTyping\audio
+            # so it can be re-transcribed later; oldest files are evicted past
+            # either limit (None = no limit)
+            'audio_archive': False,
+            'audio_archive_max_mb': 2000,
+            'audio_archive_max_days': 180,
+
+            # Local HTTP transcription server for other tools on this machine
+            # (127.0.0.1 only); set a token to require "Authorization: Bearer <token>"
+            'http_server': False,
+            'http_server_port': 8737,
+            'http_server_token': None,
 
             # Output
             'output_mode': 'standard',  # Output provider for text insertion
@@ -129,6 +200,7 @@ class Settings:
         }
         self.current_settings: Dict[str, Any] = self.load_settings()
         self._run_migrations()
+        self._snapshot = self._build_snapshot(1)
 
     def _migrate_settings_location(self) -> None:
         """One-time move of settings.json from modules/ into Documents\\VoiceTyping."""
@@ -221,6 +293,12 @@ class Settings:
         Returns True if any changes were made.
         """
         changes_made = False
+        legacy_ids = [self.current_settings.get('selected_microphone'),
+                      *(self.current_settings.get('favorite_microphones') or [])]
+        if not any(isinstance(value, int) for value in legacy_ids):
+            # Already migrated (every install but the oldest): don't import
+            # sounddevice or touch the audio devices at startup
+            return False
         from modules.audio_manager import get_device_by_id, create_device_identifier
 
         # Migrate selected microphone
@@ -290,4 +368,19 @@ class Settings:
 
     def set(self, key: str, value: Any) -> None:
         self.current_settings[key] = value
-        self.save_settings()
\ No newline at end of file
+        if key in SettingsSnapshot.__slots__:
+            with self._save_lock:
+                self._snapshot = self._build_snapshot(self._snapshot.version + 1)
+        self.save_settings()
+
+    def snapshot(self) -> SettingsSnapshot:
+        """The current hot-path settings; see SettingsSnapshot."""
+        return self._snapshot
+
+    def _build_snapshot(self, version: int) -> SettingsSnapshot:
+        keys = [key for key in SettingsSnapshot.__slots__ if key != 'version']
+        try:
+            return SettingsSnapshot(version, **{key: self.get(key) for key in keys})
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid recording setting ({e}); using defaults")
+            return SettingsSnapshot(version, **{key: self.default_settings[key] for key in keys})
\ No newline at end of file
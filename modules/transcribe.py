@@ -1,14 +1,20 @@
 """Multi-provider Speech-to-Text module with Strategy pattern"""
+import asyncio
 import os
 import logging
-from typing import Union, Optional
+import threading
+from collections import OrderedDict
+from typing import Callable, Union, Optional
 from pathlib import Path
 
 # Provider modules are imported lazily inside _get_transcriber to keep app
 # startup fast (the OpenAI SDK in particular is a heavy import).
 # Note: importing Settings also loads .env, so os.environ checks below see
 # the user's configured API keys.
+from modules import recording_info
 from modules.settings import Settings, api_key_configured
+from services import async_core
+from services.transcription_options import TranscriptionOptions
 
 # OpenAI Speech to text docs: https://platform.openai.com/docs/guides/speech-to-text
 # ⚠️ IMPORTANT: OpenAI Audio API file uploads are currently limited to 25 MB
@@ -20,8 +26,57 @@ settings = Settings()
 
 # Transcriber instances cached by their full configuration so repeat
 # transcriptions reuse HTTP clients/connections. A settings change produces a
-# different key, which transparently creates a fresh instance.
-_transcriber_cache: dict = {}
+# different key, which transparently creates a fresh instance. Bounded LRU:
+# each instance holds a connection pool, and every settings permutation
+# (language, phone thresholds, custom URL...) would otherwise keep one open.
+TRANSCRIBER_CACHE_SIZE = 4
+# Evicted instances may still be serving an in-flight request (transcribers
+# are shared across threads), so their clients are closed only after the
+# longest request timeout has passed
+EVICTED_CLOSE_DELAY_S = 180.0
+_transcriber_cache: "OrderedDict[tuple, object]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+_PROVIDERS = ('elevenlabs', 'openai', 'custom')
+
+
+def _close_transcriber(transcriber) -> None:
+    close = getattr(transcriber, 'close', None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.debug(f"Error closing {type(transcriber).__name__}: {e}")
+
+
+def _cached(key: tuple, factory: Callable[[], object]):
+    """Return the cached transcriber for key, constructing it on a miss.
+
+    Construction runs outside the lock (it may import a provider SDK); if two
+    threads race, the first instance stored wins and the other is closed.
+    """
+    with _cache_lock:
+        transcriber = _transcriber_cache.get(key)
+        if transcriber is not None:
+            _transcriber_cache.move_to_end(key)
+            return transcriber
+
+    created = factory()
+    evicted = []
+    with _cache_lock:
+        transcriber = _transcriber_cache.setdefault(key, created)
+        _transcriber_cache.move_to_end(key)
+        while len(_transcriber_cache) > TRANSCRIBER_CACHE_SIZE:
+            evicted.append(_transcriber_cache.popitem(last=False))
+    if transcriber is not created:
+        _close_transcriber(created)
+    for old_key, old in evicted:
+        logger.debug(f"Evicting cached transcriber {old_key[0]}")
+        timer = threading.Timer(EVICTED_CLOSE_DELAY_S, _close_transcriber, args=(old,))
+        timer.daemon = True
+        timer.start()
+    return transcriber
 
 
 def _get_transcriber(provider_name: str):
@@ -40,28 +95,28 @@ def _get_transcriber(provider_name: str):
     """
     if provider_name == "elevenlabs":
         language = settings.get('stt_language') or 'en'
-        key = (provider_name, language)
-        if key not in _transcriber_cache:
+
+        def create():
             from services.elevenlabs_stt import ElevenLabsDictationTranscriber
-            _transcriber_cache[key] = ElevenLabsDictationTranscriber(language=language)
-        return _transcriber_cache[key]
+            return ElevenLabsDictationTranscriber(language=language)
+        return _cached((provider_name, language), create)
     elif provider_name == "openai":
         model = settings.get('openai_stt_model') or 'gpt-4o-mini-transcribe'
         language = settings.get('stt_language') or 'en'
-        key = (provider_name, model, language)
-        if key not in _transcriber_cache:
+
+        def create():
             from services.openai_stt import OpenAITranscriber
-            _transcriber_cache[key] = OpenAITranscriber(model=model, language=language)
-        return _transcriber_cache[key]
+            return OpenAITranscriber(model=model, language=language)
+        return _cached((provider_name, model, language), create)
     elif provider_name == "custom":
         base_url = settings.get('custom_stt_base_url') or 'http://localhost:8000'
         model = settings.get('custom_stt_model') or 'parakeet-tdt-0.6b-v2'
         language = settings.get('stt_language') or 'en'
-        key = (provider_name, base_url, model, language)
-        if key not in _transcriber_cache:
+
+        def create():
             from services.custom_stt import CustomTranscriber
-            _transcriber_cache[key] = CustomTranscriber(base_url=base_url, model=model, language=language)
-        return _transcriber_cache[key]
+            return CustomTranscriber(base_url=base_url, model=model, language=language)
+        return _cached((provider_name, base_url, model, language), create)
     # Add other providers here as needed
     else:
         raise ValueError(f"Unknown STT provider: {provider_name}")
@@ -77,17 +132,21 @@ def _default_provider() -> str:
     return 'elevenlabs' if api_key_configured('ELEVENLABS_API_KEY') else 'openai'
 
 
+def _recording_mode(filename: str) -> str:
+    """Mode of a recording from the metadata registry (dictation if unreadable)."""
+    try:
+        return recording_info.get(filename).mode
+    except Exception:
+        return recording_info.DICTATION
+
+
 def is_multichannel_recording(filename: str) -> bool:
     """True if the file is a 2-channel meeting-mode recording.
 
     Normal dictation recordings are always mono, so channel count is a
     reliable marker that survives snapshots, retries, and app restarts.
     """
-    try:
-        import soundfile as sf
-        return sf.info(filename).channels >= 2
-    except Exception:
-        return False
+    return _recording_mode(filename) == recording_info.MEETING
 
 
 def is_phone_recording(filename: str) -> bool:
@@ -97,13 +156,7 @@ def is_phone_recording(filename: str) -> bool:
     a WAV comment — a marker that, like channel count, survives snapshots,
     retries, and app restarts.
     """
-    try:
-        import soundfile as sf
-        from modules.recorder import PHONE_RECORDING_COMMENT
-        with sf.SoundFile(filename) as f:
-            return (f.comment or '').startswith(PHONE_RECORDING_COMMENT)
-    except Exception:
-        return False
+    return _recording_mode(filename) == recording_info.PHONE
 
 
 def is_conversation_recording(filename: str) -> bool:
@@ -112,19 +165,18 @@ def is_conversation_recording(filename: str) -> bool:
     These produce speaker-labeled transcripts, so callers use this to skip
     steps that would mangle the labels (e.g. LLM cleaning).
     """
-    return is_multichannel_recording(filename) or is_phone_recording(filename)
+    return _recording_mode(filename) != recording_info.DICTATION
 
 
 def _get_meeting_transcriber():
     """Get the ElevenLabs multichannel transcriber for meeting recordings (cached)."""
     you_label = settings.get('meeting_speaker_you') or 'Me'
     them_label = settings.get('meeting_speaker_them') or 'Them'
-    key = ('elevenlabs_meeting', you_label, them_label)
-    if key not in _transcriber_cache:
+
+    def create():
         from services.elevenlabs_stt import ElevenLabsMeetingTranscriber
-        _transcriber_cache[key] = ElevenLabsMeetingTranscriber(
-            you_label=you_label, them_label=them_label)
-    return _transcriber_cache[key]
+        return ElevenLabsMeetingTranscriber(you_label=you_label, them_label=them_label)
+    return _cached(('elevenlabs_meeting', you_label, them_label), create)
 
 
 def _get_phone_transcriber():
@@ -138,26 +190,71 @@ def _get_phone_transcriber():
     threshold = settings.get('phone_diarization_threshold')
     key = ('elevenlabs_phone', num_speakers, labeled, my_speaker_id,
            you_label, them_label, use_library, threshold)
-    if key not in _transcriber_cache:
+
+    def create():
         from services.elevenlabs_stt import ElevenLabsDiarizedTranscriber
-        _transcriber_cache[key] = ElevenLabsDiarizedTranscriber(
+        return ElevenLabsDiarizedTranscriber(
             num_speakers=num_speakers, labeled=labeled,
             my_speaker_id=my_speaker_id, you_label=you_label,
             them_label=them_label, use_speaker_library=use_library,
             diarization_threshold=threshold)
-    return _transcriber_cache[key]
+    return _cached(key, create)
+
+
+def _conversation_transcriber(filename: str):
+    """The Scribe transcriber for a meeting/phone recording, or None for dictation."""
+    mode = _recording_mode(filename)
+    # Meeting-mode recordings (2-channel: mic + system audio) always route to
+    # ElevenLabs Scribe multichannel, which attributes speakers by channel.
+    if mode == recording_info.MEETING:
+        logger.info("Meeting recording detected; using ElevenLabs Scribe multichannel")
+        return _get_meeting_transcriber()
+
+    # Phone-mode recordings (mono, multiple speakers on one mic) route to
+    # ElevenLabs Scribe with voice diarization for speaker attribution.
+    if mode == recording_info.PHONE:
+        logger.info("Phone recording detected; using ElevenLabs Scribe diarization")
+        return _get_phone_transcriber()
+    return None
 
 
-def transcribe_audio(filename: str, language: Optional[str] = None) -> str:
+def transcribe_chunk(filename: str, cancelled: async_core.CancelCheck = None):
+    """Transcribe a conversation-session chunk, keeping its word timeline.
+
+    Returns a TimedTranscript for meeting/phone recordings, so the chunk queue
+    can drop words repeated from the previous chunk's overlap; other
+    recordings (no word timings available) return plain text.
+    """
+    return async_core.run_sync(transcribe_chunk_async(filename), cancelled)
+
+
+async def transcribe_chunk_async(filename: str):
+    """Coroutine behind transcribe_chunk()."""
+    transcriber = await asyncio.to_thread(_conversation_transcriber, filename)
+    if transcriber is not None:
+        return await transcriber.transcribe_timed_async(filename)
+    return await transcribe_async(filename)
+
+
+def transcribe_audio(filename: str, language: Optional[str] = None,
+                     options: Optional[TranscriptionOptions] = None,
+                     cancelled: async_core.CancelCheck = None) -> str:
     """
     Transcribe audio using the configured provider
 
-    This is the high-level function that the rest of the app calls.
-    It routes to the appropriate provider based on settings.
+    This is the high-level function that the rest of the app calls: a
+    blocking wrapper that runs transcribe_async() on the shared event loop.
+    Safe to call concurrently: overrides travel with the request as
+    TranscriptionOptions rather than being set on the shared, cached
+    transcriber.
 
     Args:
         filename: Path to the audio file to transcribe
         language: Optional language override (uses settings default if not provided)
+        options: Optional per-call overrides (language, model, prompt);
+            an explicit language argument takes precedence over options.language
+        cancelled: Optional CancelToken or check polled while waiting; once it fires
+            the request is aborted and async_core.Cancelled is raised
 
     Returns:
         Transcribed text
@@ -165,41 +262,38 @@ def transcribe_audio(filename: str, language: Optional[str] = None) -> str:
     Raises:
         Exception: If transcription fails
     """
-    # Meeting-mode recordings (2-channel: mic + system audio) always route to
-    # ElevenLabs Scribe multichannel, which attributes speakers by channel.
-    if is_multichannel_recording(filename):
-        logger.info("Meeting recording detected; using ElevenLabs Scribe multichannel")
-        return _get_meeting_transcriber().transcribe(filename)
+    if language is not None:
+        options = (options or TranscriptionOptions())._replace(language=language)
+    return async_core.run_sync(transcribe_async(filename, options), cancelled)
 
-    # Phone-mode recordings (mono, multiple speakers on one mic) route to
-    # ElevenLabs Scribe with voice diarization for speaker attribution.
-    if is_phone_recording(filename):
-        logger.info("Phone recording detected; using ElevenLabs Scribe diarization")
-        return _get_phone_transcriber().transcribe(filename)
+
+async def transcribe_async(filename: str,
+                           options: Optional[TranscriptionOptions] = None) -> str:
+    """Transcribe on the shared event loop; routes like transcribe_audio()."""
+    # Routing may parse a file header or construct (import) a provider on a
+    # cache miss; neither belongs on the event loop
+    conversation_transcriber = await asyncio.to_thread(_conversation_transcriber, filename)
+    if conversation_transcriber is not None:
+        return await conversation_transcriber.transcribe_async(filename)
 
     provider = settings.get('stt_provider') or _default_provider()
 
-    # Get language from parameter or settings
-    if language is None:
-        language = settings.get('stt_language') or 'en'
+    options = options or TranscriptionOptions()
+    # Get language from options, or settings
+    language = options.language or settings.get('stt_language') or 'en'
+    options = options._replace(language=language)
 
     try:
-        transcriber = _get_transcriber(provider)
+        transcriber = await asyncio.to_thread(_get_transcriber, provider)
 
         # Get model info if available
-        model_info = ""
-        if hasattr(transcriber, 'model'):
-            model_info = f"/{transcriber.model}"
+        model = options.model or getattr(transcriber, 'model', None)
+        model_info = f"/{model}" if model else ""
 
         logger.info(f"Using provider: {provider}{model_info}, language: {language}")
 
-        # Update language if provided as parameter
-        if language and hasattr(transcriber, 'update_language'):
-            transcriber.update_language(language)
-
         # Transcribe the audio
-        result = transcriber.transcribe(filename)
-        return result
+        return await transcriber.transcribe_async(filename, options)
 
     except Exception as e:
         logger.error(f"Transcription failed with provider {provider}: {e}")
@@ -214,13 +308,49 @@ def set_stt_provider(provider: str) -> None:
         provider: Provider name ('elevenlabs', 'openai', 'custom')
     """
     # Validate provider
+    if provider not in _PROVIDERS:
+        logger.error(f"Failed to set STT provider: unknown provider {provider}")
+        raise ValueError(f"Unknown STT provider: {provider}")
+    settings.set('stt_provider', provider)
+    logger.info(f"STT provider changed to: {provider}")
+    prewarm_transcriber()
+
+
+def warm_transcriber() -> bool:
+    """Build the current dictation transcriber and open its connection.
+
+    Failures are only logged (the transcription path reports real errors
+    when it runs); returns whether the warm-up succeeded.
+    """
     try:
-        _get_transcriber(provider)  # This will raise if provider is invalid
-        settings.set('stt_provider', provider)
-        logger.info(f"STT provider changed to: {provider}")
-    except ValueError as e:
-        logger.error(f"Failed to set STT provider: {e}")
-        raise
+        transcriber = _get_transcriber(get_current_provider())
+        warm_up = getattr(transcriber, 'warm', None)
+        if warm_up is not None:
+            warm_up()
+        logger.debug(f"Pre-warmed {type(transcriber).__name__}")
+        return True
+    except Exception as e:
+        logger.debug(f"Transcriber pre-warm failed: {e}")
+        return False
+
+
+def prewarm_transcriber() -> None:
+    """Run warm_transcriber() in the background.
+
+    Called after the provider/model/language changes so the first dictation
+    afterwards doesn't pay for the SDK import (openai is heavy), client
+    construction and the TLS handshake.
+    """
+    threading.Thread(target=warm_transcriber, name='stt-prewarm', daemon=True).start()
+
+
+def close_transcribers() -> None:
+    """Close every cached transcriber's client (app shutdown)."""
+    with _cache_lock:
+        transcribers = list(_transcriber_cache.values())
+        _transcriber_cache.clear()
+    for transcriber in transcribers:
+        _close_transcriber(transcriber)
 
 
 def get_current_provider() -> str:
@@ -228,6 +358,15 @@ def get_current_provider() -> str:
     return settings.get('stt_provider') or _default_provider()
 
 
+def provider_for(filename: str) -> str:
+    """The STT provider a recording will actually be sent to: meeting and
+    phone recordings always go to ElevenLabs Scribe, the rest to the
+    configured provider."""
+    if is_conversation_recording(filename):
+        return 'elevenlabs'
+    return get_current_provider()
+
+
 def get_available_providers() -> list:
     """Get list of available STT providers"""
     providers = []
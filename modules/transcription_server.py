@@ -0,0 +1,265 @@
+"""Localhost HTTP server exposing the transcription pipeline to other tools.
+
+Editors and scripts on the same machine can POST audio and get back text
+produced by the app's configured provider, cached transcriber connections,
+meeting/phone routing and (optionally) cleaning, instead of reimplementing
+modules/transcribe.py. Jobs run on the shared work pool, so they yield to
+the app's own dictations.
+
+    POST /transcribe?clean=1&language=en&priority=interactive&stream=1
+        body: the audio file (raw bytes, e.g. curl --data-binary @memo.wav)
+    GET /health
+
+Without stream, the reply is one JSON object: text (plus raw_text when
+cleaned), provider and seconds. With stream=1 it is newline-delimited
+JSON events as the job progresses: queued, started, transcribed (raw
+text), cleaned (one per cleaned sentence), then done or error, so a
+client sees progress on long files and can show text before cleaning
+finishes. Disconnecting cancels the job.
+
+Binds 127.0.0.1 only. Requests carrying an Origin header (i.e. from a web
+page in a browser) are refused, and if http_server_token is set every
+request needs "Authorization: Bearer <token>".
+
+Runs inside the app (http_server setting) or standalone:
+
+    python -m modules.transcription_server [--port 8737]
+"""
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from modules.settings import Settings
+from modules.transcribe import get_current_provider, is_conversation_recording, provider_for, transcribe_audio
+from services import async_core, work_pool
+
+logger = logging.getLogger('voice_typing')
+
+DEFAULT_PORT = 8737
+MAX_UPLOAD_BYTES = 500 * 1024 * 1024
+# Sent on idle streams so clients and proxies don't time out during long uploads
+KEEPALIVE_S = 10.0
+
+_SUFFIXES = {
+    'audio/wav': '.wav', 'audio/x-wav': '.wav', 'audio/wave': '.wav',
+    'audio/flac': '.flac', 'audio/x-flac': '.flac',
+    'audio/ogg': '.ogg', 'audio/opus': '.opus',
+    'audio/mpeg': '.mp3', 'audio/mp4': '.m4a', 'audio/webm': '.webm',
+}
+
+
+def run_job(path: str, clean: bool, language: Optional[str],
+            emit: Callable[[dict], None], cancelled: async_core.CancelCheck) -> dict:
+    """Transcribe (and optionally clean) one file, reporting progress via emit."""
+    from modules.clean_text import CleaningInterrupted, clean_transcription_stream
+
+    settings = Settings()
+    start = time.perf_counter()
+    provider = provider_for(path)
+    emit({'event': 'started', 'provider': provider})
+    text = transcribe_audio(path, language=language, cancelled=cancelled)
+    result = {'provider': provider, 'text': text}
+    emit({'event': 'transcribed', 'text': text})
+
+    # Speaker-labeled transcripts are left uncleaned, as in the app
+    if clean and text.strip() and not is_conversation_recording(path):
+        try:
+            cleaned = clean_transcription_stream(
+                text, model=settings.get('llm_model'),
+                on_sentence=lambda piece: emit({'event': 'cleaned', 'text': piece}),
+                timeout=settings.get('cleaning_timeout'), cancelled=cancelled)
+            result.update(text=cleaned, raw_text=text)
+        except async_core.Cancelled:
+            raise
+        except CleaningInterrupted as e:
+            result.update(raw_text=text, warning=f"cleaning interrupted: {e}")
+        except Exception as e:
+            result.update(raw_text=text, warning=f"cleaning failed, raw text returned: {e}")
+    result['seconds'] = round(time.perf_counter() - start, 2)
+    return result
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "TranscriptionServer"
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("HTTP server: " + format % args)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        if self.headers.get('Origin'):
+            self._send_json(403, {'error': 'browser requests are not accepted'})
+            return False
+        token = self.server.token
+        if token and self.headers.get('Authorization') != f"Bearer {token}":
+            self._send_json(401, {'error': 'missing or wrong bearer token'})
+            return False
+        return True
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            return
+        if urlparse(self.path).path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+        self._send_json(200, {'status': 'ok', 'provider': get_current_provider(),
+                              'queued': work_pool.get_pool().pending()})
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            return
+        url = urlparse(self.path)
+        if url.path != '/transcribe':
+            self._send_json(404, {'error': 'not found'})
+            return
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_json(400, {'error': 'send the audio file as the request body'})
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self._send_json(413, {'error': f'upload larger than {MAX_UPLOAD_BYTES // 2**20} MB'})
+            return
+
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        suffix = os.path.splitext(params.get('filename', ''))[1] or _SUFFIXES.get(content_type, '.wav')
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix='voice_typing_http_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                remaining = length
+                while remaining:
+                    block = self.rfile.read(min(remaining, 1 << 20))
+                    if not block:
+                        raise ConnectionError('upload ended early')
+                    f.write(block)
+                    remaining -= len(block)
+            self._transcribe(path, params)
+        except ConnectionError as e:
+            logger.info(f"HTTP server: client went away ({e})")
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _transcribe(self, path: str, params: dict) -> None:
+        clean = params.get('clean', '0') not in ('0', 'false', '')
+        language = params.get('language') or None
+        priority = (work_pool.INTERACTIVE if params.get('priority') == 'interactive'
+                    else work_pool.BACKGROUND)
+        stream = params.get('stream', '0') not in ('0', 'false', '')
+
+        token = async_core.CancelToken()
+        events: "queue.Queue[dict]" = queue.Queue()
+        future = work_pool.get_pool().submit(
+            run_job, path, clean, language, events.put, token, priority=priority)
+        if not stream:
+            try:
+                result = future.result()
+            except async_core.Cancelled:
+                return
+            except Exception as e:
+                self._send_json(502, {'error': str(e)})
+                return
+            self._send_json(200, result)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.end_headers()
+        future.add_done_callback(lambda f: events.put({'event': '_finished'}))
+        try:
+            self._write_event({'event': 'queued', 'position': work_pool.get_pool().pending()})
+            while True:
+                try:
+                    event = events.get(timeout=KEEPALIVE_S)
+                except queue.Empty:
+                    self._write_event({'event': 'keepalive'})
+                    continue
+                if event['event'] != '_finished':
+                    self._write_event(event)
+                    continue
+                try:
+                    self._write_event({'event': 'done', **future.result()})
+                except Exception as e:
+                    self._write_event({'event': 'error', 'error': str(e)})
+                return
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("HTTP server: stream client disconnected; cancelling its job")
+            token.cancel()
+            future.cancel()
+
+    def _write_event(self, event: dict) -> None:
+        self.wfile.write((json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+
+class TranscriptionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = DEFAULT_PORT, token: Optional[str] = None) -> None:
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.token = token
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name='http-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Transcription server listening on http://127.0.0.1:{self.server_address[1]}")
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def start_from_settings(settings: Settings) -> Optional[TranscriptionServer]:
+    """Start the server if enabled; logs and returns None if the port is taken."""
+    if not settings.get('http_server'):
+        return None
+    port = settings.get('http_server_port') or DEFAULT_PORT
+    try:
+        server = TranscriptionServer(port, token=settings.get('http_server_token'))
+    except OSError as e:
+        logger.warning(f"Transcription server not started on port {port}: {e}")
+        return None
+    server.start()
+    return server
+
+
+def main() -> None:
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Serve the transcription pipeline on localhost.")
+    parser.add_argument('--port', type=int, help=f'default: http_server_port setting or {DEFAULT_PORT}')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        stream=sys.stderr)
+    settings = Settings()
+    port = args.port or settings.get('http_server_port') or DEFAULT_PORT
+    server = TranscriptionServer(port, token=settings.get('http_server_token'))
+    logger.info(f"Transcription server listening on http://127.0.0.1:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,16 @@ from PIL import Image, ImageDraw
 from modules.audio_manager import get_input_devices, get_default_device_id, set_input_device, create_device_identifier
 from modules import transcribe
 from modules import output_providers
-from modules.logger import get_log_dir
+from modules.clean_text import close_cache
+from modules.logger import get_log_dir, stop_logging
 
 # Windows constants for TaskbarCreated message
 WM_USER = 0x0400
 ICON_WATCHDOG_INTERVAL = 30  # Check icon health every 30 seconds
 ICON_RESTART_DELAY = 2  # Wait 2 seconds before restarting icon after failure
+# request_menu_update() rebuilds the menu at most this often (the rebuild
+# enumerates audio devices and providers)
+MENU_UPDATE_INTERVAL_S = 0.3
 
 logger = logging.getLogger('voice_typing')
 
@@ -41,6 +45,24 @@ def create_copy_menu(app):
         for text in app.history.get_recent()
     ]
 
+def create_performance_menu(app):
+    """Creates the latency summary (p50/p95 per pipeline stage) of recent dictations"""
+    window = app.settings.get('performance_window') or 50
+    rows = app.metrics.summary(window)
+    if not rows:
+        items = [pystray.MenuItem('No dictations measured yet', None, enabled=False)]
+    else:
+        count = rows[-1][1]
+        items = [pystray.MenuItem(f'Last {count} dictations (p50 / p95):', None, enabled=False)]
+        for stage, _, p50, p95 in rows:
+            items.append(pystray.MenuItem(f'    {stage}: {p50:,.0f} / {p95:,.0f} ms', None, enabled=False))
+    items += [
+        pystray.Menu.SEPARATOR,
+        pystray.MenuItem('Open Metrics File', lambda icon, item: os.startfile(str(app.metrics.path)),
+                         enabled=app.metrics.path.exists()),
+    ]
+    return items
+
 def create_microphone_menu(app):
     """Creates dynamic menu of available microphones"""
     devices = sorted(get_input_devices(), key=lambda d: d['name'].lower())
@@ -133,11 +155,13 @@ def create_stt_provider_menu(app):
 
     def auto_provider_handler(icon, item):
         app.settings.set('stt_provider', None)
+        transcribe.prewarm_transcriber()
         app.update_icon_menu()
 
     def make_model_handler(model: str):
         def handler(icon, item):
             app.settings.set('openai_stt_model', model)
+            transcribe.prewarm_transcriber()
             app.update_icon_menu()
         return handler
 
@@ -249,6 +273,8 @@ class TrayIconManager:
         self.icon_lock = threading.Lock()
         self.restart_count = 0
         self.last_restart_time = 0
+        self._menu_timer: Optional[threading.Timer] = None
+        self._menu_timer_lock = threading.Lock()
 
         # Register for TaskbarCreated message (for Explorer restart detection)
         self._taskbar_created_msg = self._register_taskbar_created_message()
@@ -282,6 +308,7 @@ class TrayIconManager:
         microphone_menu = create_microphone_menu(app)
         stt_menu = create_stt_provider_menu(app)
         output_menu = create_output_mode_menu(app)
+        performance_menu = create_performance_menu(app)
 
         def copy_latest_transcription(icon, item) -> None:
             recent_texts = app.history.get_recent()
@@ -307,6 +334,13 @@ class TrayIconManager:
         def on_exit(icon, item):
             app.logger.info("Application exiting.")
             self.stop()
+            # Finish queued FLAC encodes: their history rows already name them
+            if app.audio_archive is not None:
+                app.audio_archive.close()
+            app.history.close()
+            app.metrics.close()
+            close_cache()
+            stop_logging()
             os._exit(0)
 
         return pystray.Menu(
@@ -327,6 +361,10 @@ class TrayIconManager:
                 ),
                 enabled=bool(copy_menu)
             ),
+            pystray.MenuItem(
+                '🔍 Search History...',
+                lambda icon, item: app.open_history_search()
+            ),
             pystray.MenuItem(
                 'Microphone',
                 pystray.Menu(*microphone_menu)
@@ -354,6 +392,21 @@ class TrayIconManager:
                         lambda icon, item: app.toggle_streaming_dictation(),
                         checked=lambda item: bool(app.settings.get('streaming_dictation'))
                     ),
+                    pystray.MenuItem(
+                        'Archive Recordings',
+                        lambda icon, item: app.toggle_audio_archive(),
+                        checked=lambda item: bool(app.settings.get('audio_archive'))
+                    ),
+                    pystray.MenuItem(
+                        'Re-transcribe Archive',
+                        lambda icon, item: app.retranscribe_archive(),
+                        enabled=lambda item: app.audio_archive is not None and not app._retranscribing
+                    ),
+                    pystray.MenuItem(
+                        'Local Transcription Server',
+                        lambda icon, item: app.toggle_http_server(),
+                        checked=lambda item: bool(app.settings.get('http_server'))
+                    ),
                     pystray.MenuItem(
                         'Silent-Start Timeout',
                         lambda icon, item: app.toggle_silence_detection(),
@@ -432,6 +485,10 @@ class TrayIconManager:
                     )
                 )
             ),
+            pystray.MenuItem(
+                'Performance',
+                pystray.Menu(*performance_menu)
+            ),
             pystray.MenuItem('Restart', lambda icon, item: app.restart_app()),
             pystray.MenuItem('Exit', on_exit)
         )
@@ -445,6 +502,21 @@ class TrayIconManager:
                 except Exception as e:
                     logger.warning(f"Failed to update menu: {e}")
 
+    def request_menu_update(self) -> None:
+        """Rebuild the menu shortly, off the calling thread. Requests made
+        while one is pending share its rebuild, so a burst costs one."""
+        with self._menu_timer_lock:
+            if self._menu_timer is not None:
+                return
+            self._menu_timer = threading.Timer(MENU_UPDATE_INTERVAL_S, self._deferred_menu_update)
+            self._menu_timer.daemon = True
+            self._menu_timer.start()
+
+    def _deferred_menu_update(self) -> None:
+        with self._menu_timer_lock:
+            self._menu_timer = None
+        self.update_menu()
+
     def update_icon(self, emoji_prefix: str, tooltip_text: str) -> None:
         """Update both the tray icon image and tooltip."""
         with self.icon_lock:
@@ -569,6 +641,7 @@ def setup_tray_icon(app):
     app.tray_manager = manager
     app.update_tray_tooltip = manager.update_icon
     app.update_icon_menu = manager.update_menu
+    app.request_menu_update = manager.request_menu_update
 
     # Start the tray icon
     manager.start()
\ No newline at end of file
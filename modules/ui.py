@@ -3,15 +3,16 @@ import queue
 import threading
 import time
 import tkinter as tk
+from collections import deque
 from typing import Optional, Callable, Any, Tuple
 
 from pynput import keyboard
-import pyautogui
 import pyperclip
 
 from modules.status_manager import StatusConfig
 from modules.screen_utils import get_primary_monitor_geometry, get_all_monitor_geometries, MonitorGeometry
 from modules.output_providers import get_output_provider
+from services import tracing
 
 logger = logging.getLogger('voice_typing')
 
@@ -96,6 +97,9 @@ class UIFeedback:
         self._recording_started: Optional[float] = None
         self._recording_base_text: str = ''
         self._recording_note: str = ''
+        # Streamed text pieces waiting to be pasted: (text, output_mode, first, final)
+        self._partial_queue: deque = deque()
+        self._partial_after_id: Optional[str] = None
         self.root.after(UI_QUEUE_POLL_MS, self._process_ui_queue)
 
     def _process_ui_queue(self) -> None:
@@ -427,7 +431,21 @@ class UIFeedback:
     def insert_text(self, text: str, output_mode: str = 'standard') -> None:
         """Insert text at the current cursor position using the configured output provider.
         Thread-safe: runs on the Tk main thread (providers use root.after and the clipboard)."""
-        self._call_on_ui_thread(lambda: self._insert_text_impl(text, output_mode))
+        trace = tracing.current()
+        if trace is None:
+            self._call_on_ui_thread(lambda: self._insert_text_impl(text, output_mode))
+            return
+        # Time the paste against the dictation, including the wait for the Tk thread
+        start = time.perf_counter()
+        trace.hold()
+
+        def insert() -> None:
+            try:
+                self._insert_text_impl(text, output_mode)
+            finally:
+                trace.add('insert', start)
+                trace.release()
+        self._call_on_ui_thread(insert)
 
     def _insert_text_impl(self, text: str, output_mode: str) -> None:
         try:
@@ -436,6 +454,43 @@ class UIFeedback:
         except Exception as e:
             logger.error(f"UIFeedback: Error during text insertion: {e}", exc_info=True)
 
+    def supports_incremental_output(self, output_mode: str = 'standard') -> bool:
+        """Whether the output provider can paste text piece by piece."""
+        try:
+            return get_output_provider(output_mode).supports_incremental
+        except Exception:
+            return False
+
+    def insert_partial(self, text: str, output_mode: str = 'standard',
+                       first: bool = False, final: bool = False) -> None:
+        """Insert the next piece of progressively delivered text. Thread-safe.
+
+        Pieces are pasted in order, at least clipboard_restore_delay_ms apart so
+        a slow target app reads each piece before the clipboard moves on.
+        """
+        self._call_on_ui_thread(
+            lambda: self._queue_partial_impl(text, output_mode, first, final))
+
+    def _queue_partial_impl(self, text: str, output_mode: str, first: bool, final: bool) -> None:
+        self._partial_queue.append((text, output_mode, first, final))
+        if self._partial_after_id is None:
+            self._pump_partial_impl()
+
+    def _pump_partial_impl(self) -> None:
+        self._partial_after_id = None
+        if not self._partial_queue:
+            return
+        text, output_mode, first, final = self._partial_queue.popleft()
+        try:
+            provider = get_output_provider(output_mode)
+            provider.insert_partial(text, self.pyautogui_lock, self.root.after, first, final)
+        except Exception as e:
+            logger.error(f"UIFeedback: Error during partial insertion: {e}", exc_info=True)
+        if self._partial_queue:
+            from modules.settings import Settings
+            delay_ms = Settings().get('clipboard_restore_delay_ms') if text else 0
+            self._partial_after_id = self.root.after(delay_ms, self._pump_partial_impl)
+
     def show_warning(self, message: str, duration_ms: int = 5000) -> None:
         """Show a warning message in all indicators for a specified duration. Thread-safe."""
         self._call_on_ui_thread(lambda: self._show_warning_impl(message, duration_ms))
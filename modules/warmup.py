@@ -0,0 +1,106 @@
+"""Background warm-up of heavy optional imports, plus the startup timeline.
+
+litellm, openai and websocket are imported lazily so the tray and indicator
+come up fast, but that moves their import cost (seconds for litellm) onto
+the first dictation. Once the UI is running, a low-priority thread imports
+exactly the modules the current settings will use and builds the active
+transcriber, so that cost is paid while the app sits idle instead.
+
+mark() records startup milestones; the warm-up logs them together with the
+per-module import times as one "Startup timeline" line.
+"""
+import importlib
+import logging
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+from modules import transcribe
+
+logger = logging.getLogger('voice_typing')
+
+# Let the keyboard hook and first UI frames settle before imports start
+# competing for the GIL
+WARMUP_DELAY_S = 1.0
+
+# Windows THREAD_PRIORITY_BELOW_NORMAL
+_THREAD_PRIORITY_BELOW_NORMAL = -1
+
+_t0 = time.perf_counter()
+_timeline: List[Tuple[str, float]] = []
+_lock = threading.Lock()
+_started = False
+
+# Service module each STT provider's transcriber lives in (plus its SDK)
+_PROVIDER_MODULES = {
+    'elevenlabs': ['services.elevenlabs_stt'],
+    'openai': ['openai', 'services.openai_stt'],
+    'custom': ['services.custom_stt'],
+}
+
+
+def mark(label: str) -> None:
+    """Record a startup milestone (seconds since this module was imported)."""
+    with _lock:
+        _timeline.append((label, time.perf_counter() - _t0))
+
+
+def modules_for(settings) -> List[str]:
+    """The lazily imported modules the current settings will need."""
+    # pyautogui sends the paste keystroke for every dictation
+    names = ['pyautogui']
+    names += _PROVIDER_MODULES.get(transcribe.get_current_provider(), [])
+    if settings.get('clean_transcription'):
+        names.append('litellm')
+    if settings.get('streaming_dictation'):
+        names += ['websocket', 'services.openai_realtime_stt']
+    return names
+
+
+def start(settings) -> None:
+    """Start the warm-up thread (once). Call when the UI is up."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_run, args=(settings,), name='warmup', daemon=True).start()
+
+
+def _lower_priority() -> None:
+    if sys.platform != 'win32':
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_PRIORITY_BELOW_NORMAL)
+    except Exception:
+        pass
+
+
+def _run(settings) -> None:
+    _lower_priority()
+    time.sleep(WARMUP_DELAY_S)
+
+    loaded = []
+    for name in modules_for(settings):
+        if name in sys.modules:
+            continue
+        start_s = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            # Missing optional dependency: the feature reports it when used
+            logger.debug(f"Warm-up import of {name} failed: {e}")
+            continue
+        loaded.append(f"{name} {time.perf_counter() - start_s:.2f}s")
+
+    start_s = time.perf_counter()
+    if transcribe.warm_transcriber():
+        loaded.append(f"transcriber {time.perf_counter() - start_s:.2f}s")
+    mark('warm')
+
+    with _lock:
+        milestones = ", ".join(f"{label} +{at:.2f}s" for label, at in _timeline)
+    logger.info(f"Startup timeline: {milestones} | warm-up: {', '.join(loaded) or 'nothing to load'}")
@@ -0,0 +1,143 @@
+"""Background asyncio event loop shared by the network-bound services.
+
+Transcription requests from every provider run as coroutines on one daemon
+event loop thread instead of each holding a blocking thread for the length
+of an upload. Callers that are themselves synchronous (the processing
+thread, chunk workers, retries) use run_sync(), which waits for the result
+but can be told to give up: cancelling the future cancels the task on the
+loop, and httpx aborts the request and drops its connection instead of
+letting it run to completion in the background.
+
+A CancelToken groups the requests of one unit of work (a dictation's
+upload and cleaning): cancel() aborts them at once from any thread, with
+no polling delay, and anything started on a cancelled token fails fast.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Optional, Set, Union
+
+logger = logging.getLogger('voice_typing')
+
+# How often run_sync re-checks its cancel condition while waiting
+CANCEL_POLL_S = 0.05
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    """The caller cancelled the operation before it completed."""
+
+
+class CancelToken:
+    """Cancellation handle for the requests of one unit of work."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._futures: Set[concurrent.futures.Future] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """Abort every request running under this token (idempotent)."""
+        with self._lock:
+            self._cancelled = True
+            futures, self._futures = self._futures, set()
+        for future in futures:
+            future.cancel()
+
+    def _attach(self, future: concurrent.futures.Future) -> bool:
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._futures.add(future)
+            return True
+
+    def _detach(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The shared loop, started on first use."""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or not _thread.is_alive():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            _thread = threading.Thread(target=run, name='async-core', daemon=True)
+            _thread.start()
+            ready.wait()
+            _loop = loop
+        return _loop
+
+
+def submit(coro: Coroutine) -> concurrent.futures.Future:
+    """Schedule a coroutine on the shared loop from any thread."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+# What run_sync accepts as its cancel condition
+CancelCheck = Union[CancelToken, Callable[[], bool], None]
+
+
+def run_sync(coro: Coroutine, cancelled: CancelCheck = None) -> Any:
+    """Run a coroutine on the shared loop and wait for its result.
+
+    cancelled may be a CancelToken (cancel() aborts the request immediately)
+    or a check polled every CANCEL_POLL_S while waiting; either way the task
+    is cancelled, aborting its in-flight request, and Cancelled is raised.
+    Must not be called from the loop thread itself.
+    """
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_sync called from the event loop thread")
+    if isinstance(cancelled, CancelToken) and cancelled.cancelled:
+        coro.close()
+        raise Cancelled("operation cancelled")
+    future = submit(coro)
+    if cancelled is None:
+        return future.result()
+    if isinstance(cancelled, CancelToken):
+        if not cancelled._attach(future):
+            future.cancel()
+            raise Cancelled("operation cancelled")
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise Cancelled("operation cancelled") from None
+        finally:
+            cancelled._detach(future)
+    while True:
+        done, _ = concurrent.futures.wait([future], timeout=CANCEL_POLL_S)
+        if done:
+            return future.result()
+        if cancelled():
+            future.cancel()
+            raise Cancelled("operation cancelled")
+
+
+def close_soon(aclose: Callable[[], Awaitable]) -> None:
+    """Run an async close() on the loop without waiting (safe from any thread)."""
+    if _loop is None or not _thread.is_alive():
+        return  # nothing ever ran, so nothing is open
+
+    async def close():
+        try:
+            await aclose()
+        except Exception as e:
+            logger.debug(f"Error closing async client: {e}")
+
+    asyncio.run_coroutine_threadsafe(close(), _loop)
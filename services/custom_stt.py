@@ -1,12 +1,16 @@
 """Custom Speech-to-Text Service Implementation"""
+import asyncio
 import os
 import logging
 from typing import Union, Optional
 from pathlib import Path
 import io
-import requests
+import httpx
 import json
 
+from services import async_core, tracing
+from services.transcription_options import DEFAULT_OPTIONS, TranscriptionOptions
+
 logger = logging.getLogger('voice_typing')
 
 
@@ -37,18 +41,36 @@ class CustomTranscriber:
         # Remember which endpoint pattern worked so subsequent requests skip the probing
         self._working_endpoint: Optional[str] = None
 
-        # (connect, read) timeouts: fail fast on unreachable hosts instead of
-        # hanging for the full read timeout per endpoint attempt
-        self._timeout = (5, 60)
+        # Fail fast on unreachable hosts (5s connect) instead of hanging for
+        # the full read timeout per endpoint attempt
+        self._timeout = httpx.Timeout(60.0, connect=5.0)
+        # Pooled connections: consecutive dictations reuse the TCP/TLS
+        # session. Created on first use, on the shared event loop.
+        self._http: Optional[httpx.AsyncClient] = None
 
         logger.info(f"Initialized custom transcriber with URL: {self.base_url}, model: {model}")
 
-    def transcribe(self, audio_data: Union[bytes, str, Path]) -> str:
+    def _client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client (only touched from the event loop thread)."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self._timeout)
+        return self._http
+
+    def transcribe(self, audio_data: Union[bytes, str, Path],
+                   options: TranscriptionOptions = DEFAULT_OPTIONS,
+                   cancelled: async_core.CancelCheck = None) -> str:
+        """Blocking wrapper around transcribe_async (see async_core.run_sync)."""
+        return async_core.run_sync(self.transcribe_async(audio_data, options), cancelled)
+
+    async def transcribe_async(self, audio_data: Union[bytes, str, Path],
+                               options: TranscriptionOptions = DEFAULT_OPTIONS) -> str:
         """
         Transcribe audio using custom endpoint
 
         Args:
             audio_data: Either raw audio bytes, file path as string, or Path object
+            options: Per-call language/model/prompt overrides, sent with the
+                parameterized request (never stored on the shared instance)
 
         Returns:
             Transcribed text
@@ -62,8 +84,7 @@ class CustomTranscriber:
                 file_path = Path(audio_data)
                 if not file_path.exists():
                     raise FileNotFoundError(f"Audio file not found: {file_path}")
-                with open(file_path, 'rb') as f:
-                    audio_bytes = f.read()
+                audio_bytes = await asyncio.to_thread(file_path.read_bytes)
                 filename = file_path.name
             else:
                 audio_bytes = audio_data
@@ -95,12 +116,12 @@ class CustomTranscriber:
 
                 # First try: just the file (minimal request)
                 try:
-                    response = requests.post(
-                        endpoint,
-                        files=files,
-                        headers=headers,
-                        timeout=self._timeout
-                    )
+                    with tracing.span('upload'):
+                        response = await self._client().post(
+                            endpoint,
+                            files=files,
+                            headers=headers
+                        )
 
                     if response.status_code == 200:
                         self._working_endpoint = endpoint
@@ -113,16 +134,19 @@ class CustomTranscriber:
                             'file': (filename, io.BytesIO(audio_bytes), 'audio/wav')
                         }
                         data = {
-                            'model': self.model
+                            'model': options.model or self.model,
+                            'language': options.language or self.language,
                         }
+                        if options.prompt:
+                            data['prompt'] = options.prompt
 
-                        response = requests.post(
-                            endpoint,
-                            files=files,
-                            data=data,
-                            headers=headers,
-                            timeout=self._timeout
-                        )
+                        with tracing.span('upload'):
+                            response = await self._client().post(
+                                endpoint,
+                                files=files,
+                                data=data,
+                                headers=headers
+                            )
 
                         if response.status_code == 200:
                             self._working_endpoint = endpoint
@@ -137,10 +161,10 @@ class CustomTranscriber:
                     else:
                         last_error = f"HTTP {response.status_code}: {response.text}"
 
-                except requests.exceptions.ConnectionError:
+                except httpx.ConnectError:
                     last_error = f"Connection failed to {endpoint}"
                     continue
-                except requests.exceptions.Timeout:
+                except httpx.TimeoutException:
                     last_error = f"Request timeout to {endpoint}"
                     continue
                 except Exception as e:
@@ -157,6 +181,17 @@ class CustomTranscriber:
             logger.error(f"Custom transcription failed: {e}", exc_info=True)
             raise
 
+    def warm(self) -> None:
+        """Open a pooled connection to the server ahead of the first request."""
+        async def head():
+            await self._client().head(self.base_url)
+        async_core.run_sync(head())
+
+    def close(self) -> None:
+        """Release the connection pool."""
+        if self._http is not None:
+            async_core.close_soon(self._http.aclose)
+
     def _parse_response(self, result) -> str:
         """
         Parse the response from the custom STT API
@@ -190,8 +225,3 @@ class CustomTranscriber:
             return result
         else:
             return str(result)
-
-    def update_language(self, language: str) -> None:
-        """Update the language used for transcription"""
-        self.language = language
-        logger.info(f"Updated custom STT language to: {language}")
\ No newline at end of file
@@ -13,17 +13,22 @@ how words are attributed to speakers:
   voice diarization, labeled "Speaker 1", "Speaker 2", ... in order of
   first appearance.
 """
+import asyncio
+import heapq
 import io
 import logging
 import os
 import re
 import time
 from pathlib import Path
-from typing import Optional, Union
+from typing import Callable, List, NamedTuple, Optional, Union
 
-import requests
+import httpx
 import soundfile as sf
 
+from services import async_core, tracing
+from services.transcription_options import DEFAULT_OPTIONS, TranscriptionOptions
+
 logger = logging.getLogger('voice_typing')
 
 ELEVENLABS_STT_URL = "https://api.elevenlabs.io/v1/speech-to-text"
@@ -34,6 +39,93 @@ ELEVENLABS_STT_URL = "https://api.elevenlabs.io/v1/speech-to-text"
 UTTERANCE_GAP_S = 1.2
 
 
+class TimedTranscript(NamedTuple):
+    """A transcript plus the word timeline it was built from.
+
+    render() rebuilds the transcript (same speaker labeling) from a subset of
+    words — used to drop words a session chunk repeats from its overlap with
+    the previous chunk.
+    """
+    text: str
+    words: List[dict]
+    render: Callable[[List[dict]], str]
+
+
+class UtteranceBuilder:
+    """Single-pass grouping of a time-ordered word stream into utterances.
+
+    Each speaker has at most one open utterance (a dict keyed by speaker): a
+    word within UTTERANCE_GAP_S of it extends it, otherwise it is closed and
+    a new one opened. Closed utterances wait in a heap ordered by start time
+    (ties by speaker first appearance, matching a stable sort of per-speaker
+    groups) until no open or future utterance can start before them, so
+    pop_ready() emits lines in start order while words are still arriving.
+    finish() flushes everything. O(n log u) for n words, u utterances.
+    """
+
+    def __init__(self, speaker_key, gap: float = UTTERANCE_GAP_S):
+        self._speaker_key = speaker_key
+        self._gap = gap
+        # Speaker -> rank in order of first appearance (dicts keep order)
+        self.keys_in_order: dict = {}
+        self._open: dict = {}
+        self._closed: list = []  # heap of (start, rank, seq, utterance)
+        self._seq = 0
+        self._last_start = float("-inf")
+
+    def add(self, word: dict) -> None:
+        self.extend((word,))
+
+    def extend(self, words) -> None:
+        """Add words in start order (the per-word loop, with hot names local)."""
+        speaker_key, gap = self._speaker_key, self._gap
+        keys, open_utts, close = self.keys_in_order, self._open, self._close
+        start = self._last_start
+        for word in words:
+            key = speaker_key(word)
+            start = word["start"]
+            current = open_utts.get(key)
+            if current is not None:
+                if start - current["end"] <= gap:
+                    current["text"].append(word["text"])
+                    current["end"] = word["end"]
+                    continue
+                close(current)
+            elif key not in keys:
+                keys[key] = len(keys)
+            open_utts[key] = {"key": key, "rank": keys[key], "start": start,
+                              "end": word["end"], "text": [word["text"]]}
+        self._last_start = start
+
+    def _close(self, utterance: dict) -> None:
+        self._seq += 1
+        heapq.heappush(self._closed, (utterance["start"], utterance["rank"],
+                                      self._seq, utterance))
+
+    def pop_ready(self) -> list:
+        """Utterances that can no longer be preceded by anything, in start order."""
+        # Open utterances that no future word can extend are final already
+        for key in [k for k, u in self._open.items()
+                    if self._last_start - u["end"] > self._gap]:
+            self._close(self._open.pop(key))
+        bound = min(((u["start"], u["rank"]) for u in self._open.values()),
+                    default=(float("inf"), 0))
+        ready = []
+        while (self._closed and self._closed[0][0] < self._last_start and
+               self._closed[0][:2] < bound):
+            ready.append(heapq.heappop(self._closed)[3])
+        return ready
+
+    def finish(self) -> list:
+        """Close all open utterances and return everything left, in start order."""
+        for utterance in self._open.values():
+            self._close(utterance)
+        self._open.clear()
+        ready = [entry[3] for entry in sorted(self._closed)]
+        self._closed.clear()
+        return ready
+
+
 def _prepare_upload(filename: Union[str, Path]) -> io.BytesIO:
     """Re-encode the recording as FLAC to roughly halve upload size/latency."""
     data, samplerate = sf.read(filename, dtype='float32')
@@ -57,7 +149,8 @@ class _ScribeTranscriberBase:
         # ISO-639-1 or ISO-639-3 code; the API accepts either. Conversation
         # transcribers keep 'eng'; dictation follows the stt_language setting.
         self.language_code = "eng"
-        self.session = requests.Session()
+        # Created on first use, on the shared event loop (see _client())
+        self._http: Optional[httpx.AsyncClient] = None
         # When False, utterances keep their one-line-per-turn structure but
         # drop the "Name: " prefix (used when labels would be unreliable)
         self.include_labels = True
@@ -78,69 +171,108 @@ class _ScribeTranscriberBase:
         """Whether this result's lines get 'Name: ' prefixes (may depend on keys)."""
         return self.include_labels
 
-    def transcribe(self, filename: Union[str, Path]) -> str:
+    def _client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client (only touched from the event loop thread)."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=10.0))
+        return self._http
+
+    def warm(self) -> None:
+        """Open a pooled connection to the API host ahead of the first request."""
+        async def head():
+            await self._client().head(ELEVENLABS_STT_URL, timeout=10.0)
+        async_core.run_sync(head())
+
+    def close(self) -> None:
+        """Release the client's connection pool."""
+        if self._http is not None:
+            async_core.close_soon(self._http.aclose)
+
+    def transcribe(self, filename: Union[str, Path],
+                   options: TranscriptionOptions = DEFAULT_OPTIONS,
+                   cancelled: async_core.CancelCheck = None) -> str:
+        return self.transcribe_timed(filename, options, cancelled).text
+
+    def transcribe_timed(self, filename: Union[str, Path],
+                         options: TranscriptionOptions = DEFAULT_OPTIONS,
+                         cancelled: async_core.CancelCheck = None) -> TimedTranscript:
+        """Blocking wrapper around transcribe_timed_async (see async_core.run_sync)."""
+        return async_core.run_sync(self.transcribe_timed_async(filename, options), cancelled)
+
+    async def transcribe_async(self, filename: Union[str, Path],
+                               options: TranscriptionOptions = DEFAULT_OPTIONS) -> str:
+        return (await self.transcribe_timed_async(filename, options)).text
+
+    async def transcribe_timed_async(self, filename: Union[str, Path],
+                                     options: TranscriptionOptions = DEFAULT_OPTIONS
+                                     ) -> TimedTranscript:
+        """Transcribe, keeping Scribe's per-word timings alongside the text."""
         start_time = time.time()
-        buffer = _prepare_upload(filename)
-
-        response = self.session.post(
-            ELEVENLABS_STT_URL,
-            headers={"xi-api-key": self.api_key},
-            files={"file": (buffer.name, buffer, "audio/flac")},
-            data={
-                "model_id": self.model,
-                "language_code": self.language_code,
-                "tag_audio_events": "false",
-                "no_verbatim": "true",
-                **self._request_data(),
-            },
-            timeout=self.timeout,
+        result = await self._request(filename, options)
+        transcript = self._build_labeled_transcript(result)
+        logger.info(
+            f"ElevenLabs transcription ({type(self).__name__}) completed in "
+            f"{time.time() - start_time:.1f}s ({len(transcript)} chars)"
+        )
+        return TimedTranscript(
+            text=transcript,
+            words=result.get("words") or [],
+            render=lambda words: self._build_labeled_transcript({"words": words}),
         )
-        if not response.ok:
+
+    async def _request(self, filename: Union[str, Path],
+                       options: TranscriptionOptions = DEFAULT_OPTIONS) -> dict:
+        """Upload the recording and return Scribe's parsed JSON response.
+
+        Per-call options override the instance defaults without touching
+        them, so one instance can serve concurrent requests. (Scribe has no
+        prompt parameter; options.prompt is ignored.)
+        """
+        # FLAC encoding is CPU/disk work; keep it off the event loop
+        with tracing.span('encode'):
+            buffer = await asyncio.to_thread(_prepare_upload, filename)
+
+        try:
+            with tracing.span('upload'):
+                response = await self._client().post(
+                    ELEVENLABS_STT_URL,
+                    headers={"xi-api-key": self.api_key},
+                    files={"file": (buffer.name, buffer, "audio/flac")},
+                    data={
+                        "model_id": options.model or self.model,
+                        "language_code": options.language or self.language_code,
+                        "tag_audio_events": "false",
+                        "no_verbatim": "true",
+                        **self._request_data(),
+                    },
+                )
+        except httpx.TimeoutException as e:
+            raise TimeoutError(f"ElevenLabs request timeout after {self.timeout:.0f}s") from e
+        if not response.is_success:
             # ElevenLabs returns 401 for quota exhaustion — surface the real reason
             try:
                 detail = response.json()["detail"]["message"]
             except Exception:
-                detail = response.text[:300] or response.reason
+                detail = response.text[:300] or response.reason_phrase
             raise RuntimeError(f"ElevenLabs API error {response.status_code}: {detail}")
-
-        result = response.json()
-        transcript = self._build_labeled_transcript(result)
-        logger.info(
-            f"ElevenLabs transcription ({type(self).__name__}) completed in "
-            f"{time.time() - start_time:.1f}s ({len(transcript)} chars)"
-        )
-        return transcript
+        return response.json()
 
     def _build_labeled_transcript(self, result: dict) -> str:
         """Group words into per-speaker utterances, interleave by start time."""
         words = [w for w in result.get("words", []) if w.get("type") == "word"]
         if not words:
             return result.get("text", "")
+        # Scribe returns words in time order; sort (stably) only if it didn't
+        if any(b["start"] < a["start"] for a, b in zip(words, words[1:])):
+            words.sort(key=lambda w: w["start"])
 
-        keys_in_order: list = []
-        utterances = []
-        for w in words:
-            key = self._speaker_key(w)
-            if key not in keys_in_order:
-                keys_in_order.append(key)
-
-        for key in keys_in_order:
-            current = None
-            for w in (w for w in words if self._speaker_key(w) == key):
-                if current and w["start"] - current["end"] <= UTTERANCE_GAP_S:
-                    current["text"].append(w["text"])
-                    current["end"] = w["end"]
-                else:
-                    if current:
-                        utterances.append(current)
-                    current = {"key": key, "start": w["start"],
-                               "end": w["end"], "text": [w["text"]]}
-            if current:
-                utterances.append(current)
+        builder = UtteranceBuilder(self._speaker_key)
+        builder.extend(words)
+        utterances = builder.finish()
 
+        keys_in_order = list(builder.keys_in_order)
         names = self._speaker_labels(keys_in_order)
         labels_on = self._labels_enabled(keys_in_order)
-        utterances.sort(key=lambda u: u["start"])
         lines = []
         for u in utterances:
             prefix = names[u["key"]] + ": " if labels_on else ""
@@ -161,11 +293,6 @@ class ElevenLabsDictationTranscriber(_ScribeTranscriberBase):
         super().__init__(timeout=timeout)
         self.language_code = language or 'en'
 
-    def update_language(self, language: str) -> None:
-        """Change the transcription language (ISO-639-1 code, e.g. 'en')."""
-        if language:
-            self.language_code = language
-
     def _request_data(self) -> dict:
         return {"diarize": "false"}
 
@@ -15,7 +15,7 @@ import os
 import queue
 import threading
 import time
-from typing import Optional
+from typing import Callable, Optional
 
 import numpy as np
 
@@ -55,7 +55,8 @@ class RealtimeDictationSession:
 
     def __init__(self, model: str = "gpt-4o-transcribe", language: str = "en",
                  noise_reduction: Optional[str] = None,
-                 turn_detection: Optional[dict] = None):
+                 turn_detection: Optional[dict] = None,
+                 on_segment: Optional[Callable[[str], None]] = None):
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise StreamingSessionError("OPENAI_API_KEY not set")
@@ -64,6 +65,9 @@ class RealtimeDictationSession:
         self.language = language
         self.noise_reduction = noise_reduction
         self.turn_detection = turn_detection or self.DEFAULT_TURN_DETECTION
+        # Called on the reader thread with each completed turn's transcript
+        # (e.g. to clean it while the user keeps talking); must not block
+        self.on_segment = on_segment
 
         self._ws = None
         self._send_queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=600)
@@ -270,6 +274,11 @@ class RealtimeDictationSession:
             if transcript:
                 with self._segments_lock:
                     self._segments.append(transcript)
+                if self.on_segment is not None:
+                    try:
+                        self.on_segment(transcript)
+                    except Exception as e:
+                        logger.warning(f"Segment callback failed: {e}")
         elif etype == "conversation.item.input_audio_transcription.failed":
             # Count it so finish() doesn't wait forever on a failed turn
             self._items_finished += 1
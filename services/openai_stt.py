@@ -1,4 +1,5 @@
 """OpenAI Speech-to-Text Service Implementation"""
+import asyncio
 import os
 import logging
 from typing import Union, Optional
@@ -6,9 +7,12 @@ from pathlib import Path
 import io
 import soundfile as sf
 import numpy as np
-from openai import OpenAI
+from openai import APITimeoutError, AsyncOpenAI
 import httpx
 
+from services import async_core, tracing
+from services.transcription_options import DEFAULT_OPTIONS, TranscriptionOptions
+
 logger = logging.getLogger('voice_typing')
 
 # NOTE: Temp workaround for OpenAI bug where transcription cuts off.
@@ -69,7 +73,8 @@ class OpenAITranscriber:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
 
-        self.client = OpenAI(
+        # Async client: requests run on the shared event loop (async_core)
+        self.client = AsyncOpenAI(
             api_key=api_key,
             # Configure timeout: 60s total timeout, 10s connect timeout
             timeout=httpx.Timeout(60.0, connect=10.0)
@@ -77,12 +82,34 @@ class OpenAITranscriber:
         self.model = model
         self.language = language
 
-    def transcribe(self, audio_data: Union[bytes, str, Path]) -> str:
+    def warm(self) -> None:
+        """Open a pooled connection to the API ahead of the first transcription.
+
+        A model lookup is the cheapest authenticated request; it also
+        surfaces a bad key before the user dictates.
+        """
+        async_core.run_sync(
+            self.client.with_options(timeout=10.0, max_retries=0).models.retrieve(self.model))
+
+    def close(self) -> None:
+        """Release the HTTP client's connection pool."""
+        async_core.close_soon(self.client.close)
+
+    def transcribe(self, audio_data: Union[bytes, str, Path],
+                   options: TranscriptionOptions = DEFAULT_OPTIONS,
+                   cancelled: async_core.CancelCheck = None) -> str:
+        """Blocking wrapper around transcribe_async (see async_core.run_sync)."""
+        return async_core.run_sync(self.transcribe_async(audio_data, options), cancelled)
+
+    async def transcribe_async(self, audio_data: Union[bytes, str, Path],
+                               options: TranscriptionOptions = DEFAULT_OPTIONS) -> str:
         """
         Transcribe audio using OpenAI's API
 
         Args:
             audio_data: Either raw audio bytes, file path as string, or Path object
+            options: Per-call language/model/prompt overrides (the instance
+                is shared, so these are never stored on it)
 
         Returns:
             Transcribed text
@@ -94,24 +121,29 @@ class OpenAITranscriber:
             if isinstance(audio_data, (str, Path)) and not Path(audio_data).exists():
                 raise FileNotFoundError(f"Audio file not found: {audio_data}")
 
+            model = options.model or self.model
             # Pad gpt-4o models as a truncation workaround; whisper needs no padding
-            pad_duration = PADDING_DURATION_S if "gpt-4o" in self.model else 0.0
+            pad_duration = PADDING_DURATION_S if "gpt-4o" in model else 0.0
             if pad_duration:
-                logger.debug(f"Padding audio with {pad_duration}s of quiet noise for {self.model}")
-
-            file_to_send = _prepare_upload(audio_data, pad_duration)
-
-            response = self.client.audio.transcriptions.create(
-                model=self.model,
-                file=file_to_send,
-                language=self.language
-            )
+                logger.debug(f"Padding audio with {pad_duration}s of quiet noise for {model}")
+
+            # Decoding, padding and FLAC encoding stay off the event loop
+            with tracing.span('encode'):
+                file_to_send = await asyncio.to_thread(_prepare_upload, audio_data, pad_duration)
+
+            extra = {"prompt": options.prompt} if options.prompt else {}
+            try:
+                with tracing.span('upload'):
+                    response = await self.client.audio.transcriptions.create(
+                        model=model,
+                        file=file_to_send,
+                        language=options.language or self.language,
+                        **extra
+                    )
+            except APITimeoutError as e:
+                raise TimeoutError("OpenAI transcription request timeout") from e
             return response.text
 
         except Exception as e:
             logger.error(f"OpenAI transcription failed: {e}", exc_info=True)
             raise
-
-    def update_language(self, language: str) -> None:
-        """Update the language used for transcription"""
-        self.language = language
@@ -0,0 +1,145 @@
+"""Span-based latency tracing for the transcription pipeline.
+
+A Trace collects named spans (start offset and duration in ms) from every
+stage of one unit of work, across threads. Code deep in the pipeline
+doesn't need the trace passed to it:
+
+    with tracing.span('upload'):
+        ...
+
+times against whichever trace is active (a no-op if none). Activation is a
+ContextVar, so it follows the work onto the shared event loop (asyncio
+copies the caller's context into the task) and into asyncio.to_thread, but
+not into unrelated threads. Storing and summarizing finished traces is up
+to the caller (see modules/metrics.py).
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('voice_typing')
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    'voice_typing_trace', default=None)
+
+
+class Trace:
+    """Spans of one unit of work. Thread-safe: stages run on several threads."""
+
+    def __init__(self, kind: str = 'dictation') -> None:
+        self.kind = kind
+        self.started_at = datetime.now()
+        self._t0 = time.perf_counter()
+        self._stopped: Optional[float] = None
+        self._lock = threading.Lock()
+        self.spans: List[dict] = []
+        self.attrs: dict = {}
+        self._holds = 0
+        self._outcome: Optional[str] = None
+        self._on_record: Optional[Callable[[dict], None]] = None
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start)
+
+    def add(self, name: str, start: float, end: Optional[float] = None) -> None:
+        """Record a span from perf_counter() timestamps (end defaults to now)."""
+        end = time.perf_counter() if end is None else end
+        with self._lock:
+            self.spans.append({'name': name, 'at_ms': round((start - self._t0) * 1000, 1),
+                               'ms': round((end - start) * 1000, 1)})
+
+    def mark_stopped(self) -> None:
+        """Measure total_ms from now (e.g. the user pressed stop) instead of
+        from when the trace was created."""
+        self._stopped = time.perf_counter()
+
+    def set(self, **attrs) -> None:
+        with self._lock:
+            self.attrs.update(attrs)
+
+    @contextmanager
+    def activate(self):
+        """Make this the trace that tracing.span() records to in this context."""
+        reset = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(reset)
+
+    def hold(self) -> None:
+        """Keep the trace open for a stage that completes on another thread
+        (the paste runs on the Tk thread after the pipeline returns)."""
+        with self._lock:
+            self._holds += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._holds -= 1
+            ready = self._holds == 0 and self._outcome is not None
+        if ready:
+            self._write()
+
+    def finish(self, outcome: str, on_record: Optional[Callable[[dict], None]] = None) -> None:
+        """Pass the finished record to on_record once any held stages complete."""
+        with self._lock:
+            if self._outcome is not None:
+                return
+            self._outcome = outcome
+            self._on_record = on_record
+            ready = self._holds == 0
+        if ready:
+            self._write()
+
+    def to_record(self) -> dict:
+        end = time.perf_counter()
+        since = self._stopped if self._stopped is not None else self._t0
+        with self._lock:
+            return {
+                'timestamp': self.started_at.isoformat(timespec='milliseconds'),
+                'kind': self.kind,
+                'outcome': self._outcome,
+                'total_ms': round((end - since) * 1000, 1),
+                **self.attrs,
+                'spans': sorted(self.spans, key=lambda item: item['at_ms']),
+            }
+
+    def _write(self) -> None:
+        record = self.to_record()
+        stages = ', '.join(f"{name} {ms:.0f}" for name, ms in stage_totals(record).items())
+        logger.debug(f"Latency ({record['outcome']}, {record['total_ms']:.0f} ms after stop): {stages}")
+        if self._on_record is not None:
+            self._on_record(record)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+def annotate(**attrs) -> None:
+    """Attach fields (provider, text length...) to the active trace, if any."""
+    trace = _current.get()
+    if trace is not None:
+        trace.set(**attrs)
+
+
+def span(name: str):
+    """Time a block against the active trace, if any."""
+    trace = _current.get()
+    return trace.span(name) if trace is not None else nullcontext()
+
+
+def stage_totals(record: dict) -> Dict[str, float]:
+    """Milliseconds per stage name in one record (repeated spans summed)."""
+    totals: Dict[str, float] = {}
+    for item in record.get('spans', ()):
+        totals[item['name']] = totals.get(item['name'], 0.0) + item['ms']
+    return totals
@@ -0,0 +1,19 @@
+"""Per-request transcription options shared by the STT providers."""
+from typing import NamedTuple, Optional
+
+
+class TranscriptionOptions(NamedTuple):
+    """Immutable overrides for a single transcribe() call.
+
+    Transcriber instances are cached and shared by concurrent callers (chunk
+    queue workers, retries, the main dictation path), so anything that varies
+    per request travels with the request instead of being set on the shared
+    instance. None means "use the transcriber's configured default".
+    """
+    language: Optional[str] = None
+    model: Optional[str] = None
+    # Context/vocabulary hint; used by providers whose API accepts one
+    prompt: Optional[str] = None
+
+
+DEFAULT_OPTIONS = TranscriptionOptions()
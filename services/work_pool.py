@@ -0,0 +1,108 @@
+"""Shared worker pool for transcription jobs, with priority for dictation.
+
+Background work (local HTTP server requests, re-transcribing the audio
+archive) runs on one bounded pool of worker threads. Jobs start in priority
+order, FIFO within a priority, and dictation always wins:
+
+- one worker is reserved for INTERACTIVE jobs, so an interactive job never
+  waits behind a full pool of background ones;
+- while any interactive work is running (including the app's own dictation
+  pipeline, which marks itself with interactive()), queued background jobs
+  are held back. Jobs already running are not interrupted.
+"""
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+logger = logging.getLogger('voice_typing')
+
+INTERACTIVE, BACKGROUND = 0, 1
+DEFAULT_WORKERS = 4
+
+_pool: Optional["WorkPool"] = None
+_lock = threading.Lock()
+
+
+class WorkPool:
+    """Priority-ordered thread pool; see the module docstring for the rules."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS) -> None:
+        # At least one background slot next to the reserved interactive one
+        self.workers = max(2, workers)
+        self._cond = threading.Condition()
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._interactive = 0  # interactive jobs running + interactive() scopes
+        self._background_running = 0
+        self._threads = [threading.Thread(target=self._work, name=f'work-pool-{i}', daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable, *args, priority: int = BACKGROUND,
+               **kwargs) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._cond:
+            heapq.heappush(self._heap, (priority, next(self._seq), future, fn, args, kwargs))
+            self._cond.notify_all()
+        return future
+
+    @contextmanager
+    def interactive(self):
+        """Hold back queued background jobs while the block runs."""
+        with self._cond:
+            self._interactive += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._interactive -= 1
+                self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _runnable(self) -> bool:
+        if not self._heap:
+            return False
+        if self._heap[0][0] == INTERACTIVE:
+            return True
+        return self._interactive == 0 and self._background_running < self.workers - 1
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._runnable():
+                    self._cond.wait()
+                priority, _, future, fn, args, kwargs = heapq.heappop(self._heap)
+                if priority == INTERACTIVE:
+                    self._interactive += 1
+                else:
+                    self._background_running += 1
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    if priority == INTERACTIVE:
+                        self._interactive -= 1
+                    else:
+                        self._background_running -= 1
+                    self._cond.notify_all()
+
+
+def get_pool() -> WorkPool:
+    """The process-wide pool (created on first use)."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = WorkPool()
+        return _pool
@@ -0,0 +1,164 @@
+"""Audio callback benchmark: what the recorder does per block of audio.
+
+Builds a real AudioRecorder (modules/recorder.py) writing to a temporary
+WAV file, with sounddevice replaced by a stand-in stream that hands over
+the callback instead of opening a device. The callback is then driven
+directly with synthetic blocks - speech-level noise with regular pauses -
+and each call is timed, so the numbers cover level metering, silence
+detection, the max-duration check, the session flush policy (--session)
+and the file write, but not the audio driver. The script only uses the
+recorder's public start()/stop(), so it runs unchanged against older
+revisions for before/after comparisons.
+
+Also times the per-block settings and clock reads on their own: the old
+dict lookups and time.time() calls against the per-recording settings
+snapshot. Fails if the p99 callback time exceeds --budget-us. Run from
+the repo root:
+
+    python tests/bench_audio_callback.py [--blocks 20000] [--block-frames 256] [--session]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import types
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_BUDGET_US = 500.0
+SPEECH_BLOCKS, PAUSE_BLOCKS = 150, 30
+
+
+def install_stream_stub() -> dict:
+    """Replace sounddevice with a stream that captures the callback."""
+    captured: dict = {}
+    ready = threading.Event()
+
+    class InputStream:
+        def __init__(self, callback=None, **kwargs):
+            captured['callback'] = callback
+            ready.set()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def close(self):
+            pass
+
+    sd = types.ModuleType('sounddevice')
+    sd.InputStream = InputStream
+    sd.CallbackStop = type('CallbackStop', (Exception,), {})
+    sd.sleep = lambda ms: time.sleep(ms / 1000)
+    sys.modules['sounddevice'] = sd
+    captured['ready'] = ready
+    return captured
+
+
+def make_blocks(frames: int, count: int) -> list:
+    """Speech-level noise with a pause every SPEECH_BLOCKS blocks."""
+    rng = np.random.default_rng(0)
+    cycle = SPEECH_BLOCKS + PAUSE_BLOCKS
+    blocks = []
+    for i in range(count):
+        amplitude = 0.1 if i % cycle < SPEECH_BLOCKS else 0.001
+        blocks.append((rng.standard_normal((frames, 1)) * amplitude).astype(np.float32))
+    return blocks
+
+
+def time_callback(recorder, captured: dict, blocks: list) -> list:
+    recorder.start()
+    if not captured['ready'].wait(5):
+        sys.exit("FAILED: recorder never opened its input stream")
+    callback = captured['callback']
+    stop = sys.modules['sounddevice'].CallbackStop
+    frames = len(blocks[0])
+    timings = []
+    try:
+        for block in blocks:
+            start = time.perf_counter()
+            try:
+                callback(block, frames, None, 0)
+            except stop:
+                break  # the stream would close here
+            finally:
+                timings.append(time.perf_counter() - start)
+            if not recorder.recording:
+                break
+    finally:
+        recorder.stop()
+    return timings
+
+
+def time_lookups(settings, number: int = 200000) -> tuple:
+    """(legacy, snapshot) seconds per block for the per-block settings/clock reads."""
+    # Before: threshold and max duration from the dict, three clock reads
+    legacy = timeit.timeit(
+        "settings.get('silence_threshold'); settings.get('max_recording_duration');"
+        "time.time(); time.time(); time.time()",
+        globals={'settings': settings, 'time': time}, number=number) / number
+    # After: attributes captured from the snapshot at start(), no clock
+    config = settings.snapshot()
+    holder = types.SimpleNamespace(_threshold=config.silence_threshold, _max_frames=1 << 30)
+    snapshot = timeit.timeit(
+        "holder._threshold; holder._max_frames",
+        globals={'holder': holder}, number=number) / number
+    return legacy, snapshot
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=20000)
+    parser.add_argument('--block-frames', type=int, default=256)
+    parser.add_argument('--session', action='store_true',
+                        help='enable the conversation-session auto-flush policy')
+    parser.add_argument('--budget-us', type=float, default=DEFAULT_BUDGET_US,
+                        help='max p99 callback time in microseconds')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        # Settings (and their file) live under the home folder
+        os.environ['HOME'] = os.environ['USERPROFILE'] = home
+        captured = install_stream_stub()
+        from modules.recorder import AudioRecorder, settings
+
+        recorder = AudioRecorder(filename=str(Path(home) / 'bench.wav'),
+                                 level_callback=lambda level: None, silent_start_timeout=4.0)
+        if args.session:
+            # Long enough that no flush fires mid-run; the policy still runs every block
+            recorder.auto_flush_after = recorder.auto_flush_max = 1e6
+        blocks = make_blocks(args.block_frames, args.blocks)
+        timings = time_callback(recorder, captured, blocks)
+        # Older revisions have no snapshot; only the callback is compared there
+        lookups = time_lookups(settings) if hasattr(settings, 'snapshot') else None
+
+    if len(timings) < len(blocks):
+        sys.exit(f"FAILED: recorder stopped after {len(timings)} of {len(blocks)} blocks")
+    ordered = sorted(timings)
+    median = statistics.median(ordered) * 1e6
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1e6
+    deadline = args.block_frames / recorder.samplerate * 1e6
+    print(f"Callback: median {median:.1f} us, p99 {p99:.1f} us, max {ordered[-1] * 1e6:.1f} us "
+          f"over {len(ordered)} blocks of {args.block_frames} frames "
+          f"(deadline {deadline:.0f} us{', session flush policy' if args.session else ''})")
+    if lookups:
+        legacy, snapshot = lookups
+        print(f"Per-block settings/clock reads: {legacy * 1e9:.0f} ns as dict lookups + time.time(), "
+              f"{snapshot * 1e9:.0f} ns from the snapshot")
+    if p99 > args.budget_us:
+        sys.exit(f"FAILED: p99 callback time over {args.budget_us:.0f} us budget")
+    print("Within budget")
+
+
+if __name__ == "__main__":
+    main()
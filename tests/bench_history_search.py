@@ -0,0 +1,132 @@
+"""History search benchmark on a synthetic history.
+
+Builds a history of --entries dictations (written as a legacy history.json,
+so the import path is timed too) in a temporary directory, then times each
+kind of TranscriptionHistory.search() query: word prefixes, substrings,
+FTS syntax, date ranges and deep pages. Every query's median must stay
+under --budget milliseconds. Run from the repo root:
+
+    python tests/bench_history_search.py [--entries 100000] [--budget 50]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.history import TranscriptionHistory
+
+DEFAULT_ENTRIES = 100_000
+DEFAULT_BUDGET_MS = 50.0
+REPEATS = 7
+
+# Frequent words dominate dictation; the tail gives rare matches
+COMMON_WORDS = ("the and to of a in that is it for you with on this we be have "
+                "are not so just can will about what if meeting email send "
+                "report team project update call review tomorrow thanks please").split()
+# One in NEEDLE_EVERY entries carries a rare phrase
+NEEDLE = "quarterly budget reconciliation"
+NEEDLE_EVERY = 5000
+
+
+def synthetic_entries(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    tail = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10)))
+            for _ in range(5000)]
+    start = datetime.now() - timedelta(days=730)
+    step = timedelta(days=730) / count
+    entries = []
+    for i in range(count):
+        words = [rng.choice(COMMON_WORDS) if rng.random() < 0.7 else rng.choice(tail)
+                 for _ in range(rng.randint(5, 60))]
+        if i % NEEDLE_EVERY == 0:
+            words[len(words) // 2:len(words) // 2] = NEEDLE.split()
+        text = ' '.join(words).capitalize() + '.'
+        entries.append({'text': text, 'timestamp': (start + step * i).isoformat(timespec='seconds')})
+    return entries
+
+
+def deep_page(history: TranscriptionHistory, pages: int = 50) -> dict:
+    """Follow before_id through `pages` pages; time only the last one."""
+    before_id = None
+    for _ in range(pages - 1):
+        results = history.search('team', before_id=before_id)
+        before_id = results[-1]['id']
+    return {'query': 'team', 'before_id': before_id}
+
+
+def queries(history: TranscriptionHistory) -> list:
+    now = datetime.now()
+    return [
+        ("recent page (no query)", {}),
+        ("prefix, common word", {'query': 'meet'}),
+        ("prefix, two words", {'query': 'send rep'}),
+        ("prefix, rare phrase", {'query': 'quarterly budg'}),
+        ("prefix, no match", {'query': 'zzqxv'}),
+        ("substring, common", {'query': 'ing th', 'mode': 'substring'}),
+        ("substring, rare", {'query': 'reconcil', 'mode': 'substring'}),
+        ("substring, 2 chars", {'query': 'qz', 'mode': 'substring'}),
+        ("fts phrase", {'query': '"budget reconciliation"', 'mode': 'fts'}),
+        ("fts OR/NOT", {'query': 'email OR call NOT tomorrow', 'mode': 'fts'}),
+        ("last 7 days + prefix", {'query': 'proj', 'since': now - timedelta(days=7)}),
+        ("one old month, no query", {'since': now - timedelta(days=400),
+                                     'until': now - timedelta(days=370)}),
+        ("old 10 days + prefix", {'query': 'meet', 'since': now - timedelta(days=700),
+                                  'until': now - timedelta(days=690)}),
+        ("old 10 days + substring", {'query': 'ing th', 'mode': 'substring',
+                                     'since': now - timedelta(days=700),
+                                     'until': now - timedelta(days=690)}),
+        ("page 50 (keyset)", deep_page(history)),
+    ]
+
+
+def time_query(history: TranscriptionHistory, kwargs: dict) -> tuple:
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        results = history.search(**kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples), len(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=DEFAULT_ENTRIES)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help='median milliseconds per query (default %(default)s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'history.db'
+        legacy = db_path.with_name('history.json')
+        legacy.write_text(json.dumps(synthetic_entries(args.entries)), encoding='utf-8')
+
+        start = time.perf_counter()
+        history = TranscriptionHistory(path=db_path)
+        print(f"Imported {args.entries:,} entries in {time.perf_counter() - start:.1f}s "
+              f"(FTS5: {history.has_fts}, trigram: {history.has_trigram}, "
+              f"{db_path.stat().st_size / 1e6:.0f} MB)\n")
+
+        failures = []
+        print(f"{'query':28} {'median':>9} {'max':>9} {'rows':>5}")
+        for label, kwargs in queries(history):
+            median_ms, max_ms, rows = time_query(history, kwargs)
+            flag = '' if median_ms <= args.budget else '  OVER BUDGET'
+            print(f"{label:28} {median_ms:7.2f}ms {max_ms:7.2f}ms {rows:5}{flag}")
+            if flag:
+                failures.append(label)
+        history.close()
+
+    if failures:
+        sys.exit(f"BUDGET EXCEEDED ({args.budget:.0f} ms): {', '.join(failures)}")
+    print(f"\nAll queries within {args.budget:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark the Scribe labeled-transcript builder on long conversations.
+
+Builds synthetic Scribe responses (50k words, two-channel meeting and
+multi-speaker diarized) and compares the single-pass UtteranceBuilder
+against the previous per-speaker rescan, checking both produce identical
+output. Run from the repo root:
+
+    python tests/bench_labeled_transcript.py
+"""
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench-key")
+
+from services.elevenlabs_stt import (UTTERANCE_GAP_S,
+                                     ElevenLabsDiarizedTranscriber,
+                                     ElevenLabsMeetingTranscriber,
+                                     UtteranceBuilder)
+
+
+def reference_build(transcriber, result: dict) -> str:
+    """The previous O(words x speakers) algorithm, kept as the oracle."""
+    words = [w for w in result.get("words", []) if w.get("type") == "word"]
+    if not words:
+        return result.get("text", "")
+
+    keys_in_order: list = []
+    utterances = []
+    for w in words:
+        key = transcriber._speaker_key(w)
+        if key not in keys_in_order:
+            keys_in_order.append(key)
+
+    for key in keys_in_order:
+        current = None
+        for w in (w for w in words if transcriber._speaker_key(w) == key):
+            if current and w["start"] - current["end"] <= UTTERANCE_GAP_S:
+                current["text"].append(w["text"])
+                current["end"] = w["end"]
+            else:
+                if current:
+                    utterances.append(current)
+                current = {"key": key, "start": w["start"],
+                           "end": w["end"], "text": [w["text"]]}
+        if current:
+            utterances.append(current)
+
+    names = transcriber._speaker_labels(keys_in_order)
+    labels_on = transcriber._labels_enabled(keys_in_order)
+    utterances.sort(key=lambda u: u["start"])
+    return "\n".join((names[u["key"]] + ": " if labels_on else "") +
+                     " ".join(u["text"]) for u in utterances)
+
+
+def synthetic_response(num_words: int, speakers: list, field: str,
+                       seed: int = 0) -> dict:
+    """Turn-taking conversation with occasional overlap and long pauses."""
+    rng = random.Random(seed)
+    words = []
+    t = 0.0
+    speaker = speakers[0]
+    for i in range(num_words):
+        if rng.random() < 0.08:
+            speaker = rng.choice(speakers)
+        if rng.random() < 0.02:
+            t += rng.uniform(1.0, 4.0)  # pause that may split an utterance
+        duration = rng.uniform(0.15, 0.6)
+        words.append({"text": f"w{i}", "type": "word", "start": round(t, 3),
+                      "end": round(t + duration, 3), field: speaker})
+        if rng.random() < 0.05:
+            words.append({"text": " ", "type": "spacing", "start": round(t, 3),
+                          "end": round(t + duration, 3), field: speaker})
+        # Slight negative gaps let the other side talk over the end of a word
+        t += duration + rng.uniform(-0.1, 0.25)
+        t = max(t, words[-1]["start"])
+    return {"text": "", "words": words}
+
+
+def bench(label: str, transcriber, result: dict, repeats: int = 3) -> None:
+    def best(fn):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            out = fn()
+            times.append(time.perf_counter() - start)
+        return min(times), out
+
+    old_s, old_text = best(lambda: reference_build(transcriber, result))
+    new_s, new_text = best(lambda: transcriber._build_labeled_transcript(result))
+    assert new_text == old_text, f"{label}: output differs from reference"
+    print(f"{label:<28} previous {old_s * 1000:8.1f} ms   "
+          f"single-pass {new_s * 1000:8.1f} ms   "
+          f"({old_s / new_s:4.1f}x, {new_text.count(chr(10)) + 1} lines)")
+
+
+def main() -> None:
+    num_words = 50_000
+    meeting = ElevenLabsMeetingTranscriber()
+    bench("meeting, 2 channels", meeting,
+          synthetic_response(num_words, [0, 1], "channel_index"))
+
+    for count in (2, 6, 12):
+        diarized = ElevenLabsDiarizedTranscriber(labeled=True)
+        speakers = [f"speaker_{i}" for i in range(count)]
+        bench(f"diarized, {count} speakers", diarized,
+              synthetic_response(num_words, speakers, "speaker_id", seed=count))
+
+    # Incremental use: ready lines come out in start order as words arrive
+    result = synthetic_response(num_words, [0, 1], "channel_index", seed=1)
+    builder = UtteranceBuilder(meeting._speaker_key)
+    emitted = []
+    for w in result["words"]:
+        if w["type"] == "word":
+            builder.add(w)
+            emitted.extend(builder.pop_ready())
+    emitted.extend(builder.finish())
+    starts = [(u["start"], u["rank"]) for u in emitted]
+    assert starts == sorted(starts), "incremental emission out of order"
+    print(f"incremental emission ordered ({len(emitted)} utterances)")
+
+
+if __name__ == "__main__":
+    main()
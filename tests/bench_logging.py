@@ -0,0 +1,138 @@
+"""Logging latency benchmark: what a log call costs the thread making it.
+
+Sets up the app's logging (modules/logger.py) in a temporary home and makes
+the log file slow: every write stalls for --stall-ms, like a disk busy with
+an antivirus scan. A simulated audio callback thread then logs an overflow
+status warning every block (as modules/recorder.py does while the system
+is overloaded) plus an ordinary record every tenth block, timing each call.
+
+Asserts that the p99 and worst per-call latency stay under --budget-ms
+despite the stalls, that the repeated status warning was rate-limited, and
+that size rotation produced gzipped parts. The same calls against a plain
+synchronous FileHandler are timed for comparison. Run from the repo root:
+
+    python tests/bench_logging.py [--blocks 2000] [--stall-ms 20] [--budget-ms 5]
+"""
+import argparse
+import gzip
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from modules import logger as app_logging  # noqa: E402
+
+BLOCK_INTERVAL_S = 0.001
+
+
+def stall(handler: logging.Handler, seconds: float) -> None:
+    emit = handler.emit
+
+    def slow_emit(record):
+        time.sleep(seconds)
+        emit(record)
+    handler.emit = slow_emit
+
+
+def callback_thread(logger: logging.Logger, blocks: int) -> list:
+    """Log like an overloaded audio callback; returns per-call seconds."""
+    timings = []
+
+    def run():
+        for block in range(blocks):
+            start = time.perf_counter()
+            logger.warning("Audio callback status: input overflow", extra={'rate_limit': 'audio_status'})
+            if block % 10 == 0:
+                logger.info(f"Block {block} written")
+            timings.append(time.perf_counter() - start)
+            time.sleep(BLOCK_INTERVAL_S)
+    thread = threading.Thread(target=run, name='bench-audio-callback')
+    thread.start()
+    thread.join()
+    return timings
+
+
+def summarize(label: str, timings: list) -> tuple:
+    ordered = sorted(timings)
+    p99 = ordered[int(len(ordered) * 0.99) - 1] * 1000
+    worst = ordered[-1] * 1000
+    print(f"{label:>12}: median {statistics.median(ordered) * 1000:.3f} ms, "
+          f"p99 {p99:.3f} ms, max {worst:.3f} ms over {len(ordered)} blocks")
+    return p99, worst
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=2000)
+    parser.add_argument('--stall-ms', type=float, default=20.0, help='delay added to every log file write')
+    parser.add_argument('--budget-ms', type=float, default=5.0, help='max p99 and worst-case call latency')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = os.environ['USERPROFILE'] = home
+        # Small enough that the run rolls over a few times (~70 bytes per line),
+        # few enough parts that none is deleted
+        rollover_mb = max(args.blocks // 10, 30) * 70 / 3 / 2**20
+        settings = {'log_retention_days': None, 'log_max_mb': rollover_mb}
+        # Keep the app's console output out of the report
+        console, sys.stdout = sys.stdout, open(os.devnull, 'w', encoding='utf-8')
+        try:
+            logger = app_logging.setup_logging(settings)
+        finally:
+            sys.stdout = console
+        file_handler = app_logging._listener.handlers[0]
+        stall(file_handler, args.stall_ms / 1000)
+
+        run_start = time.monotonic()
+        queued = callback_thread(logger, args.blocks)
+        run_s = time.monotonic() - run_start
+        drain_start = time.perf_counter()
+        app_logging.stop_logging()
+        drain_s = time.perf_counter() - drain_start
+
+        # Baseline: the same calls written synchronously by the calling thread
+        sync_logger = logging.getLogger('bench_sync')
+        sync_logger.propagate = False
+        sync_handler = logging.FileHandler(Path(home) / 'sync.log', encoding='utf-8')
+        stall(sync_handler, args.stall_ms / 1000)
+        sync_logger.addHandler(sync_handler)
+        synchronous = callback_thread(sync_logger, max(20, args.blocks // 20))
+        sync_handler.close()
+
+        log_dir = app_logging.get_log_dir()
+        parts = sorted(log_dir.glob('voice_typing_*.log.*.gz'))
+        text = ''.join(gzip.open(part, 'rt', encoding='utf-8').read() for part in parts)
+        text += ''.join(path.read_text(encoding='utf-8') for path in log_dir.glob('voice_typing_*.log'))
+
+    print(f"Log writes stalled {args.stall_ms:.0f} ms each; queue drained in {drain_s:.2f}s at exit")
+    p99, worst = summarize('queued', queued)
+    summarize('synchronous', synchronous)
+
+    status_lines = text.count("Audio callback status")
+    allowed = 1 + int(run_s // app_logging.RATE_LIMIT_INTERVAL_S)
+    print(f"Status warnings logged: {status_lines} of {args.blocks} (rate limit allows {allowed}); "
+          f"rotated parts: {len(parts)}")
+
+    failures = []
+    if p99 > args.budget_ms or worst > args.budget_ms:
+        failures.append(f"callback latency over {args.budget_ms} ms budget")
+    if not 1 <= status_lines <= allowed:
+        failures.append("repeated status warnings were not rate-limited")
+    if not parts:
+        failures.append("size rotation produced no gzipped parts")
+    if text.count("Block ") != (args.blocks + 9) // 10:
+        failures.append("ordinary records were lost")
+    if failures:
+        sys.exit("FAILED: " + "; ".join(failures))
+    print("Within budget")
+
+
+if __name__ == "__main__":
+    main()
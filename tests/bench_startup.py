@@ -0,0 +1,215 @@
+"""Cold-start benchmark: time from launch to a constructed VoiceTypingApp.
+
+Each run starts a fresh interpreter and builds the app headless: Tk, the
+keyboard hook, the tray icon and the audio backend are replaced by inert
+stand-ins, so only our own startup work and real imports are measured. The
+first run also records `python -X importtime` and prints the slowest
+top-level imports.
+
+Enforces an import budget: the modules in DEFERRED_MODULES are only needed
+once dictation starts (they are lazy-loaded or pre-loaded by the background
+warm-up) and must not be imported before the app is ready; the median
+ready time must stay under --budget seconds. Run from the repo root:
+
+    python tests/bench_startup.py [--runs 5] [--budget 1.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Stubbed so a run doesn't open windows, hook the keyboard or need audio hardware
+HEADLESS_BACKENDS = ('tkinter', 'tkinter.messagebox', 'pynput', 'pynput.keyboard',
+                     'pystray', 'sounddevice')
+
+# Not needed before the first caps-lock press
+DEFERRED_MODULES = ('pyautogui', 'litellm', 'openai', 'websocket')
+
+DEFAULT_BUDGET_S = 1.5
+
+# Marks the child's result line among the app's console logging
+RESULT_PREFIX = 'BENCH_RESULT '
+
+
+class _Anything:
+    """Inert stand-in for GUI/audio objects: any attribute, call or arithmetic works."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __mro_entries__(self, bases):
+        return (_Anything,)
+
+    def __getitem__(self, key):
+        return _Anything()
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+    def __int__(self):
+        return 0
+
+    __index__ = __int__
+
+    def __float__(self):
+        return 0.0
+
+    def __str__(self):
+        return ''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _zero(self, *args):
+        return 0
+
+    __add__ = __radd__ = __sub__ = __rsub__ = __mul__ = __rmul__ = _zero
+    __truediv__ = __rtruediv__ = __floordiv__ = __rfloordiv__ = __mod__ = _zero
+    __lt__ = __le__ = __gt__ = __ge__ = lambda self, other: False
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name.endswith('Error'):
+            error = type(name, (Exception,), {})
+            setattr(self, name, error)
+            return error
+        return _Anything()
+
+
+_MICROPHONE = {'index': 0, 'name': 'Bench Microphone', 'max_input_channels': 1,
+               'hostapi': 0, 'default_samplerate': 48000.0}
+
+
+def _query_devices(device=None, kind=None):
+    return [_MICROPHONE] if device is None and kind is None else _MICROPHONE
+
+
+def child() -> None:
+    """One headless cold start; prints timings as JSON."""
+    start = time.perf_counter()
+    for name in HEADLESS_BACKENDS:
+        module = _StubModule(name)
+        module.__path__ = []
+        sys.modules[name] = module
+        parent, _, attr = name.rpartition('.')
+        if parent:
+            setattr(sys.modules[parent], attr, module)
+    # One fake microphone, so device setup runs its normal path
+    sounddevice = sys.modules['sounddevice']
+    sounddevice.query_devices = _query_devices
+    sounddevice.default = types.SimpleNamespace(device=[0, 0])
+
+    sys.path.insert(0, str(REPO_ROOT))
+    os.chdir(REPO_ROOT)
+
+    import runpy
+    namespace = runpy.run_path(str(REPO_ROOT / 'voice_typing.pyw'), run_name='bench_startup')
+    imported = time.perf_counter()
+    namespace['VoiceTypingApp']()
+    ready = time.perf_counter()
+
+    result = RESULT_PREFIX + json.dumps({
+        'imports_s': imported - start,
+        'ready_s': ready - start,
+        'deferred_loaded': [m for m in DEFERRED_MODULES if m in sys.modules],
+    })
+    # One write on the binary buffer the console log handler also writes
+    # to, so a log line from an app thread can't land inside the result
+    sys.stdout.flush()
+    sys.stdout.buffer.write((result + '\n').encode('utf-8'))
+    sys.stdout.buffer.flush()
+    os._exit(0)  # skip joining the app's daemon threads
+
+
+def run_child(home: str, importtime: bool = False) -> tuple:
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += [__file__, '--child']
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=REPO_ROOT)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+    if proc.returncode != 0 or not lines:
+        sys.exit(f"Headless start failed:\n{proc.stdout}\n{proc.stderr[-3000:]}")
+    return json.loads(lines[-1][len(RESULT_PREFIX):]), proc.stderr
+
+
+def import_breakdown(stderr: str, top: int = 15) -> list:
+    """(module, cumulative seconds) for the slowest top-level imports."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            continue  # imported by another module; counted in its parent
+        entries.append((name.strip(), int(cumulative) / 1e6))
+    entries.sort(key=lambda e: e[1], reverse=True)
+    return entries[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_S,
+                        help='median seconds to ready (default %(default)s)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    with tempfile.TemporaryDirectory() as home:
+        # First start creates the settings/history files; time the steady state
+        run_child(home)
+        _, importtime = run_child(home, importtime=True)
+        results = [run_child(home)[0] for _ in range(args.runs)]
+
+    print("Slowest top-level imports (first run, -X importtime):")
+    for name, seconds in import_breakdown(importtime):
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    imports_s = statistics.median(r['imports_s'] for r in results)
+    ready_s = statistics.median(r['ready_s'] for r in results)
+    print(f"\nMedian of {args.runs} runs: imports {imports_s * 1000:.0f} ms, "
+          f"ready {ready_s * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+
+    failures = []
+    loaded = sorted({m for r in results for m in r['deferred_loaded']})
+    if loaded:
+        failures.append(f"imported before ready: {', '.join(loaded)}")
+    if ready_s > args.budget:
+        failures.append(f"ready took {ready_s:.2f}s, budget {args.budget:.2f}s")
+    if failures:
+        sys.exit("BUDGET EXCEEDED: " + "; ".join(failures))
+    print("Within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Check that a conversation-session auto flush fires once per chunk.
+
+Drives the app's real recorder watchdog (_check_recorder_status) and
+_flush_chunk against a stand-in recorder, headless (GUI and audio backends
+stubbed as in bench_startup.py), through the race the flags must survive:
+
+1. the watchdog starts a flush while _toggle_lock is busy, and the next
+   tick arrives before the flush has stopped the recording (flush_due is
+   still raised, as audio blocks keep arriving) - it must not start a
+   second flush that would cut the restarted chunk short;
+2. a caps-lock flush takes the lock ahead of a pending auto flush - the
+   auto flush must then leave the fresh chunk alone.
+
+Run from the repo root:
+
+    python tests/check_auto_flush.py
+"""
+import os
+import runpy
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+TIMEOUT_S = 5.0
+
+
+class FakeRecorder:
+    """The recorder surface the watchdog and _flush_chunk use."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename  # never written, so no chunk is queued
+        self.error = None
+        self.flush_due = False
+        self.max_duration_reached = False
+        self.continuation_chunk = False
+        self.stops = self.starts = 0
+
+    def was_auto_stopped(self) -> bool:
+        return False
+
+    def stop(self) -> None:
+        self.stops += 1
+
+    def start(self) -> None:
+        self.starts += 1
+        self.flush_due = False
+        self.max_duration_reached = False
+
+
+class Root:
+    def after(self, ms, fn) -> None:
+        pass  # ticks are driven by hand
+
+
+def load_app_class():
+    import bench_startup
+    for name in bench_startup.HEADLESS_BACKENDS:
+        module = bench_startup._StubModule(name)
+        module.__path__ = []
+        sys.modules[name] = module
+        parent, _, attr = name.rpartition('.')
+        if parent:
+            setattr(sys.modules[parent], attr, module)
+    sys.modules['sounddevice'].query_devices = bench_startup._query_devices
+    namespace = runpy.run_path(str(REPO_ROOT / 'voice_typing.pyw'), run_name='check_auto_flush')
+    return namespace['VoiceTypingApp']
+
+
+def make_app(app_class, home: str):
+    import logging
+    from types import SimpleNamespace
+
+    class App:
+        _check_recorder_status = app_class._check_recorder_status
+        _flush_chunk = app_class._flush_chunk
+        _start_auto_flush = app_class._start_auto_flush
+
+        def _record_audio_health(self) -> None:
+            pass
+
+        def _check_audio_health(self) -> None:
+            pass
+
+    app = App()
+    app.logger = logging.getLogger('voice_typing')
+    app.recorder = FakeRecorder(os.path.join(home, 'missing.wav'))
+    app.recording = True
+    app._session_active = True
+    app._toggle_lock = threading.RLock()
+    app._flush_in_flight = False
+    app._recording_generation = 0
+    app._watchdog_token = 1
+    app._active_recording_status = 'recording'
+    app.status_manager = SimpleNamespace(current_status='recording')
+    app.ui_feedback = SimpleNamespace(root=Root())
+    return app
+
+
+def wait_idle(app) -> None:
+    deadline = time.monotonic() + TIMEOUT_S
+    while app._flush_in_flight:
+        if time.monotonic() > deadline:
+            sys.exit("FAILED: auto flush never finished")
+        time.sleep(0.01)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = os.environ['USERPROFILE'] = home
+        app_class = load_app_class()
+        failures = []
+
+        # 1. Two ticks across one flush that is waiting for the lock
+        app = make_app(app_class, home)
+        app.recorder.flush_due = True
+        with app._toggle_lock:
+            app._check_recorder_status(1)
+            time.sleep(0.05)
+            app._check_recorder_status(1)  # the block that re-raised flush_due
+        wait_idle(app)
+        app._check_recorder_status(1)  # after the restart: nothing due
+        wait_idle(app)
+        if (app.recorder.stops, app.recorder.starts) != (1, 1):
+            failures.append(f"two ticks across one flush: {app.recorder.stops} stops, "
+                            f"{app.recorder.starts} starts (expected 1, 1)")
+
+        # 2. A manual flush gets the lock ahead of a pending auto flush
+        app = make_app(app_class, home)
+        app.recorder.flush_due = True
+        with app._toggle_lock:
+            app._check_recorder_status(1)
+            app._flush_chunk()  # caps lock
+        wait_idle(app)
+        if (app.recorder.stops, app.recorder.starts) != (1, 1):
+            failures.append(f"manual flush first: {app.recorder.stops} stops, "
+                            f"{app.recorder.starts} starts (expected 1, 1)")
+
+        # 3. Max chunk duration rolls over once as well
+        app = make_app(app_class, home)
+        app.recorder.max_duration_reached = True
+        with app._toggle_lock:
+            app._check_recorder_status(1)
+            app._check_recorder_status(1)
+        wait_idle(app)
+        if (app.recorder.stops, app.recorder.starts) != (1, 1):
+            failures.append(f"max duration: {app.recorder.stops} stops, "
+                            f"{app.recorder.starts} starts (expected 1, 1)")
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+    print("Auto flush fired once per chunk in all cases")
+
+
+if __name__ == "__main__":
+    main()
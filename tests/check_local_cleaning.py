@@ -0,0 +1,57 @@
+"""Check the rule-based local cleaner against known dictations.
+
+Each case is either cleaned locally to the expected text, or (expected None)
+must be left for the LLM. Also times the local path. Run from the repo root:
+
+    python tests/check_local_cleaning.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.clean_text import clean_locally
+
+CASES = [
+    ("Um, so I think we should ship it.", "So I think we should ship it."),
+    ("Send the report, uh, tomorrow.", "Send the report tomorrow."),
+    ("Hmm, okay.", "Okay."),
+    ("I want to finish the, um.", "I want to finish the."),
+    ("Wait dot dot dot what?", "Wait... what?"),
+    ("He said, quote, ship it, end quote.", 'He said, "ship it".'),
+    ("His wife is a software, open parenthesis, web development, close parenthesis, "
+     "engineer, and they share an account, dot, dot, dot.",
+     "His wife is a software (web development) engineer, and they share an account..."),
+    ("A time period of two weeks.", "A time period of two weeks."),
+    # Ambiguous or complex: the LLM decides
+    ("His wife is a software, parenthesis, web development, engineer.", None),
+    ("So like how we're logging can we also log the model", None),
+    ("I think the the build is broken.", None),
+    ("Um.", None),
+    ("Okay, so I want to add logging. I'm not sure. Yeah, let's add logging. "
+     "As a feature. Okay.", None),
+    (" ".join(["word"] * 31), None),
+]
+
+
+def main() -> None:
+    failures = 0
+    for text, expected in CASES:
+        got = clean_locally(text)
+        if got != expected:
+            failures += 1
+            print(f"FAIL {text!r}\n     expected {expected!r}\n     got      {got!r}")
+    assert not failures, f"{failures} case(s) failed"
+
+    repeats = 2000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text, _ in CASES:
+            clean_locally(text)
+    per_call = (time.perf_counter() - start) / (repeats * len(CASES))
+    print(f"{len(CASES)} cases OK, {per_call * 1e6:.1f} us per dictation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Concurrency stress test for per-request TranscriptionOptions.
+
+Starts a local stand-in STT server that echoes back the language/model/prompt
+each request carried, then fires many concurrent transcriptions with
+different options through ONE shared transcriber instance per provider.
+Every response must match the options of the request that produced it — a
+transcriber that stored per-call settings on itself would mix them up.
+Run from the repo root:
+
+    python tests/stress_transcription_options.py
+"""
+import email
+import email.policy
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("ELEVENLABS_API_KEY", "stress-key")
+
+import numpy as np
+import soundfile as sf
+
+from services import custom_stt, elevenlabs_stt
+from services.transcription_options import TranscriptionOptions
+
+REQUESTS = 400
+WORKERS = 24
+LANGUAGES = ["en", "de", "fr", "es", "ja", "pt"]
+MODELS = ["model-a", "model-b", "model-c"]
+
+
+def parse_form(handler: BaseHTTPRequestHandler) -> dict:
+    """Text fields of a multipart/form-data request body."""
+    body = handler.rfile.read(int(handler.headers["Content-Length"]))
+    head = f"Content-Type: {handler.headers['Content-Type']}\r\n\r\n".encode()
+    message = email.message_from_bytes(head + body, policy=email.policy.HTTP)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if part.get_filename() is None:
+            fields[name] = part.get_content().strip()
+    return fields
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        fields = parse_form(self)
+        # Jitter so requests overlap and finish out of order
+        time.sleep(random.uniform(0.0, 0.02))
+        if self.path.endswith("speech-to-text"):
+            text = f"{fields.get('language_code')}|{fields.get('model_id')}"
+            self._reply(200, {"text": text, "words": []})
+        elif "model" not in fields:
+            # Like many self-hosted servers: insist on the model field
+            self._reply(422, {"detail": "model required"})
+        else:
+            text = f"{fields['language']}|{fields['model']}|{fields.get('prompt', '')}"
+            self._reply(200, {"text": text})
+
+    def _reply(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class EchoServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default backlog of 5 resets bursts
+
+
+def run(label: str, transcriber, audio_path: str, expect) -> None:
+    rng = random.Random(label)
+    cases = []
+    for i in range(REQUESTS):
+        cases.append(TranscriptionOptions(
+            language=rng.choice(LANGUAGES),
+            model=rng.choice(MODELS),
+            prompt=f"p{i}" if rng.random() < 0.5 else None,
+        ))
+
+    def one(options):
+        return options, transcriber.transcribe(audio_path, options)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        results = list(pool.map(one, cases))
+    elapsed = time.perf_counter() - start
+
+    mismatches = [(o, got) for o, got in results if got != expect(o)]
+    assert not mismatches, f"{label}: {len(mismatches)} responses mixed up, e.g. {mismatches[0]}"
+    print(f"{label:<12} {REQUESTS} concurrent requests OK ({elapsed:.2f}s)")
+
+
+def main() -> None:
+    server = EchoServer(("127.0.0.1", 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = os.path.join(tmp, "tone.wav")
+        t = np.arange(22050) / 22050
+        sf.write(audio_path, 0.1 * np.sin(2 * np.pi * 220 * t), 22050, subtype="PCM_16")
+
+        elevenlabs_stt.ELEVENLABS_STT_URL = f"{base_url}/v1/speech-to-text"
+        scribe = elevenlabs_stt.ElevenLabsDictationTranscriber(language="en")
+        run("elevenlabs", scribe, audio_path,
+            lambda o: f"{o.language}|{o.model}")
+
+        custom = custom_stt.CustomTranscriber(base_url=base_url, model="default")
+        run("custom", custom, audio_path,
+            lambda o: f"{o.language}|{o.model}|{o.prompt or ''}")
+
+        # Defaults still apply when a request brings no options
+        assert scribe.transcribe(audio_path) == "en|scribe_v2"
+        print("defaults     instance settings unchanged")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,33 +8,42 @@ from typing import Any, Callable, Optional, Tuple
 import logging
 from pathlib import Path
 import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 from pynput import keyboard
 import pyperclip
 
+from modules import audio_archive, metrics, recording_info, warmup
 from modules.chunk_queue import ChunkQueue
-from modules.clean_text import clean_transcription
+from modules.clean_text import (CleaningInterrupted, IncrementalCleaner, clean_transcription,
+                               clean_transcription_stream, close_cache)
 from modules.history import TranscriptionHistory
+from modules.history_search import HistorySearchWindow
 from modules.output_providers import initialize_providers
 from modules.recorder import AudioRecorder, DEFAULT_SILENT_START_TIMEOUT
 from modules.settings import Settings, api_key_configured
-from modules.transcribe import transcribe_audio, is_conversation_recording
+from modules.transcribe import (transcribe_audio, transcribe_chunk, is_conversation_recording,
+                               close_transcribers, provider_for)
 from modules.tray import setup_tray_icon
 from modules.ui import UIFeedback
 from modules.audio_manager import set_input_device, get_default_device_id, DeviceIdentifier, find_device_by_identifier
 from modules.status_manager import StatusManager, AppStatus, RECORDING_STATUSES
 from modules.screen_utils import set_process_dpi_awareness, hide_console_window
-from modules.logger import setup_logging
+from modules.logger import setup_logging, stop_logging
 from modules.single_instance import acquire_single_instance_lock, release_single_instance_lock
+from services import async_core, tracing, work_pool
 
 class VoiceTypingApp:
     def __init__(self) -> None:
+        warmup.mark('imports')
         # Initialize settings first
         self.settings = Settings()
 
         # Setup logging
         self.logger = setup_logging(self.settings)
         self.logger.info("Starting Voice Typing application")
+        warmup.mark('settings')
 
         # Windows specific tweaks (DPI awareness & hiding console)
         if os.name == 'nt':
@@ -45,6 +54,7 @@ class VoiceTypingApp:
         # Initialize attributes that will be set later by other modules
         self.update_tray_tooltip: Optional[Callable] = None
         self.update_icon_menu: Optional[Callable] = None
+        self.request_menu_update: Optional[Callable] = None
 
         # Initialize last_recording before tray setup
         self.last_recording: Optional[str] = None
@@ -54,6 +64,7 @@ class VoiceTypingApp:
         ui_size = self.settings.get('ui_indicator_size')
         ui_all_displays = self.settings.get('ui_indicator_all_displays')
         self.ui_feedback = UIFeedback(position=ui_position, size=ui_size, all_displays=ui_all_displays)
+        warmup.mark('ui')
         self.recorder = AudioRecorder(
             level_callback=self.ui_feedback.update_audio_level,
             silent_start_timeout=silent_start_timeout
@@ -68,6 +79,19 @@ class VoiceTypingApp:
         self._session_active = False
         self._chunk_queue: Optional[ChunkQueue] = None
         self._recent_queues: list[ChunkQueue] = []
+        # Set while a watchdog-started chunk flush is pending or running
+        self._flush_in_flight = False
+        # Deletes delivered chunk files in order, off the serialized delivery
+        # path (its thread starts on first use)
+        self._chunk_cleanup = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chunk-cleanup')
+        # Optional FLAC archive of transcribed recordings; its pending files
+        # are sweep-protected too
+        self.audio_archive: Optional[audio_archive.AudioArchive] = None
+        if self.settings.get('audio_archive'):
+            self.audio_archive = self._create_audio_archive()
+        self._retranscribing = False
+        # Optional localhost transcription server, started once the UI is up
+        self._http_server = None
         self._note_hold_until = 0.0
         # Scopes the recorder watchdog to the recording that scheduled it, so
         # a leftover poll from a just-stopped recording can't start a second
@@ -83,7 +107,11 @@ class VoiceTypingApp:
         self.caps_down = False
         self.caps_passthrough = False
         self.clean_transcription_enabled = self.settings.get('clean_transcription')
-        self.history = TranscriptionHistory()
+        self.history = TranscriptionHistory(retention_days=self.settings.get('history_retention_days'))
+        # Created on first use from the tray
+        self._history_search: Optional[HistorySearchWindow] = None
+        # Per-stage latency of each dictation (tray Performance menu, logs\metrics.jsonl)
+        self.metrics = metrics.MetricsRecorder()
 
         # Initialize output providers and show any plugin errors
         plugin_errors = initialize_providers()
@@ -95,9 +123,19 @@ class VoiceTypingApp:
 
         self.processing_thread: Optional[threading.Thread] = None
         self.cancel_flag = threading.Event()
+        # Aborts the current processing run's network requests (STT upload,
+        # LLM cleaning); replaced per generation by process_audio
+        self._request_token = async_core.CancelToken()
         # Live streaming-transcription session for the current recording
         # (normal dictation mode with streaming_dictation enabled)
         self._streaming_session = None
+        # Cleans that session's completed segments while recording continues
+        # (when transcript cleaning is on)
+        self._segment_cleaner: Optional[IncrementalCleaner] = None
+        # Latency trace of the current recording; handed to its processing run
+        self._trace: Optional[tracing.Trace] = None
+        # Whether the current recording's audio dropouts were already flagged
+        self._xrun_flagged = False
         # Which recording status the current recording uses (varies by mode)
         self._active_recording_status = AppStatus.RECORDING
         # Serializes start/stop transitions (hotkey presses arrive on separate threads)
@@ -116,6 +154,7 @@ class VoiceTypingApp:
 
         # Setup single tray icon instance
         setup_tray_icon(self)
+        warmup.mark('tray')
 
         # Now set the callbacks
         self.status_manager.set_callbacks(
@@ -279,11 +318,14 @@ class VoiceTypingApp:
         keep_paths = {Path(keep).resolve()} if keep else set()
         for queue in self._recent_queues:
             keep_paths.update(Path(p).resolve() for p in queue.active_paths())
+        if self.audio_archive is not None:
+            keep_paths.update(self.audio_archive.pending_paths())
         for snapshot in self._snapshot_paths():
             if snapshot.resolve() in keep_paths:
                 continue
             try:
                 snapshot.unlink()
+                recording_info.forget(str(snapshot))
             except OSError as e:
                 self.logger.warning(f"Could not delete old snapshot {snapshot}: {e}")
 
@@ -314,9 +356,10 @@ class VoiceTypingApp:
             if not self.recording:
                 # Cancel any in-flight processing before starting a new recording
                 if self.processing_thread and self.processing_thread.is_alive():
-                    self.cancel_flag.set()
+                    self._cancel_processing()
                     self.logger.info("Cancelled in-flight processing for new recording")
                 self._recording_generation += 1
+                trace = tracing.Trace()
                 self.recorder.meeting_mode = bool(self.settings.get('meeting_mode'))
                 self.recorder.phone_mode = (not self.recorder.meeting_mode and
                                             bool(self.settings.get('phone_mode')))
@@ -336,9 +379,13 @@ class VoiceTypingApp:
                 if self._streaming_session is not None:
                     self._streaming_session.abort()  # stale leftover
                     self._streaming_session = None
+                if self._segment_cleaner is not None:
+                    self._segment_cleaner.cancel()
+                    self._segment_cleaner = None
                 if (not self.recorder.meeting_mode and not self.recorder.phone_mode
                         and self.settings.get('streaming_dictation')):
-                    self._streaming_session = self._start_streaming_session()
+                    with trace.span('stream_open'):
+                        self._streaming_session = self._start_streaming_session()
                 if self._streaming_session is not None:
                     from services.openai_realtime_stt import REALTIME_SAMPLE_RATE
                     self.recorder.samplerate = REALTIME_SAMPLE_RATE
@@ -352,15 +399,26 @@ class VoiceTypingApp:
                 # flushes chunks into an ordered transcription queue while
                 # recording continues; clicking the indicator ends the session
                 self.recorder.continuation_chunk = False
+                self.recorder.auto_flush_after = None
+                self.recorder.auto_flush_max = None
                 if self.recorder.meeting_mode or self.recorder.phone_mode:
                     self._chunk_queue = self._make_chunk_queue(
                         phone=self.recorder.phone_mode)
                     self._session_active = True
+                    self.recorder.reset_overlap()
+                    self.recorder.auto_flush_after = self.settings.get('session_chunk_target_s')
+                    self.recorder.auto_flush_max = self.settings.get('session_chunk_max_s')
 
                 self.logger.info(f"🎙️ Starting recording...{mode_note}")
                 self.last_recording = None
+                if self._xrun_flagged:
+                    self._xrun_flagged = False
+                    self.ui_feedback.set_recording_note('')
                 self.recording = True
-                self.recorder.start()
+                with trace.span('recorder_start'):
+                    self.recorder.start()
+                # Conversation sessions deliver chunk by chunk; only dictations are traced
+                self._trace = None if self._session_active else trace
                 self.status_manager.set_status(self._active_recording_status)
                 self._watchdog_token += 1
                 token = self._watchdog_token
@@ -375,12 +433,17 @@ class VoiceTypingApp:
         with self._toggle_lock:
             self.recording = False
             gen = self._recording_generation
-            self.recorder.stop()
+            trace, self._trace = self._trace or tracing.Trace(), None
+            trace.mark_stopped()
+            with trace.span('recorder_stop'):
+                self.recorder.stop()
             self.logger.info("Recording stopped")
+            self._record_audio_health()
 
             # Detach the streaming session from app state; from here it either
             # travels with this recording's processing or gets aborted
             stream_session, self._streaming_session = self._streaming_session, None
+            segment_cleaner, self._segment_cleaner = self._segment_cleaner, None
 
             # If a new recording started while we were stopping, bail out entirely
             if gen != self._recording_generation:
@@ -410,11 +473,13 @@ class VoiceTypingApp:
                 self.recorder.error = None
 
             # Snapshot path so a new recording can't overwrite the file mid-transcription
+            snapshot_start = time.perf_counter()
             recording_path = self.recorder.filename
             if os.path.exists(recording_path):
                 snapshot_path = recording_path + f".{gen}.wav"
                 try:
                     os.replace(recording_path, snapshot_path)
+                    recording_info.moved(recording_path, snapshot_path)
                     self.last_recording = snapshot_path
                 except OSError:
                     self.last_recording = recording_path
@@ -422,19 +487,28 @@ class VoiceTypingApp:
                 self.last_recording = recording_path
             # Older snapshots are no longer retry candidates; drop them
             self._sweep_snapshots(keep=self.last_recording)
+            trace.add('snapshot', snapshot_start)
             self.status_manager.set_status(AppStatus.PROCESSING)
-            self.process_audio(stream_session)
+            self.process_audio(stream_session, segment_cleaner, trace)
 
-    def _flush_chunk(self) -> None:
+    def _flush_chunk(self, auto: bool = False) -> None:
         """Seal the current chunk, queue it for transcription, resume recording.
 
         The gap between stop and restart is the quick-restart cost the session
         design accepts (~0.3s mic-only, up to ~1-2s in meeting mode where the
-        loopback thread is rejoined and the 2-channel file composed)."""
+        loopback thread is rejoined and the 2-channel file composed).
+
+        An auto flush (from the watchdog) only goes ahead if the recorder
+        still asks for one: the flags stay latched until start(), so if
+        another flush got the lock first and restarted the recording, this
+        one must not cut the fresh chunk short."""
         with self._toggle_lock:
             if not (self.recording and self._session_active):
                 return
+            if auto and not (self.recorder.flush_due or self.recorder.max_duration_reached):
+                return
             self.recorder.stop()
+            self._record_audio_health()
             self._recording_generation += 1
             gen = self._recording_generation
             path = self.recorder.filename
@@ -442,25 +516,56 @@ class VoiceTypingApp:
                 snapshot = path + f".{gen}.wav"
                 try:
                     os.replace(path, snapshot)
+                    recording_info.moved(path, snapshot)
                 except OSError:
                     snapshot = None
                     self.logger.error("Could not snapshot chunk; skipping it", exc_info=True)
                 if snapshot:
-                    is_valid, reason = self.recorder.analyze_recording(snapshot)
-                    if is_valid:
-                        index = self._chunk_queue.submit(snapshot)
+                    index = self._queue_chunk(self._chunk_queue, snapshot)
+                    if index is not None:
                         self.logger.info(f"Chunk {index} queued for transcription")
-                    else:
-                        # Quiet flush (nothing said since the last one): drop it
-                        # without the error flash a failed dictation would get
-                        self.logger.info(f"Skipping chunk: {reason}")
-                        try:
-                            os.remove(snapshot)
-                        except OSError:
-                            pass
             self.recorder.continuation_chunk = True
             self.recorder.start()
 
+    def _start_auto_flush(self) -> None:
+        """Flush the chunk on a worker thread, at most one at a time: later
+        watchdog ticks see _flush_in_flight until the recording restarts."""
+        self._flush_in_flight = True
+
+        def run() -> None:
+            try:
+                self._flush_chunk(auto=True)
+            finally:
+                self._flush_in_flight = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def _queue_chunk(self, queue: ChunkQueue, snapshot: str) -> Optional[int]:
+        """Submit a sealed chunk file, overlapped with the previous chunk's tail.
+
+        Quiet chunks (nothing said since the last flush) are dropped without
+        the error flash a failed dictation would get. Returns the chunk number,
+        or None if the chunk was dropped."""
+        is_valid, reason = self.recorder.analyze_recording(snapshot)
+        if not is_valid:
+            self.logger.info(f"Skipping chunk: {reason}")
+            # Its tail is silence, and the next chunk must not be matched
+            # against a chunk that was never delivered
+            self.recorder.reset_overlap()
+            try:
+                os.remove(snapshot)
+            except OSError:
+                pass
+            return None
+        overlap_s, duration_s = 0.0, None
+        carry_s = self.settings.get('session_chunk_overlap_s')
+        if carry_s:
+            try:
+                overlap_s, duration_s = self.recorder.carry_overlap(snapshot, carry_s)
+            except Exception:
+                self.logger.warning("Could not overlap chunk with the previous one", exc_info=True)
+                self.recorder.reset_overlap()
+        return queue.submit(snapshot, overlap_s=overlap_s, duration_s=duration_s)
+
     def _end_session(self, auto_stopped: bool = False,
                      error: Optional[str] = None) -> None:
         """End the conversation session, discarding the unflushed tail.
@@ -480,6 +585,7 @@ class VoiceTypingApp:
                 self.recorder.stop()
             except Exception:
                 self.logger.error("Error stopping recorder", exc_info=True)
+            self._record_audio_health()
             self.recorder.auto_stopped = False
             self.recorder.error = None
             queue = self._chunk_queue
@@ -489,11 +595,10 @@ class VoiceTypingApp:
                 snapshot = self.recorder.filename + f".{self._recording_generation}.wav"
                 try:
                     os.replace(self.recorder.filename, snapshot)
-                    if self.recorder.analyze_recording(snapshot)[0]:
-                        index = queue.submit(snapshot)
+                    recording_info.moved(self.recorder.filename, snapshot)
+                    index = self._queue_chunk(queue, snapshot)
+                    if index is not None:
                         self.logger.info(f"Salvaged session tail as chunk {index} after recording error")
-                    else:
-                        os.remove(snapshot)
                 except OSError:
                     self.logger.warning("Could not salvage session tail", exc_info=True)
             try:
@@ -503,6 +608,7 @@ class VoiceTypingApp:
                 self.logger.warning("Could not delete session tail", exc_info=True)
             self.ui_feedback.set_recording_note('')
             self._note_hold_until = 0.0
+            self._xrun_flagged = False
             if auto_stopped:
                 # First chunk never made a sound; nothing was queued
                 if queue is not None:
@@ -576,7 +682,25 @@ class VoiceTypingApp:
         def is_current() -> bool:
             return queue_ref and queue_ref[0] is self._chunk_queue
 
-        def on_result(index: int, text: str, path: str) -> None:
+        def remove_chunk_file(path: str) -> None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        def on_result(index: int, text: str, path: str, overlap_s: float) -> None:
+            # Deliveries are serialized, so this only pastes and enqueues: the
+            # history write is already queued to its writer thread, the menu
+            # rebuild is coalesced and the file is deleted by _chunk_cleanup
+            if not text.strip():
+                # Everything in the chunk repeated the previous chunk's overlap
+                self.logger.info(f"Chunk {index} had no new words")
+                self._chunk_cleanup.submit(remove_chunk_file, path)
+                return
+            # Timed like a dictation: the paste's span includes the wait for
+            # the Tk thread; deliver_ms is how long the delivery slot was held
+            trace = tracing.Trace(kind='chunk')
+            started = time.perf_counter()
             prefix = ""
             if preamble_pending[0]:
                 preamble_pending[0] = False
@@ -584,16 +708,21 @@ class VoiceTypingApp:
             # Chunk headers mark discontinuities (mid-sentence cuts, and in
             # labeled phone transcripts, where speaker labels reset)
             header = f"--- [chunk {index}] ---\n" if phone else ""
-            self.history.add(text)
-            self.ui_feedback.insert_text(prefix + header + text + "\n",
-                                         output_mode=self.settings.get('output_mode'))
-            if self.update_icon_menu:
-                self.update_icon_menu()
-            self.logger.info(f"Chunk {index} delivered ({len(text)} chars)")
-            try:
-                os.remove(path)
-            except OSError:
-                pass
+            with trace.activate():
+                with trace.span('history'):
+                    archived = self._add_to_history(text, path, remove_recording=True,
+                                                    overlap_s=overlap_s)
+                self.ui_feedback.insert_text(prefix + header + text + "\n",
+                                             output_mode=self.settings.get('output_mode'))
+            if self.request_menu_update:
+                self.request_menu_update()
+            if not archived:
+                self._chunk_cleanup.submit(remove_chunk_file, path)
+            deliver_ms = (time.perf_counter() - started) * 1000
+            trace.set(mode='phone' if phone else 'meeting', index=index, chars=len(text),
+                      deliver_ms=round(deliver_ms, 1))
+            trace.finish('ok', on_record=self.metrics.record)
+            self.logger.info(f"Chunk {index} delivered ({len(text)} chars, {deliver_ms:.1f} ms)")
 
         def on_retrying(index: int) -> None:
             if self._session_active and is_current():
@@ -645,13 +774,16 @@ class VoiceTypingApp:
                 # dictation's transcribing/cleaning status is left alone.
                 self.status_manager.set_status(AppStatus.IDLE)
 
+        # Cancelling the queue also aborts its chunks' in-flight requests
+        token = async_core.CancelToken()
         queue = ChunkQueue(
-            transcribe_fn=transcribe_audio,
+            transcribe_fn=lambda path: transcribe_chunk(path, cancelled=token),
             on_result=on_result,
             on_retrying=on_retrying,
             on_failed=on_failed,
             on_pending=on_pending,
             on_drained=on_drained,
+            on_cancel=token.cancel,
         )
         queue_ref.append(queue)
         # Registry for sweep protection: prune queues that no longer hold any
@@ -661,6 +793,40 @@ class VoiceTypingApp:
         self._recent_queues.append(queue)
         return queue
 
+    def _record_audio_health(self) -> None:
+        """Write the just-stopped recording's audio callback health to the
+        metrics log (one 'recording' line per recording or session chunk)."""
+        health = self.recorder.health
+        if not health.blocks:
+            return
+        if self.recorder.meeting_mode:
+            mode = 'meeting'
+        elif self.recorder.phone_mode:
+            mode = 'phone'
+        else:
+            mode = 'dictation'
+        self.metrics.record({'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+                             'kind': 'recording', 'mode': mode, **health.summary()})
+        if health.xruns:
+            self.logger.info(f"Audio dropouts this recording: {health.input_overflows} input overflows, "
+                             f"{health.input_underflows} underflows ({health.xruns_per_min():.1f}/min); "
+                             f"slowest callback {health.max_ms:.1f} ms")
+
+    def _check_audio_health(self) -> None:
+        """Flag the recording once its xrun rate crosses xrun_warning_per_min
+        (dropouts mean missing audio, usually a busy CPU or USB bus)."""
+        threshold = self.settings.get('xrun_warning_per_min')
+        health = self.recorder.health
+        if self._xrun_flagged or not threshold or not health.xruns_exceed(threshold):
+            return
+        self._xrun_flagged = True
+        self.logger.warning(f"Audio dropouts: {health.xruns} in {health.frames / health.samplerate:.0f}s "
+                            f"({health.xruns_per_min():.1f}/min)")
+        if self._session_active:
+            self._set_session_note("⚠️ audio dropouts", hold_s=6.0)
+        else:
+            self.ui_feedback.set_recording_note("⚠️ audio dropouts")
+
     def _set_session_note(self, note: str, hold_s: float = 0.0) -> None:
         """Show a note in the recording label; hold_s protects it from being
         overwritten by routine pending-count updates for that long."""
@@ -700,28 +866,44 @@ class VoiceTypingApp:
                 threading.Thread(target=self._stop_recording, daemon=True).start()
             return
 
+        # Session auto-flush flags stay set until the flush restarts the
+        # recorder (start() clears them); _flush_in_flight keeps the ticks in
+        # between from starting a second flush
         if self.recording and self.recorder.max_duration_reached:
             if self._session_active:
                 # Roll into a new chunk instead of ending the session
-                self.recorder.max_duration_reached = False
-                self.logger.warning("Max chunk duration reached; auto-flushing")
-                threading.Thread(target=self._flush_chunk, daemon=True).start()
+                if not self._flush_in_flight:
+                    self.logger.warning("Max chunk duration reached; auto-flushing")
+                    self._start_auto_flush()
             else:
                 threading.Thread(target=self._stop_recording, daemon=True).start()
                 return
 
+        if (self.recording and self._session_active and self.recorder.flush_due
+                and not self._flush_in_flight):
+            # Chunk reached its target length and the conversation paused:
+            # send it without waiting for a caps press
+            self.logger.info("Chunk target length reached at a pause; auto-flushing")
+            self._start_auto_flush()
+
         if self.recording:
+            self._check_audio_health()
             # Self-heal: if a stale processing thread overwrote our status, reassert it
             if self.status_manager.current_status != self._active_recording_status:
                 self.status_manager.set_status(self._active_recording_status)
             self.ui_feedback.root.after(100, lambda: self._check_recorder_status(token))
 
-    def process_audio(self, stream_session=None) -> None:
+    def process_audio(self, stream_session=None,
+                      segment_cleaner: Optional[IncrementalCleaner] = None,
+                      trace: Optional[tracing.Trace] = None) -> None:
         try:
             self.cancel_flag.clear()
             gen = self._recording_generation
+            token = async_core.CancelToken()
+            self._request_token = token
             self.processing_thread = threading.Thread(
-                target=self._process_audio_thread, args=(gen, stream_session))
+                target=self._process_audio_traced,
+                args=(trace or tracing.Trace(), gen, stream_session, token, segment_cleaner))
             self.processing_thread.start()
         except Exception as e:
             if stream_session is not None:
@@ -734,28 +916,52 @@ class VoiceTypingApp:
         """Check if this processing run has been superseded by a newer recording."""
         return gen != self._recording_generation or self.cancel_flag.is_set()
 
-    def _process_audio_thread(self, gen: int, stream_session=None) -> None:
+    def _cancel_processing(self) -> None:
+        """Mark the processing run stale and abort its in-flight requests.
+
+        Cancelling the token frees the upload's or LLM call's connection
+        right away, instead of the superseded request running to completion
+        and holding a pooled connection the next dictation may need."""
+        self.cancel_flag.set()
+        self._request_token.cancel()
+
+    def _process_audio_traced(self, trace: tracing.Trace, *args) -> None:
+        """Run _process_audio_thread with its latency trace active, then record it."""
+        outcome = 'failed'
+        with trace.activate():
+            try:
+                outcome = self._process_audio_thread(*args)
+            finally:
+                trace.finish(outcome, self.metrics.record)
+
+    def _process_audio_thread(self, gen: int, stream_session=None,
+                              token: Optional[async_core.CancelToken] = None,
+                              segment_cleaner: Optional[IncrementalCleaner] = None) -> str:
+        """Returns the outcome for the latency trace: ok, empty, skipped,
+        cancelled or failed."""
         try:
             self.logger.info("Starting audio processing")
-            is_valid, reason = self.recorder.analyze_recording(self.last_recording)
+            recording_path = self.last_recording
+            with tracing.span('analyze'):
+                is_valid, reason = self.recorder.analyze_recording(recording_path)
 
             if self._is_stale(gen):
                 if stream_session is not None:
                     stream_session.abort()
                 self.logger.info("Processing cancelled (stale generation).")
-                return
+                return 'cancelled'
 
             if not is_valid:
                 if stream_session is not None:
                     stream_session.abort()
                 if self._is_stale(gen):
-                    return
+                    return 'cancelled'
                 self.logger.warning(f"Skipping transcription: {reason}")
                 self.status_manager.set_status(
                     AppStatus.ERROR,
                     "⛔ Skipped: " + ("too short" if "short" in reason.lower() else "mostly silence")
                 )
-                return
+                return 'skipped'
 
             # Streaming path: the realtime session already has the audio; just
             # flush and collect. Any failure falls through to the batch upload.
@@ -764,47 +970,77 @@ class VoiceTypingApp:
                 try:
                     if not self.cancel_flag.is_set():
                         self.status_manager.set_status(AppStatus.TRANSCRIBING)
-                    streamed_text = stream_session.finish()
+                    with tracing.span('stream_finish'):
+                        streamed_text = stream_session.finish()
                     self.logger.info(f"Streaming transcription ready ({len(streamed_text)} chars)")
                 except Exception as e:
                     self.logger.warning(f"Streaming transcription failed, falling back to batch: {e}")
                     stream_session.abort()
 
+            # Streamed cleaning: paste each sentence as the LLM produces it
+            output_mode = self.settings.get('output_mode')
+            delivered = []
+            on_partial = None
+            if (self.clean_transcription_enabled and self.settings.get('streaming_cleaning')
+                    and self.ui_feedback.supports_incremental_output(output_mode)):
+                def on_partial(piece: str) -> None:
+                    if self._is_stale(gen):
+                        return
+                    self.ui_feedback.insert_partial(piece, output_mode=output_mode,
+                                                    first=not delivered)
+                    delivered.append(piece)
+
             self.logger.info("Starting transcription")
-            success, result = self._attempt_transcription(streamed_text=streamed_text)
+            tracing.annotate(provider='realtime' if streamed_text else provider_for(recording_path))
+            try:
+                # Background jobs (local HTTP server, archive re-transcription)
+                # wait while a dictation is being transcribed
+                with work_pool.get_pool().interactive():
+                    success, result = self._attempt_transcription(
+                        streamed_text=streamed_text, cancel=token, on_partial=on_partial,
+                        segment_cleaner=segment_cleaner if streamed_text else None)
+            finally:
+                if delivered:
+                    # Always close the sequence so the clipboard gets restored
+                    self.ui_feedback.insert_partial("", output_mode=output_mode, final=True)
 
             if self._is_stale(gen):
                 self.logger.info("Processing cancelled (stale generation).")
-                return
+                return 'cancelled'
 
             if not success:
                 if self._is_stale(gen):
-                    return
+                    return 'cancelled'
                 if result == "timeout":
                     self.ui_feedback.show_error_with_retry("⏱️ Request timed out - try again")
                     self.status_manager.set_status(AppStatus.ERROR, "⏱️ Request timed out")
                 else:
                     self.ui_feedback.show_error_with_retry("⚠️ Transcription failed")
                     self.status_manager.set_status(AppStatus.ERROR, "⚠️ Error processing audio")
-            elif result:
-                if self._is_stale(gen):
-                    return
-                self.history.add(result)
-                output_mode = self.settings.get('output_mode')
+                return 'failed'
+            if not result:
+                return 'empty'
+            if self._is_stale(gen):
+                return 'cancelled'
+            tracing.annotate(chars=len(result), streamed=bool(streamed_text))
+            with tracing.span('history'):
+                self._add_to_history(result, recording_path)
+            if not delivered:
                 self.ui_feedback.insert_text(result, output_mode=output_mode)
-                if self.update_icon_menu:
-                    self.update_icon_menu()
-                self.status_manager.set_status(AppStatus.IDLE)
-                if self.settings.get('log_transcript_text'):
-                    preview_len = 50
-                    preview = result[:preview_len] + "..." if len(result) > preview_len else result
-                    self.logger.info(f"Transcription completed ({len(result)} chars): {preview}")
-                else:
-                    self.logger.info(f"Transcription completed ({len(result)} chars)")
+            if self.update_icon_menu:
+                self.update_icon_menu()
+            self.status_manager.set_status(AppStatus.IDLE)
+            if self.settings.get('log_transcript_text'):
+                preview_len = 50
+                preview = result[:preview_len] + "..." if len(result) > preview_len else result
+                self.logger.info(f"Transcription completed ({len(result)} chars): {preview}")
+            else:
+                self.logger.info(f"Transcription completed ({len(result)} chars)")
+            return 'ok'
 
         except Exception as e:
             if self._is_stale(gen):
-                return
+                return 'cancelled'
             self.logger.error("Error in _process_audio_thread:", exc_info=True)
             if 'timeout' in str(e).lower():
                 self.ui_feedback.show_error_with_retry("⏱️ Request timed out - try again")
@@ -812,15 +1048,31 @@ class VoiceTypingApp:
             else:
                 self.ui_feedback.show_error_with_retry("⚠️ Transcription failed")
                 self.status_manager.set_status(AppStatus.ERROR, "⚠️ Error processing audio")
+            return 'failed'
+        finally:
+            if segment_cleaner is not None:
+                # No-op once finished; aborts leftovers on every early exit
+                segment_cleaner.cancel()
 
     def _attempt_transcription(self, recording_path: Optional[str] = None,
-                               streamed_text: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+                               streamed_text: Optional[str] = None,
+                               cancel: Optional[async_core.CancelToken] = None,
+                               on_partial: Optional[Callable[[str], None]] = None,
+                               segment_cleaner: Optional[IncrementalCleaner] = None
+                               ) -> Tuple[bool, Optional[str]]:
         """Attempt transcription and return (success, result or error_type).
 
         Pass recording_path explicitly when the caller may run concurrently
         with new recordings (retry), since self.last_recording is mutable.
         If streamed_text is provided (realtime streaming already transcribed
-        the recording), the batch upload is skipped but cleaning still runs."""
+        the recording), the batch upload is skipped but cleaning still runs.
+        cancel is the processing run's token; without one (retries) the
+        requests are aborted when cancel_flag is set.
+        With on_partial, cleaning is streamed and each cleaned sentence is
+        passed to it as generated; the caller must not insert the result
+        again if anything was delivered. segment_cleaner holds the streamed
+        segments already cleaned during recording, if any."""
+        cancelled = cancel if cancel is not None else self.cancel_flag.is_set
         try:
             path = recording_path or self.last_recording
             if not path:
@@ -831,7 +1083,12 @@ class VoiceTypingApp:
             # so a cancel can't be overwritten by a stale pulsing status)
             if not self.cancel_flag.is_set():
                 self.status_manager.set_status(AppStatus.TRANSCRIBING)
-            text = streamed_text if streamed_text else transcribe_audio(path)
+            # Cancelling aborts the upload itself, not just the result
+            if streamed_text:
+                text = streamed_text
+            else:
+                with tracing.span('transcribe'):
+                    text = transcribe_audio(path, cancelled=cancelled)
 
             if self.cancel_flag.is_set():
                 return False, "cancelled"
@@ -848,9 +1105,29 @@ class VoiceTypingApp:
                     llm_model = self.settings.get('llm_model')
                     cleaning_timeout = self.settings.get('cleaning_timeout')
 
-                    cleaned_text = clean_transcription(text, model=llm_model, timeout=cleaning_timeout)
+                    # Streamed segments were mostly cleaned while recording;
+                    # None if they don't add up to the final text
+                    cleaned_text = None
+                    with tracing.span('clean'):
+                        if segment_cleaner is not None:
+                            cleaned_text = segment_cleaner.finish(text, cancelled=cancelled)
+                        if cleaned_text is None and on_partial is not None:
+                            cleaned_text = clean_transcription_stream(
+                                text, model=llm_model, on_sentence=on_partial,
+                                timeout=cleaning_timeout, cancelled=cancelled)
+                        elif cleaned_text is None:
+                            cleaned_text = clean_transcription(text, model=llm_model, timeout=cleaning_timeout,
+                                                               cancelled=cancelled)
                     self.logger.info("Transcription cleaned successfully")
                     return True, cleaned_text
+                except async_core.Cancelled:
+                    raise
+                except CleaningInterrupted as e:
+                    # Part of the cleaned text is already on screen; pasting the
+                    # raw text now would duplicate it, so keep it in history only
+                    self.logger.warning(f"Streamed cleaning interrupted after {len(e.delivered)} chars: {e}")
+                    self.ui_feedback.show_warning("⚠️ Cleaning interrupted — full raw transcript in history", 4000)
+                    return True, text
                 except Exception as e:
                     self.logger.warning(f"LLM cleaning failed, falling back to raw transcription. Error: {e}")
                     # Show a brief warning that we're using the fallback
@@ -858,6 +1135,9 @@ class VoiceTypingApp:
                     return True, text  # Fallback to original text
 
             return True, text
+        except async_core.Cancelled:
+            self.logger.info("Transcription request aborted (cancelled)")
+            return False, "cancelled"
         except Exception as e:
             # Check if it's a timeout exception
             if 'timeout' in str(e).lower():
@@ -877,10 +1157,11 @@ class VoiceTypingApp:
 
         def retry_thread():
             self.status_manager.set_status(AppStatus.PROCESSING)
-            success, result = self._attempt_transcription(recording_path)
+            with work_pool.get_pool().interactive():
+                success, result = self._attempt_transcription(recording_path)
 
             if success and result:
-                self.history.add(result)
+                self._add_to_history(result, recording_path)
                 pyperclip.copy(result)  # Copy to clipboard instead of direct insertion
                 self.status_manager.set_status(AppStatus.IDLE)
                 self.ui_feedback.show_warning("✅ Transcription copied to clipboard", 3000)
@@ -893,6 +1174,82 @@ class VoiceTypingApp:
 
         threading.Thread(target=retry_thread, daemon=True).start()
 
+    def _add_to_history(self, text: str, recording_path: Optional[str] = None,
+                        remove_recording: bool = False, overlap_s: float = 0.0) -> bool:
+        """Add a transcript to history, archiving its recording if the archive
+        is on. With remove_recording the archive deletes the file once it is
+        encoded; returns whether it took the file. overlap_s: seconds of a
+        session chunk's recording replayed from the previous chunk."""
+        audio = None
+        if self.audio_archive is not None and recording_path:
+            audio = self.audio_archive.submit(recording_path, remove=remove_recording)
+        self.history.add(text, audio=audio, overlap_s=overlap_s or None)
+        return audio is not None and remove_recording
+
+    def _create_audio_archive(self) -> audio_archive.AudioArchive:
+        return audio_archive.AudioArchive(max_mb=self.settings.get('audio_archive_max_mb'),
+                                          max_days=self.settings.get('audio_archive_max_days'))
+
+    def toggle_audio_archive(self) -> None:
+        enabling = not self.settings.get('audio_archive')
+        self.settings.set('audio_archive', enabling)
+        if enabling and self.audio_archive is None:
+            self.audio_archive = self._create_audio_archive()
+        elif not enabling and self.audio_archive is not None:
+            archive, self.audio_archive = self.audio_archive, None
+            threading.Thread(target=archive.close, daemon=True).start()
+        self.logger.info(f"Audio archive {'enabled' if enabling else 'disabled'}")
+
+    def retranscribe_archive(self) -> None:
+        """Re-transcribe every archived recording with the current STT provider
+        (and cleaning settings), updating the history entries."""
+        archive = self.audio_archive
+        if archive is None or self._retranscribing:
+            return
+        self._retranscribing = True
+
+        def transcribe(path: str) -> str:
+            text = transcribe_audio(path)
+            if self.clean_transcription_enabled and not is_conversation_recording(path):
+                try:
+                    text = clean_transcription(text, model=self.settings.get('llm_model'),
+                                               timeout=self.settings.get('cleaning_timeout'))
+                except Exception as e:
+                    self.logger.warning(f"Cleaning failed during re-transcription, keeping raw text: {e}")
+            return text
+
+        def on_progress(done: int, total: int) -> None:
+            if not self.recording:
+                self.ui_feedback.show_warning(f"🔁 Re-transcribing archive: {done}/{total}", 3000)
+
+        def run() -> None:
+            try:
+                counts = audio_archive.retranscribe(self.history, archive, transcribe,
+                                                    on_progress=on_progress)
+                self.ui_feedback.show_warning(
+                    f"✅ Re-transcribed {counts['updated']} of {counts['total']} archived recordings", 5000)
+            except Exception:
+                self.logger.error("Re-transcribing the audio archive failed", exc_info=True)
+                self.ui_feedback.show_warning("⚠️ Re-transcribing the archive failed", 5000)
+            finally:
+                self._retranscribing = False
+                if self.update_icon_menu:
+                    self.update_icon_menu()
+
+        threading.Thread(target=run, name='retranscribe-archive', daemon=True).start()
+
+    def open_history_search(self) -> None:
+        """Open the history quick-find window. Safe to call from the tray thread."""
+        def impl() -> None:
+            if self._history_search is None:
+                self._history_search = HistorySearchWindow(
+                    self.ui_feedback.root, self.history,
+                    lambda text: self.ui_feedback.insert_text(
+                        text, output_mode=self.settings.get('output_mode')),
+                    self.ui_feedback.call_on_main)
+            self._history_search.open()
+        self.ui_feedback.call_on_main(impl)
+
     def toggle_clean_transcription(self) -> None:
         self.clean_transcription_enabled = not self.clean_transcription_enabled
         self.settings.set('clean_transcription', self.clean_transcription_enabled)
@@ -993,6 +1350,9 @@ class VoiceTypingApp:
         # Start keyboard listener
         self.listener.start()
 
+        # Once the mainloop is running, load what the first dictation needs
+        self.ui_feedback.root.after(0, self._on_ready)
+
         # Start the UI feedback's tkinter mainloop in the main thread
         try:
             self.ui_feedback.root.mainloop()
@@ -1000,12 +1360,44 @@ class VoiceTypingApp:
             self.cleanup()
             sys.exit(0)
 
+    def _on_ready(self) -> None:
+        warmup.mark('ready')
+        warmup.start(self.settings)
+        if self.settings.get('http_server'):
+            self._start_http_server()
+
+    def _start_http_server(self) -> None:
+        # Deferred import: the server is optional and off by default
+        from modules import transcription_server
+        self._http_server = transcription_server.start_from_settings(self.settings)
+        if self._http_server is None:
+            self.ui_feedback.show_warning("⚠️ Local transcription server could not start (see log)", 4000)
+
+    def toggle_http_server(self) -> None:
+        enabling = not self.settings.get('http_server')
+        self.settings.set('http_server', enabling)
+        if enabling and self._http_server is None:
+            self._start_http_server()
+        elif not enabling and self._http_server is not None:
+            server, self._http_server = self._http_server, None
+            threading.Thread(target=server.stop, daemon=True).start()
+        self.logger.info(f"Local transcription server {'enabled' if enabling else 'disabled'}")
+
     def cleanup(self) -> None:
         """Ensure proper cleanup of all resources"""
         self.logger.info("Cleaning up application resources")
         self.listener.stop()
         if self.recording:
             self.recorder.stop()
+        if self._http_server is not None:
+            self._http_server.stop()
+        close_transcribers()
+        if self.audio_archive is not None:
+            self.audio_archive.close()
+        self._chunk_cleanup.shutdown()
+        self.history.close()
+        self.metrics.close()
+        close_cache()
         self.ui_feedback.cleanup()
 
     def handle_ui_click(self) -> None:
@@ -1022,7 +1414,7 @@ class VoiceTypingApp:
         elif status in (AppStatus.PROCESSING, AppStatus.TRANSCRIBING, AppStatus.CLEANING):
             self.logger.info("Canceling processing...")
             if self.processing_thread and self.processing_thread.is_alive():
-                self.cancel_flag.set()
+                self._cancel_processing()
             elif self._chunk_queue is not None:
                 # Only when no dictation is processing is the visible activity
                 # the session queue's post-end drain; cancelling the dictation
@@ -1039,6 +1431,9 @@ class VoiceTypingApp:
             if self._streaming_session is not None:
                 self._streaming_session.abort()
                 self._streaming_session = None
+            if self._segment_cleaner is not None:
+                self._segment_cleaner.cancel()
+                self._segment_cleaner = None
             try:
                 self.recorder.stop()
             except Exception:
@@ -1055,8 +1450,15 @@ class VoiceTypingApp:
             if not str(model).startswith('gpt-4o'):
                 model = 'gpt-4o-transcribe'  # realtime doesn't support whisper-1
             language = self.settings.get('stt_language') or 'en'
-            session = RealtimeDictationSession(model=model, language=language)
+            cleaner = None
+            if self.clean_transcription_enabled:
+                cleaner = IncrementalCleaner(self.settings.get('llm_model'),
+                                             self.settings.get('cleaning_timeout'))
+            session = RealtimeDictationSession(
+                model=model, language=language,
+                on_segment=cleaner.add if cleaner is not None else None)
             session.start()
+            self._segment_cleaner = cleaner
             return session
         except Exception as e:
             self.logger.warning(f"Streaming session unavailable, using batch: {e}")
@@ -1093,14 +1495,23 @@ class VoiceTypingApp:
             # We pass sys.argv to the new process to restart with the same arguments.
             # This is more reliable than os.startfile as it doesn't depend on file associations.
             self.logger.debug(f"Restarting with command: {[sys.executable] + sys.argv}")
+            # Finish queued FLAC encodes before the new instance starts: their
+            # history rows already name them, and its startup sweep would
+            # delete the chunk files still waiting to be encoded
+            if self.audio_archive is not None:
+                self.audio_archive.close()
             # Hand off the single-instance mutex so the new instance can acquire it
             release_single_instance_lock(self._instance_mutex)
             self._instance_mutex = None
             subprocess.Popen([sys.executable] + sys.argv)
+            self.history.close()
+            self.metrics.close()
+            close_cache()
 
             # Exit current instance
             self.logger.info("New instance started. Exiting current instance.")
             # Ensure all logs are written before exiting
+            stop_logging()
             logging.shutdown()
             os._exit(0)
         except Exception as e: